@@ -0,0 +1,263 @@
+"""
+Módulo agenda_conteos: programación de conteos cíclicos con capacidad diaria.
+
+`ConteoCiclico.generar_plan` reparte los conteos faltantes de cada SKU a intervalos
+fijos desde hoy, por lo que todos los SKU urgentes caen el día 0 y en los mismos
+intervalos. `ProgramadorConteos` toma ese plan (ya ordenado por prioridad) y asigna
+las fechas día por día con montículos de prioridad:
+
+  - Cada SKU se libera el día 0; al contarse, su siguiente conteo se libera
+    `periodo_dias / faltantes` días después.
+  - Cada día se toman los conteos liberados de mayor prioridad (posición en el plan)
+    sin superar la capacidad global ni la de cada zona (`ALMACENES` del layout).
+    Hay un montículo por zona y uno de cabezas de zona, así que un día cuesta
+    O(zonas + conteos_del_día · log n).
+  - Lo que no cabe se queda en la cola para el día siguiente; los conteos que no
+    caben en el periodo se informan como `sin_programar`.
+
+Los conteos de cada día se ordenan por columna y, dentro de ella, en serpentina
+(una columna hacia abajo, la siguiente hacia arriba) para que el recorrido sea corto.
+
+`RecorridosConteo` pasa las ubicaciones de cada fecha de un plan (nivelado o no) por
+`RobotAlmacen` y entrega la ruta ordenada y su costo por día, de modo que dos
+calendarios se puedan comparar por costo de desplazamiento y no solo por score.
+"""
+
+import heapq
+import math
+from collections import Counter
+from datetime import date, timedelta
+
+from .entrada import GestorEntrada
+from .layout import obtener_layout
+from .robot import RobotAlmacen
+
+
+class ProgramadorConteos:
+    """Nivela las fechas de un plan de conteo respetando capacidades diarias."""
+
+    def __init__(self, capacidad_diaria=None, capacidad_por_zona=None, periodo_dias=365, layout=None,
+                 incluir_mantenimiento=True):
+        # capacidad_diaria: conteos/día en total (None: la mínima que reparte todo el periodo)
+        self.capacidad_diaria = int(capacidad_diaria) if capacidad_diaria else None
+        # capacidad_por_zona: {nombre de almacén: conteos/día}; las zonas ausentes no tienen límite propio
+        self.capacidad_por_zona = capacidad_por_zona or {}
+        self.periodo_dias = max(1, int(periodo_dias))
+        self.layout = obtener_layout(layout)
+        # Los SKU sin faltantes reciben un conteo de mantenimiento (como en `generar_plan`)
+        self.incluir_mantenimiento = incluir_mantenimiento
+
+    def programar(self, plan, hoy=None, detalle_agenda=True):
+        """Asigna fechas al plan (lista priorizada de `generar_plan`) y retorna plan, agenda y estadísticas.
+
+        detalle_agenda: incluir en cada día la lista ordenada de conteos [fila, col, sku].
+        """
+        hoy = hoy or date.today()
+        dias = self.periodo_dias
+        n = len(plan)
+        almacenes = self.layout.almacenes
+
+        columnas = []
+        for p in plan:
+            try:
+                columnas.append(int(p.get('col')) if p.get('col') is not None else None)
+            except (TypeError, ValueError):
+                columnas.append(None)
+        zonas = self.layout.zone_indexes_for_columns(columnas)
+        # Posición de cada ubicación en el orden (columna, fila): ordenar un día es ordenar enteros
+        rango = [0] * n
+        for posicion, i in enumerate(sorted(range(n), key=lambda i: (
+                columnas[i] if columnas[i] is not None else -1,
+                plan[i].get('fila') if isinstance(plan[i].get('fila'), int) else 0))):
+            rango[i] = posicion
+
+        restantes = [int(p.get('faltantes') or 0) or (1 if self.incluir_mantenimiento else 0) for p in plan]
+        intervalos = [max(1, math.floor(dias / k)) if k else 0 for k in restantes]
+        total = sum(restantes)
+        capacidad = self.capacidad_diaria or max(1, math.ceil(total / dias))
+        capacidad_zona = {-1: math.inf}
+        for z, almacen in enumerate(almacenes):
+            limite = self.capacidad_por_zona.get(almacen.get('nombre'))
+            capacidad_zona[z] = int(limite) if limite is not None else math.inf
+
+        # Día 0: todo se libera; el plan ya viene ordenado, así que cada lista es un montículo válido
+        colas = {}
+        for i in range(n):
+            if restantes[i]:
+                colas.setdefault(zonas[i], []).append(i)
+        liberados = [[] for _ in range(dias)]
+        dias_asignados = [[] for _ in range(n)]
+        sin_programar = 0
+        agenda = []
+        pico = 0
+
+        for d in range(dias):
+            for i in liberados[d]:
+                heapq.heappush(colas.setdefault(zonas[i], []), i)
+            liberados[d] = None
+
+            cupo = capacidad
+            cupo_zona = dict(capacidad_zona)
+            cabezas = [(cola[0], z) for z, cola in colas.items() if cola and cupo_zona[z] > 0]
+            heapq.heapify(cabezas)
+            del_dia = []
+            while cabezas and cupo > 0:
+                _, z = heapq.heappop(cabezas)
+                cola = colas[z]
+                i = heapq.heappop(cola)
+                del_dia.append(i)
+                cupo -= 1
+                cupo_zona[z] -= 1
+                if cola and cupo_zona[z] > 0:
+                    heapq.heappush(cabezas, (cola[0], z))
+                dias_asignados[i].append(d)
+                restantes[i] -= 1
+                if restantes[i]:
+                    siguiente = d + intervalos[i]
+                    if siguiente < dias:
+                        liberados[siguiente].append(i)
+                    else:
+                        sin_programar += restantes[i]
+
+            if del_dia:
+                pico = max(pico, len(del_dia))
+                agenda.append(self._dia(hoy + timedelta(days=d), del_dia, plan, columnas, zonas, rango, detalle_agenda))
+
+        # Lo que quedó en cola al terminar el periodo
+        for cola in colas.values():
+            sin_programar += sum(restantes[i] for i in cola)
+
+        fechas_iso = {}
+        nuevo_plan = []
+        for p, asignados in zip(plan, dias_asignados):
+            fechas = []
+            for d in asignados:
+                iso = fechas_iso.get(d)
+                if iso is None:
+                    iso = fechas_iso[d] = (hoy + timedelta(days=d)).isoformat()
+                fechas.append(iso)
+            nuevo_plan.append(dict(p, fechas_planificadas=fechas))
+
+        programados = total - sin_programar
+        return {
+            'plan': nuevo_plan,
+            'agenda': agenda,
+            'estadisticas': {
+                'total_conteos': total,
+                'programados': programados,
+                'sin_programar': sin_programar,
+                'capacidad_diaria': capacidad,
+                'pico_diario': pico,
+                'pico_diario_sin_nivelar': self._pico_original(plan),
+                'promedio_diario': round(programados / dias, 2),
+                'dias_con_conteos': len(agenda),
+            }
+        }
+
+    def _dia(self, fecha, indices, plan, columnas, zonas, rango, detalle):
+        """Resumen de un día; los conteos se ordenan por columna y en serpentina dentro de cada una."""
+        almacenes = self.layout.almacenes
+        por_zona = {}
+        for z, cantidad in Counter(zonas[i] for i in indices).items():
+            por_zona[almacenes[z].get('nombre') if z >= 0 else 'sin_zona'] = cantidad
+        dia = {'fecha': fecha.isoformat(), 'total': len(indices), 'por_zona': por_zona}
+        if detalle:
+            items, grupo, col_actual, subir = [], [], object(), False
+            for i in sorted(indices, key=rango.__getitem__):
+                if columnas[i] != col_actual:
+                    if subir:
+                        grupo.reverse()
+                    items.extend(grupo)
+                    grupo, col_actual, subir = [], columnas[i], bool(grupo) and not subir
+                grupo.append(i)
+            if subir:
+                grupo.reverse()
+            items.extend(grupo)
+            dia['items'] = [[plan[i].get('fila'), plan[i].get('col'), plan[i].get('sku')] for i in items]
+        return dia
+
+    @staticmethod
+    def _pico_original(plan):
+        """Máximo de conteos en un mismo día con las fechas a intervalos fijos del plan original."""
+        por_fecha = {}
+        for p in plan:
+            for fecha in p.get('fechas_planificadas') or ():
+                por_fecha[fecha] = por_fecha.get(fecha, 0) + 1
+        return max(por_fecha.values()) if por_fecha else 0
+
+
+class RecorridosConteo:
+    """Rutas diarias de conteo: ubicaciones de cada fecha del plan recorridas con `RobotAlmacen`."""
+
+    def __init__(self, costos=None, estrategia=None, layout=None, inicio=None):
+        self.layout = obtener_layout(layout)
+        self.costos = costos or {}
+        self.estrategia = estrategia
+        self.inicio = inicio
+
+    def calcular(self, plan, incluir_ruta=False):
+        """Ruta y costo de cada fecha del plan (con 'fechas_planificadas') y totales del calendario.
+
+        Varias referencias en la misma celda se cuentan en una sola parada. Las ubicaciones
+        fuera de la cuadrícula no se enrutan y se informan en `conteos_sin_ubicacion`.
+        """
+        por_fecha = {}
+        sin_ubicacion = 0
+        for p in plan:
+            fila, col = p.get('fila'), p.get('col')
+            valida = isinstance(fila, int) and isinstance(col, int) and self.layout.contiene(fila, col)
+            for fecha in p.get('fechas_planificadas') or ():
+                if valida:
+                    por_fecha.setdefault(fecha, []).append((fila, col, p.get('sku')))
+                else:
+                    sin_ubicacion += 1
+
+        dias = []
+        for fecha in sorted(por_fecha):
+            dias.append(self._recorrido(fecha, por_fecha[fecha], incluir_ruta))
+
+        costo_total = sum(d['costo'] for d in dias)
+        conteos = sum(d['conteos'] for d in dias)
+        mayor = max(dias, key=lambda d: d['costo']) if dias else None
+        return {
+            'dias': dias,
+            'estadisticas': {
+                'dias': len(dias),
+                'conteos': conteos,
+                'conteos_sin_ubicacion': sin_ubicacion,
+                'costo_total': round(costo_total, 2),
+                'costo_promedio_dia': round(costo_total / len(dias), 2) if dias else 0,
+                'costo_max_dia': mayor['costo'] if mayor else 0,
+                'fecha_costo_max': mayor['fecha'] if mayor else None,
+                'costo_por_conteo': round(costo_total / conteos, 4) if conteos else 0,
+            }
+        }
+
+    def _recorrido(self, fecha, items, incluir_ruta):
+        celdas = sorted({(fila, col) for fila, col, _ in items})
+        escenario = GestorEntrada.validar_escenario({
+            'paquetes': celdas,
+            'costos': self.costos,
+            'strategy': self.estrategia,
+            'layout': self.layout,
+            'inicio': self.inicio if self.inicio is not None else self.layout.inicio,
+        })
+        resultado = RobotAlmacen(**escenario).ejecutar_recoleccion(detalle=False)
+
+        # Orden de visita: primera vez que la ruta pasa por cada celda
+        visita = {}
+        for k, posicion in enumerate(resultado['ruta']):
+            visita.setdefault(tuple(posicion), k)
+        items = sorted(items, key=lambda item: visita.get((item[0], item[1]), len(visita)))
+        dia = {
+            'fecha': fecha,
+            'conteos': len(items),
+            'paradas': len(celdas),
+            'costo': resultado['total_cost'],
+            'pasos': resultado['pasos_totales'],
+            'orden_columnas': list(dict.fromkeys(col for _, col, _ in items)),
+            'items': [list(item) for item in items],
+        }
+        if incluir_ruta:
+            dia['ruta'] = resultado['ruta']
+        return dia
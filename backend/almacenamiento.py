@@ -0,0 +1,308 @@
+"""
+Módulo almacenamiento: persistencia local en SQLite de corridas y conteos.
+
+Cada corrida (simulación, consolidación, plan de conteo...) se guarda con su tipo,
+la clave canónica de su entrada (hash del escenario normalizado), la fecha y la
+entrada/salida en JSON. Así la API puede devolver un resultado anterior por id, y
+una consulta repetida se resuelve con una búsqueda indexada en lugar de recalcular.
+
+La tabla `conteos` registra los conteos cíclicos realizados por SKU y fecha; su
+historial alimenta `ConteoCiclico.generar_plan`.
+
+La base usa WAL (lectores concurrentes con un escritor) y una conexión por hilo; las
+inserciones masivas van en una sola transacción con `executemany`. La persistencia es
+opcional: solo se activa si la variable de entorno SIMULADOR_DB indica la ruta de la
+base (p. ej. `simulaciones.db`).
+
+Cada corrida guarda la versión del código que la calculó (hash de los fuentes de
+`backend`) y solo se reutilizan las de la versión actual, de modo que un cambio de
+algoritmo no sirve resultados viejos. Las corridas con más de SIMULADOR_DB_RETENCION_DIAS
+días (30 por defecto) o que exceden las SIMULADOR_DB_MAX_CORRIDAS más recientes (10000)
+se purgan al abrir la base y cada `PURGA_CADA` corridas guardadas.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+RUTA_POR_DEFECTO = 'simulaciones.db'
+RETENCION_DIAS = 30
+MAX_CORRIDAS = 10000
+# Corridas guardadas entre dos purgas de retención
+PURGA_CADA = 100
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    creado TEXT NOT NULL,
+    entrada TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_corridas_creado ON corridas (creado);
+
+CREATE TABLE IF NOT EXISTS conteos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    fila INTEGER,
+    col INTEGER,
+    cantidad REAL,
+    id_corrida INTEGER REFERENCES corridas (id)
+);
+CREATE INDEX IF NOT EXISTS idx_conteos_sku_fecha ON conteos (sku, fecha);
+CREATE INDEX IF NOT EXISTS idx_conteos_fecha ON conteos (fecha);
+"""
+
+
+def hash_canonico(datos):
+    """SHA-256 de un objeto JSON con claves ordenadas (clave canónica de una entrada)."""
+    texto = json.dumps(datos, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(',', ':'))
+
+
+_version_codigo = None
+
+
+def version_codigo():
+    """Hash corto de los fuentes de `backend`: identifica la versión de los algoritmos."""
+    global _version_codigo
+    if _version_codigo is None:
+        h = hashlib.sha256()
+        for ruta in sorted(Path(__file__).parent.glob('*.py')):
+            h.update(ruta.name.encode('utf-8'))
+            h.update(ruta.read_bytes())
+        _version_codigo = h.hexdigest()[:16]
+    return _version_codigo
+
+
+class AlmacenResultados:
+    """Repositorio SQLite de corridas y conteos (una conexión por hilo).
+
+    Las corridas se buscan por (tipo, clave, versión); `retencion_dias` y `max_corridas`
+    acotan la tabla (None: sin límite).
+    """
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO, version=None, retencion_dias=RETENCION_DIAS,
+                 max_corridas=MAX_CORRIDAS):
+        self.ruta = str(ruta)
+        self.version = version_codigo() if version is None else str(version)
+        self.retencion_dias = retencion_dias
+        self.max_corridas = max_corridas
+        self._local = threading.local()
+        self._guardadas = 0
+        # Los endpoints síncronos corren en un pool de hilos: el contador se actualiza con lock
+        self._guardadas_lock = threading.Lock()
+        conexion = self._conexion()
+        columnas = {fila['name'] for fila in conexion.execute('PRAGMA table_info(corridas)')}
+        if columnas and 'version' not in columnas:
+            # Bases anteriores al versionado: sus corridas no coinciden con ninguna versión
+            with conexion:
+                conexion.execute("ALTER TABLE corridas ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+        conexion.executescript(ESQUEMA)
+        with conexion:
+            conexion.execute('DROP INDEX IF EXISTS idx_corridas_tipo_clave')
+            conexion.execute('CREATE INDEX IF NOT EXISTS idx_corridas_tipo_clave_version '
+                             'ON corridas (tipo, clave, version)')
+        self.purgar()
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            conexion.row_factory = sqlite3.Row
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexion = conexion
+        return conexion
+
+    # ------------------------------------------------------------------
+    # Corridas
+    # ------------------------------------------------------------------
+    def guardar_corrida(self, tipo, clave, entrada, resultado):
+        """Guarda una corrida y retorna su id."""
+        conexion = self._conexion()
+        with conexion:
+            cursor = conexion.execute(
+                'INSERT INTO corridas (tipo, clave, creado, entrada, resultado, version) VALUES (?, ?, ?, ?, ?, ?)',
+                (tipo, clave, datetime.now().isoformat(timespec='seconds'), _json(entrada), _json(resultado),
+                 self.version),
+            )
+        self._contar_guardadas(1)
+        return cursor.lastrowid
+
+    def guardar_corridas(self, corridas):
+        """Guarda muchas corridas [(tipo, clave, entrada, resultado), ...] en una sola transacción."""
+        creado = datetime.now().isoformat(timespec='seconds')
+        filas = [(tipo, clave, creado, _json(entrada), _json(resultado), self.version)
+                 for tipo, clave, entrada, resultado in corridas]
+        conexion = self._conexion()
+        with conexion:
+            conexion.executemany(
+                'INSERT INTO corridas (tipo, clave, creado, entrada, resultado, version) VALUES (?, ?, ?, ?, ?, ?)',
+                filas)
+        self._contar_guardadas(len(filas))
+        return len(filas)
+
+    def _contar_guardadas(self, cantidad):
+        with self._guardadas_lock:
+            self._guardadas += cantidad
+            purgar = self._guardadas >= PURGA_CADA
+            if purgar:
+                self._guardadas = 0
+        # La purga corre fuera del lock (solo la dispara el hilo que cruzó el umbral)
+        if purgar:
+            self.purgar()
+
+    def purgar(self):
+        """Borra las corridas fuera de la retención (antigüedad y cantidad); retorna cuántas."""
+        conexion = self._conexion()
+        borradas = 0
+        with conexion:
+            if self.retencion_dias is not None:
+                limite = (datetime.now() - timedelta(days=float(self.retencion_dias))).isoformat(timespec='seconds')
+                borradas += conexion.execute('DELETE FROM corridas WHERE creado < ?', (limite,)).rowcount
+            if self.max_corridas is not None:
+                borradas += conexion.execute(
+                    'DELETE FROM corridas WHERE id <= (SELECT id FROM corridas ORDER BY id DESC LIMIT 1 OFFSET ?)',
+                    (int(self.max_corridas),)).rowcount
+        return borradas
+
+    @staticmethod
+    def _corrida(fila):
+        if fila is None:
+            return None
+        return {
+            'id': fila['id'],
+            'tipo': fila['tipo'],
+            'clave': fila['clave'],
+            'creado': fila['creado'],
+            'version': fila['version'],
+            'entrada': json.loads(fila['entrada']),
+            'resultado': json.loads(fila['resultado']),
+        }
+
+    def obtener_corrida(self, id_corrida):
+        fila = self._conexion().execute('SELECT * FROM corridas WHERE id = ?', (int(id_corrida),)).fetchone()
+        return self._corrida(fila)
+
+    def buscar_por_clave(self, tipo, clave):
+        """Corrida más reciente de `tipo` con la misma clave de entrada y la versión actual, o None."""
+        fila = self._conexion().execute(
+            'SELECT * FROM corridas WHERE tipo = ? AND clave = ? AND version = ? ORDER BY id DESC LIMIT 1',
+            (tipo, clave, self.version)
+        ).fetchone()
+        return self._corrida(fila)
+
+    def listar_corridas(self, tipo=None, desde=None, hasta=None, limite=100):
+        """Resumen (sin entrada/salida) de las corridas más recientes, con filtros opcionales."""
+        condiciones, params = [], []
+        if tipo:
+            condiciones.append('tipo = ?')
+            params.append(tipo)
+        if desde:
+            condiciones.append('creado >= ?')
+            params.append(str(desde))
+        if hasta:
+            condiciones.append('creado <= ?')
+            params.append(str(hasta))
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        filas = self._conexion().execute(
+            f'SELECT id, tipo, clave, creado, version FROM corridas {where} ORDER BY id DESC LIMIT ?',
+            params + [int(limite)],
+        ).fetchall()
+        return [dict(fila) for fila in filas]
+
+    # ------------------------------------------------------------------
+    # Conteos cíclicos
+    # ------------------------------------------------------------------
+    def registrar_conteos(self, conteos, id_corrida=None):
+        """Registra conteos realizados [{'sku', 'fecha', 'fila', 'col', 'cantidad'}, ...] en lote."""
+        hoy = date.today().isoformat()
+        filas = [(str(c['sku']), str(c.get('fecha') or hoy), c.get('fila'), c.get('col'), c.get('cantidad'), id_corrida)
+                 for c in conteos if c.get('sku')]
+        conexion = self._conexion()
+        with conexion:
+            conexion.executemany(
+                'INSERT INTO conteos (sku, fecha, fila, col, cantidad, id_corrida) VALUES (?, ?, ?, ?, ?, ?)', filas)
+        return len(filas)
+
+    def historial_conteos(self, skus=None, dias=365, hasta=None):
+        """Fechas de conteo por SKU en los últimos `dias`: {sku: [fecha ISO, ...]}."""
+        hasta = hasta or date.today()
+        desde = (hasta - timedelta(days=int(dias))).isoformat()
+        consulta = 'SELECT sku, fecha FROM conteos WHERE fecha > ? AND fecha <= ?'
+        params = [desde, hasta.isoformat()]
+        if skus is not None:
+            skus = [str(s) for s in skus]
+            if not skus:
+                return {}
+            # Se filtra por SKU en SQL solo con listas pequeñas (límite de parámetros de SQLite)
+            if len(skus) <= 500:
+                consulta += f" AND sku IN ({','.join('?' * len(skus))})"
+                params += skus
+        historial = {}
+        filtro = set(skus) if skus is not None else None
+        for sku, fecha in self._conexion().execute(consulta + ' ORDER BY sku, fecha', params):
+            if filtro is None or sku in filtro:
+                historial.setdefault(sku, []).append(fecha)
+        return historial
+
+
+_almacen = None
+_almacen_lock = threading.Lock()
+
+
+def obtener_almacen():
+    """Almacén compartido del proceso según SIMULADOR_DB, o None si la persistencia está desactivada."""
+    global _almacen
+    if _almacen is None:
+        ruta = os.environ.get('SIMULADOR_DB', '')
+        if not ruta:
+            return None
+        with _almacen_lock:
+            if _almacen is None:
+                _almacen = AlmacenResultados(
+                    ruta,
+                    retencion_dias=_limite_entorno('SIMULADOR_DB_RETENCION_DIAS', RETENCION_DIAS),
+                    max_corridas=_limite_entorno('SIMULADOR_DB_MAX_CORRIDAS', MAX_CORRIDAS),
+                )
+    return _almacen
+
+
+def _limite_entorno(nombre, defecto):
+    """Límite numérico de una variable de entorno; 0 o negativo significa sin límite."""
+    valor = os.environ.get(nombre)
+    if not valor:
+        return defecto
+    valor = float(valor)
+    return valor if valor > 0 else None
+
+
+def calcular_o_recuperar(tipo, entrada, calcular):
+    """Resultado guardado para la misma `entrada` (por su hash) o, si no existe, `calcular()`.
+
+    El resultado nuevo se guarda (salvo que traiga 'error') y se retorna con 'id_corrida'.
+    Sin almacén activo simplemente calcula.
+    """
+    almacen = obtener_almacen()
+    if almacen is None:
+        return calcular()
+    clave = hash_canonico(entrada)
+    corrida = almacen.buscar_por_clave(tipo, clave)
+    if corrida is not None:
+        return dict(corrida['resultado'], id_corrida=corrida['id'])
+    resultado = calcular()
+    if isinstance(resultado, dict) and 'error' not in resultado:
+        resultado = dict(resultado, id_corrida=almacen.guardar_corrida(tipo, clave, entrada, resultado))
+    return resultado
@@ -1,14 +1,38 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .robot import RobotAlmacen
-from .config import PAQUETES, INICIO, COSTO_CELDA, COSTO_PASILLO, PASILLOS, FILAS, COLUMNAS, ALMACENES
+from fastapi.routing import APIRoute
+from .config import PAQUETES
+from .layout import obtener_layout, registrar_layout, listar_layouts, LayoutInvalido
 from .entrada import GestorEntrada
-from .consolidador import ConsolidadorPicking
+from .conteo_ciclico import ConteoCiclico
+from .agenda_conteos import ProgramadorConteos, RecorridosConteo
+from .consolidador import ConsolidadorPicking, ConsolidadorIncremental
 from .exportador import Exportador
+from .exportacion import exportaciones, FORMATOS, UMBRAL_PASOS_ASINCRONO
+from .lote import simular_lote
+from .cache import cache_rutas, simular_con_cache
+from .almacenamiento import obtener_almacen, calcular_o_recuperar
+from .olas import PlanificadorOlas
+from .flota import SimuladorFlota
+from .slotting import OptimizadorSlotting
+from .turno import SimuladorTurno, generar_llegadas, validar_llegadas
+from .metricas import metricas, perfilable, MiddlewareInstrumentacion
 import io
-from fastapi.responses import StreamingResponse
+import json
+from datetime import date
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+
+class RutaInstrumentada(APIRoute):
+    """Ruta cuyo endpoint puede perfilarse con ?profile=1 (ver `metricas.perfilable`)."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, perfilable(endpoint), **kwargs)
+
 
 app = FastAPI()
+app.router.route_class = RutaInstrumentada
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,35 +41,118 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MiddlewareInstrumentacion)
+
+
+@app.exception_handler(LayoutInvalido)
+def layout_invalido(request: Request, e: LayoutInvalido):
+    """Un `layout` desconocido o mal definido en cualquier endpoint se informa como los demás errores de entrada."""
+    return JSONResponse(content={'error': 'Layout inválido', 'detail': str(e)})
 
 
 @app.get('/defaults')
-def get_defaults():
+def get_defaults(layout: str = None):
+    layout = obtener_layout(layout)
     return {
         'paquetes': PAQUETES,
-        'inicio': INICIO,
-        'costo_celda': COSTO_CELDA,
-        'costo_pasillo': COSTO_PASILLO
+        'inicio': layout.inicio,
+        'costo_celda': layout.costo_celda,
+        'costo_pasillo': layout.costo_pasillo
     }
 
 
 @app.post('/simulate')
 def simulate(payload: dict):
-    data = payload or {}
-    paquetes = data.get('paquetes', PAQUETES)
-    inicio = GestorEntrada.validar_inicio(data.get('inicio', INICIO))
-    costos = data.get('costos', {})
-    costos_validos = GestorEntrada.validar_costos(costos) if costos else {'celda': data.get('costo_celda', COSTO_CELDA), 'pasillo': data.get('costo_pasillo', COSTO_PASILLO)}
-
-    paquetes_validos = GestorEntrada.validar_paquetes(paquetes)
+    escenario, validacion = GestorEntrada.depurar_escenario(payload)
 
-    robot = RobotAlmacen(paquetes=paquetes_validos, inicio=inicio, costo_celda=costos_validos['celda'], costo_pasillo=costos_validos['pasillo'])
-    resultado = robot.ejecutar_recoleccion()
+    detalle = bool(payload.get('detalle', True))
 
-    # devolver resultado
+    # Payloads equivalentes (mismo escenario normalizado) se sirven desde la caché
+    resultado = simular_con_cache(escenario, detalle=detalle)
+    resultado['validacion'] = validacion
     return resultado
 
 
+@app.post('/simulate/batch')
+def simulate_batch(payload: dict):
+    """Evalúa muchos escenarios en paralelo y devuelve los resultados como NDJSON.
+
+    payload: {
+        'escenarios': [{paquetes, inicio, costos, strategy}, ...],
+        'resumen': bool  # True: solo total_cost y conteo de pasos por escenario
+    }
+    Cada línea es un JSON con 'indice' (posición del escenario) y se emite en cuanto
+    termina su bloque, por lo que el orden de llegada no es el de entrada.
+    """
+    escenarios = payload.get('escenarios', [])
+    resumen = bool(payload.get('resumen', False))
+
+    def generar():
+        for resultado in simular_lote(escenarios, resumen=resumen):
+            yield json.dumps(resultado, ensure_ascii=False) + '\n'
+
+    return StreamingResponse(generar(), media_type='application/x-ndjson')
+
+
+@app.post('/simulate/fleet')
+def simulate_fleet(payload: dict):
+    """Simula varios robots sobre la misma cuadrícula con reservas para evitar colisiones.
+
+    payload: mismos campos que /simulate más 'num_robots' (por defecto 2).
+    Devuelve makespan, costo y espera por robot y mapas de congestión/ocupación por celda.
+    """
+    escenario = GestorEntrada.validar_escenario(payload)
+    simulador = SimuladorFlota(
+        num_robots=payload.get('num_robots', 2),
+        layout=escenario['layout'],
+        costo_celda=escenario['costo_celda'],
+        costo_pasillo=escenario['costo_pasillo'],
+        estrategia=escenario['estrategia'],
+    )
+    return simulador.simular(escenario['paquetes'])
+
+
+@app.post('/simulate/shift')
+def simulate_shift(payload: dict):
+    """Simula un turno completo con eventos discretos y devuelve throughput y latencias.
+
+    payload: {
+        'num_robots': int, 'duracion_h': float (8 por defecto),
+        'tasa_ordenes_h': float, 'items_por_orden': [min, max], 'semilla': int,
+        'llegadas': [{'tiempo', 'id_orden', 'items'}, ...],  # opcional: reemplaza la generación
+        'ordenes_por_tour': int, 'velocidad': celdas/s, 'tiempo_pick': s por unidad,
+        'strategy': str, 'costos': {...}, 'layout': ...
+    }
+    """
+    layout = obtener_layout(payload.get('layout'))
+    estrategia = payload.get('strategy')
+    try:
+        costos = GestorEntrada.validar_costos(payload.get('costos', {}), layout)
+        duracion_s = float(payload.get('duracion_h', 8)) * 3600
+        llegadas = payload.get('llegadas')
+        if llegadas is None:
+            llegadas = generar_llegadas(
+                payload.get('tasa_ordenes_h', 60), duracion_s, layout=layout,
+                items_por_orden=tuple(payload.get('items_por_orden', (1, 5))),
+                semilla=payload.get('semilla'),
+            )
+        else:
+            llegadas = validar_llegadas(llegadas, layout)
+        simulador = SimuladorTurno(
+            num_robots=payload.get('num_robots', 1),
+            layout=layout,
+            costo_celda=costos['celda'],
+            costo_pasillo=costos['pasillo'],
+            estrategia=GestorEntrada.validar_estrategia(estrategia) if estrategia else 'secuencial_dp',
+            ordenes_por_tour=payload.get('ordenes_por_tour', 1),
+            velocidad=payload.get('velocidad', 1.0),
+            tiempo_pick=payload.get('tiempo_pick', 5.0),
+        )
+    except (TypeError, ValueError) as e:
+        return JSONResponse(status_code=400, content={'error': 'Parámetros de turno inválidos', 'detail': str(e)})
+    return simulador.simular(llegadas, duracion_s)
+
+
 @app.post('/consolidate')
 def consolidate_orders(payload: dict):
     """Consolida múltiples órdenes en una lista de picking optimizada.
@@ -55,7 +162,8 @@ def consolidate_orders(payload: dict):
             {'id_orden': 'ORD001', 'items': [[fila, col, cantidad, sku], ...]},
             {'id_orden': 'ORD002', 'items': [[fila, col, cantidad, sku], ...]},
             ...
-        ]
+        ],
+        'strategy': str  # estrategia de RobotAlmacen con la que se mide costo_ruta (como /simulate)
     }
     """
     ordenes = payload.get('ordenes', [])
@@ -63,54 +171,416 @@ def consolidate_orders(payload: dict):
     if not ordenes:
         return {'error': 'No hay órdenes para consolidar'}
     
+    layout = obtener_layout(payload.get('layout'))
+    costos = GestorEntrada.validar_costos(payload.get('costos', {}), layout)
+    estrategia = GestorEntrada.validar_estrategia(payload.get('strategy'))
     consolidador = ConsolidadorPicking()
-    resultado = consolidador.consolidar_ordenes(ordenes)
+    entrada = {'ordenes': ordenes, 'layout': layout.to_dict(), 'costos': costos, 'estrategia': estrategia}
+    resultado = calcular_o_recuperar('consolidacion', entrada, lambda: consolidador.consolidar_ordenes(
+        ordenes, layout=layout, costo_celda=costos['celda'], costo_pasillo=costos['pasillo'], estrategia=estrategia))
     
     return resultado
 
 
+@app.post('/consolidate/waves')
+def consolidate_waves(payload: dict):
+    """Divide las órdenes en olas limitadas por capacidad y costo, y recorre cada una.
+
+    payload: {
+        'ordenes': [...],               # mismo formato que /consolidate
+        'capacidad_unidades': int,      # opcional
+        'costo_maximo': float,          # opcional, costo máximo por tour
+        'strategy': str,                # estrategia de ruteo de cada ola
+        'costos': {...}, 'layout': ..., 'detalle': bool
+    }
+    """
+    ordenes = payload.get('ordenes', [])
+    if not ordenes:
+        return {'error': 'No hay órdenes para consolidar'}
+
+    layout = obtener_layout(payload.get('layout'))
+    costos = GestorEntrada.validar_costos(payload.get('costos', {}), layout)
+    estrategia = payload.get('strategy')
+    try:
+        planificador = PlanificadorOlas(
+            capacidad_unidades=payload.get('capacidad_unidades'),
+            costo_maximo=payload.get('costo_maximo'),
+            layout=layout,
+            costo_celda=costos['celda'],
+            costo_pasillo=costos['pasillo'],
+            estrategia=GestorEntrada.validar_estrategia(estrategia) if estrategia else 'secuencial_dp',
+        )
+    except ValueError as e:
+        return {'error': 'Parámetros de olas inválidos', 'detail': str(e)}
+    detalle = bool(payload.get('detalle', False))
+    entrada = {
+        'ordenes': ordenes, 'layout': layout.to_dict(), 'costos': costos,
+        'capacidad_unidades': planificador.capacidad_unidades, 'costo_maximo': planificador.costo_maximo,
+        'estrategia': planificador.estrategia, 'detalle': detalle,
+    }
+    return calcular_o_recuperar('olas', entrada, lambda: planificador.planificar(ordenes, detalle=detalle))
+
+
+@app.post('/consolidate/stream')
+async def consolidate_stream(request: Request, formato: str = 'ndjson', incluir_ordenes: bool = False, layout: str = None,
+                             strategy: str = None):
+    """Consolida líneas de pedido enviadas como cuerpo NDJSON o CSV, leídas por bloques.
+
+    Devuelve NDJSON: un item de picking por línea (en orden de columna) y una última
+    línea {"estadisticas": {...}, "validacion": {...}} con las líneas rechazadas (mismas
+    reglas que /consolidate). Las órdenes por ubicación solo se incluyen con
+    `incluir_ordenes=true`.
+    """
+    consolidador = ConsolidadorIncremental(layout=obtener_layout(layout), incluir_ordenes=incluir_ordenes,
+                                           estrategia=GestorEntrada.validar_estrategia(strategy))
+    agregar = consolidador.agregar_csv if formato == 'csv' else consolidador.agregar_ndjson
+
+    resto = b''
+    async for bloque in request.stream():
+        resto += bloque
+        *lineas, resto = resto.split(b'\n')
+        # Validar y agregar es CPU: se hace fuera del event loop
+        await run_in_threadpool(agregar, lineas)
+    if resto.strip():
+        await run_in_threadpool(agregar, [resto])
+
+    def generar():
+        for item in consolidador.iterar_picking():
+            yield json.dumps(item, ensure_ascii=False) + '\n'
+        yield json.dumps({'estadisticas': consolidador.estadisticas(), 'validacion': consolidador.validacion},
+                         ensure_ascii=False) + '\n'
+
+    return StreamingResponse(generar(), media_type='application/x-ndjson')
+
+
+@app.get('/metrics')
+def get_metrics():
+    """Latencias por endpoint, spans internos y caché de rutas en formato de texto de Prometheus."""
+    cache = cache_rutas.metricas()
+    extras = {
+        'simulador_cache_aciertos_total': ('counter', 'Aciertos de la caché de rutas', cache['aciertos']),
+        'simulador_cache_fallos_total': ('counter', 'Fallos de la caché de rutas', cache['fallos']),
+        'simulador_cache_entradas': ('gauge', 'Entradas en la caché de rutas', cache['entradas']),
+        'simulador_cache_bytes': ('gauge', 'Bytes ocupados por la caché de rutas', cache['bytes']),
+    }
+    return PlainTextResponse(metricas.texto_prometheus(extras), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.get('/metrics/cache')
+def get_cache_metrics():
+    """Aciertos, fallos, entradas y bytes de la caché de rutas compartida."""
+    return cache_rutas.metricas()
+
+
+@app.get('/runs')
+def list_runs(tipo: str = None, desde: str = None, hasta: str = None, limite: int = 100):
+    """Corridas guardadas más recientes (id, tipo, clave y fecha), con filtros opcionales."""
+    almacen = obtener_almacen()
+    if almacen is None:
+        return {'error': 'Persistencia desactivada (defina SIMULADOR_DB)'}
+    return {'corridas': almacen.listar_corridas(tipo=tipo, desde=desde, hasta=hasta, limite=limite)}
+
+
+@app.get('/runs/{id_corrida}')
+def get_run(id_corrida: int):
+    """Entrada y resultado de una corrida guardada."""
+    almacen = obtener_almacen()
+    corrida = almacen.obtener_corrida(id_corrida) if almacen else None
+    if corrida is None:
+        return JSONResponse(status_code=404, content={'error': 'Corrida no encontrada'})
+    return corrida
+
+
+def _plan_conteo(payload):
+    """Plan de conteo cíclico del payload; usa el historial de conteos guardado si existe."""
+    ubicaciones = payload.get('ubicaciones', [])
+    conteo = ConteoCiclico(
+        frecuencia_minima=payload.get('frecuencia_minima', 5),
+        periodo_dias=payload.get('periodo_dias', 365),
+        weights=payload.get('weights'),
+        zone_weights=payload.get('zone_weights'),
+        layout=payload.get('layout'),
+    )
+    almacen = obtener_almacen()
+    historial = None
+    if almacen is not None and payload.get('usar_historial', True):
+        skus = [u.get('sku') or u.get('ref') or f"{u.get('fila')}-{u.get('col')}" for u in ubicaciones]
+        historial = almacen.historial_conteos(skus, dias=conteo.periodo_dias)
+    entrada = {
+        'ubicaciones': ubicaciones, 'frecuencia_minima': conteo.frecuencia_minima,
+        'periodo_dias': conteo.periodo_dias, 'weights': conteo.weights, 'zone_weights': conteo.zone_weights,
+        'layout': conteo.layout.to_dict(), 'historial': historial,
+        # Las fechas del plan parten de hoy
+        'fecha': date.today().isoformat(),
+    }
+    nivelar = bool(payload.get('capacidad_diaria') or payload.get('capacidad_por_zona'))
+    if nivelar:
+        entrada.update(capacidad_diaria=payload.get('capacidad_diaria'),
+                       capacidad_por_zona=payload.get('capacidad_por_zona'))
+
+    def calcular():
+        resultado = conteo.generar_plan(ubicaciones, historial=historial)
+        if not nivelar:
+            return resultado
+        programador = ProgramadorConteos(
+            capacidad_diaria=payload.get('capacidad_diaria'),
+            capacidad_por_zona=payload.get('capacidad_por_zona'),
+            periodo_dias=conteo.periodo_dias,
+            layout=conteo.layout,
+        )
+        agenda = programador.programar(resultado['plan'])
+        return {
+            'plan': agenda['plan'],
+            'estadisticas': resultado['estadisticas'],
+            'agenda': agenda['agenda'],
+            'nivelacion': agenda['estadisticas'],
+        }
+
+    return calcular_o_recuperar('conteo_ciclico', entrada, calcular)
+
+
+@app.post('/slotting')
+def slotting(payload: dict):
+    """Propone reubicaciones de SKUs que reducen el costo esperado de picking.
+
+    payload: {
+        'ubicaciones': [{'sku', 'fila', 'col', 'movimientos'}, ...],
+        'ordenes': [...],               # opcional, historial con el formato de /consolidate
+        'celdas': [[fila, col], ...],   # opcional, celdas de almacenamiento
+        'capacidad_celda': int, 'peso_afinidad': float, 'presupuesto_s': float,
+        'max_ordenes_replay': int, 'costos': {...}, 'layout': ...
+    }
+    """
+    ubicaciones = payload.get('ubicaciones', [])
+    ordenes = payload.get('ordenes') or []
+    if not ubicaciones and not ordenes:
+        return {'error': 'No hay ubicaciones ni órdenes para reubicar'}
+
+    try:
+        layout = obtener_layout(payload.get('layout'))
+        costos = GestorEntrada.validar_costos(payload.get('costos', {}), layout)
+        parametros = {
+            'celdas': payload.get('celdas'),
+            'capacidad_celda': payload.get('capacidad_celda'),
+            'peso_afinidad': payload.get('peso_afinidad', 1.0),
+            'presupuesto_s': min(float(payload.get('presupuesto_s', 5.0)), 60.0),
+        }
+        max_replay = int(payload.get('max_ordenes_replay', 2000))
+        optimizador = OptimizadorSlotting(layout=layout, costo_celda=costos['celda'],
+                                          costo_pasillo=costos['pasillo'], **parametros)
+    except (TypeError, ValueError) as e:
+        return JSONResponse(status_code=400, content={'error': 'Parámetros de slotting inválidos', 'detail': str(e)})
+
+    entrada = {'ubicaciones': ubicaciones, 'ordenes': ordenes, 'layout': layout.to_dict(), 'costos': costos,
+               'max_ordenes_replay': max_replay, **parametros}
+    try:
+        return calcular_o_recuperar('slotting', entrada,
+                                    lambda: optimizador.optimizar(ubicaciones, ordenes, max_ordenes_replay=max_replay))
+    except (TypeError, ValueError) as e:
+        # Fuera de `calcular_o_recuperar`: un error no se guarda como resultado
+        return JSONResponse(status_code=400, content={'error': 'Parámetros de slotting inválidos', 'detail': str(e)})
+
+
+@app.post('/cycle-count')
+def cycle_count(payload: dict):
+    """Genera un plan priorizado de conteo cíclico.
+
+    payload: {
+        'ubicaciones': [{'fila', 'col', 'sku', 'movimientos', 'conteos_ultimos_365dias', 'criticidad'}, ...],
+        'frecuencia_minima': int, 'periodo_dias': int, 'weights': {...}, 'zone_weights': {...},
+        'layout': ..., 'usar_historial': bool,  # sumar los conteos registrados en /cycle-count/counts
+        'capacidad_diaria': int, 'capacidad_por_zona': {nombre: int}  # nivelar fechas (ProgramadorConteos)
+    }
+    """
+    if not payload.get('ubicaciones'):
+        return {'error': 'No hay ubicaciones para planificar'}
+    return _plan_conteo(payload)
+
+
+@app.post('/cycle-count/export')
+@app.post('/export-cycle')
+def cycle_count_export(payload: dict):
+    """Descarga un plan de conteo como Excel (CSV si openpyxl no está disponible).
+
+    payload: {'plan': [...]} con un plan ya generado, o los mismos campos que /cycle-count.
+    """
+    plan = payload.get('plan')
+    if plan is None:
+        if not payload.get('ubicaciones'):
+            return {'error': 'No hay plan ni ubicaciones para exportar'}
+        plan = _plan_conteo(payload)['plan']
+    elif isinstance(plan, dict):
+        plan = plan.get('plan', [])
+    contenido = Exportador.export_cycle_plan_bytes(plan)
+    if contenido[:2] == b'PK':  # los .xlsx son archivos zip
+        media_type, nombre = FORMATOS['xlsx'][0], 'plan_conteo.xlsx'
+    else:
+        media_type, nombre = FORMATOS['csv'][0], 'plan_conteo.csv'
+    headers = {'Content-Disposition': f'attachment; filename="{nombre}"'}
+    return StreamingResponse(io.BytesIO(contenido), media_type=media_type, headers=headers)
+
+
+@app.post('/cycle-count/routes')
+def cycle_count_routes(payload: dict):
+    """Ruta de conteo y costo de desplazamiento de cada fecha de un plan.
+
+    payload: {'plan': [...]} con un plan ya generado (nivelado o no), o los mismos campos
+    que /cycle-count; además 'costos': {'celda', 'pasillo'}, 'strategy', 'inicio' e
+    'incluir_ruta' (bool, añade las celdas recorridas de cada día).
+    """
+    plan = payload.get('plan')
+    if plan is None:
+        if not payload.get('ubicaciones'):
+            return {'error': 'No hay plan ni ubicaciones para enrutar'}
+        plan = _plan_conteo(payload)['plan']
+    elif isinstance(plan, dict):
+        plan = plan.get('plan', [])
+    try:
+        recorridos = RecorridosConteo(
+            costos=payload.get('costos'),
+            estrategia=payload.get('strategy'),
+            layout=payload.get('layout'),
+            inicio=payload.get('inicio'),
+        )
+    except ValueError as e:
+        return {'error': 'Layout inválido', 'detail': str(e)}
+    return recorridos.calcular(plan, incluir_ruta=bool(payload.get('incluir_ruta')))
+
+
+@app.post('/cycle-count/counts')
+def register_counts(payload: dict):
+    """Registra conteos cíclicos realizados; alimentan el historial de los planes siguientes.
+
+    payload: {'conteos': [{'sku', 'fecha' (ISO, hoy por defecto), 'fila', 'col', 'cantidad'}, ...]}
+    """
+    almacen = obtener_almacen()
+    if almacen is None:
+        return {'error': 'Persistencia desactivada (defina SIMULADOR_DB)'}
+    return {'registrados': almacen.registrar_conteos(payload.get('conteos', []))}
+
+
 @app.get('/warehouse-config')
-def get_warehouse_config():
+def get_warehouse_config(layout: str = None):
     """Retorna configuración del almacén (incluyendo almacenes/zonas)"""
+    layout = obtener_layout(layout)
     return {
-        'filas': FILAS,
-        'columnas': COLUMNAS,
-        'pasillos': PASILLOS,
-        'almacenes': ALMACENES,
-        'costo_celda': COSTO_CELDA,
-        'costo_pasillo': COSTO_PASILLO
+        'filas': layout.filas,
+        'columnas': layout.columnas,
+        'pasillos': layout.pasillos,
+        'almacenes': layout.almacenes,
+        'costo_celda': layout.costo_celda,
+        'costo_pasillo': layout.costo_pasillo
     }
 
 
+@app.get('/layouts')
+def get_layouts():
+    """Lista los ids de layouts (sitios) registrados."""
+    return {'layouts': listar_layouts()}
+
+
+@app.post('/layouts')
+def post_layout(payload: dict):
+    """Registra un layout (sitio) nuevo; mismos campos que `WarehouseLayout.to_dict()`."""
+    try:
+        layout = registrar_layout(payload)
+    except (ValueError, TypeError, KeyError) as e:
+        return {'error': 'Layout inválido', 'detail': str(e)}
+    return layout.to_dict()
+
+
 @app.post('/export')
-def export_excel(payload: dict):
-    """Genera un Excel desde la simulación y lo devuelve como descarga
-    payload: mismos campos que /simulate
+async def export_excel(payload: dict, formato: str = 'xlsx', asincrono: bool = None):
+    """Genera el reporte de la simulación (xlsx, csv, txt o parquet) y lo devuelve como descarga.
+
+    payload: mismos campos que /simulate (más 'asincrono' opcional).
+    - formato=csv: el CSV se transmite fila a fila mientras se genera.
+    - Excel grandes (o asincrono=true): responde 202 con un 'job_id'; el archivo se
+      genera en segundo plano y se descarga desde /export/jobs/{job_id}/download.
+    La simulación y la escritura del archivo corren fuera del event loop.
     """
-    paquetes = payload.get('paquetes', PAQUETES)
-    inicio = GestorEntrada.validar_inicio(payload.get('inicio', INICIO))
-    costos = payload.get('costos', {})
-    costos_validos = GestorEntrada.validar_costos(costos) if costos else {'celda': payload.get('costo_celda', COSTO_CELDA), 'pasillo': payload.get('costo_pasillo', COSTO_PASILLO)}
-    paquetes_validos = GestorEntrada.validar_paquetes(paquetes)
+    escenario, validacion = GestorEntrada.depurar_escenario(payload)
+    formato = formato.lower()
+    if formato not in FORMATOS:
+        return {'error': 'Formato de exportación no soportado', 'detail': formato}
+
+    resultado = await run_in_threadpool(simular_con_cache, escenario, True)
+    pasos = resultado['pasos']
 
-    robot = RobotAlmacen(paquetes=paquetes_validos, inicio=inicio, costo_celda=costos_validos['celda'], costo_pasillo=costos_validos['pasillo'])
-    resultado = robot.ejecutar_recoleccion()
+    if asincrono is None:
+        # El CSV ya se transmite sin bloquear; solo los Excel grandes pasan a segundo plano
+        grande = formato == 'xlsx' and len(pasos) > UMBRAL_PASOS_ASINCRONO
+        asincrono = bool(payload.get('asincrono', grande))
+    if asincrono:
+        id_trabajo = exportaciones.enviar(
+            lambda f: Exportador.exportar(resultado, f, formato, escenario), formato, filas=len(pasos))
+        return _respuesta_trabajo(id_trabajo, validacion)
 
-    # Intentar crear Excel en memoria
+    media_type, nombre = FORMATOS[formato]
+    headers = {'Content-Disposition': f'attachment; filename="{nombre}"',
+               'X-Paquetes-Rechazados': str(validacion['rechazados'])}
+    if formato == 'csv':
+        return StreamingResponse(Exportador.iterar_csv(pasos), media_type=media_type, headers=headers)
     try:
-        import pandas as pd
-        from io import BytesIO
-        df = pd.DataFrame(robot.pasos)
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Pasos')
-        buffer.seek(0)
-        from fastapi.responses import StreamingResponse
-        headers = {'Content-Disposition': 'attachment; filename="reporte_recoleccion.xlsx"'}
-        return StreamingResponse(buffer, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', headers=headers)
+        buffer = io.BytesIO()
+        await run_in_threadpool(Exportador.exportar, resultado, buffer, formato, escenario)
     except Exception as e:
-        # si falla, devolver error
-        return {'error': 'No se pudo generar Excel en el servidor', 'detail': str(e)}
+        # si falla (p. ej. falta openpyxl o pyarrow), devolver error
+        return {'error': 'No se pudo generar el reporte en el servidor', 'detail': str(e)}
+    buffer.seek(0)
+    return StreamingResponse(buffer, media_type=media_type, headers=headers)
+
+
+@app.post('/export/batch')
+def export_batch(payload: dict, formato: str = 'csv'):
+    """Simula un lote de escenarios y exporta un archivo con una fila por escenario.
+
+    payload: {'escenarios': [...], 'resumen': bool (True por defecto)}; mismo formato
+    que /simulate/batch. Siempre se genera en segundo plano: responde 202 con 'job_id'.
+    """
+    formato = formato.lower()
+    if formato not in FORMATOS:
+        return {'error': 'Formato de exportación no soportado', 'detail': formato}
+    escenarios = payload.get('escenarios', [])
+    resumen = bool(payload.get('resumen', True))
+    id_trabajo = exportaciones.enviar(
+        lambda f: Exportador.exportar_lote(simular_lote(escenarios, resumen=resumen), f, formato),
+        formato, filas=len(escenarios))
+    return _respuesta_trabajo(id_trabajo)
+
+
+def _respuesta_trabajo(id_trabajo, validacion=None):
+    contenido = {
+        'job_id': id_trabajo,
+        'estado': 'pendiente',
+        'estado_url': f'/export/jobs/{id_trabajo}',
+        'descarga_url': f'/export/jobs/{id_trabajo}/download',
+    }
+    if validacion is not None:
+        contenido['validacion'] = validacion
+    return JSONResponse(status_code=202, content=contenido)
+
+
+@app.get('/export/jobs/{job_id}')
+def export_job_status(job_id: str):
+    """Estado de un trabajo de exportación: pendiente, en_proceso, listo o error."""
+    estado = exportaciones.estado(job_id)
+    if estado is None:
+        return JSONResponse(status_code=404, content={'error': 'Trabajo de exportación no encontrado'})
+    return estado
+
+
+@app.get('/export/jobs/{job_id}/download')
+def export_job_download(job_id: str):
+    """Descarga el reporte de un trabajo terminado."""
+    archivo = exportaciones.archivo(job_id)
+    if archivo is None:
+        estado = exportaciones.estado(job_id)
+        if estado is None:
+            return JSONResponse(status_code=404, content={'error': 'Trabajo de exportación no encontrado'})
+        return JSONResponse(status_code=409, content={'error': 'El reporte aún no está listo', 'estado': estado['estado']})
+    ruta, media_type, nombre = archivo
+    return FileResponse(ruta, media_type=media_type, filename=nombre)
 
 
 if __name__ == '__main__':
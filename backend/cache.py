@@ -0,0 +1,146 @@
+"""
+Módulo cache: caché LRU de resultados de ruta por escenario normalizado.
+
+La clave es un hash SHA-256 del escenario ya validado (paquetes ordenados, inicio,
+costos, layout completo, estrategia y nivel de detalle), de modo que dos payloads
+equivalentes comparten la misma entrada aunque los paquetes lleguen en otro orden.
+La caché está acotada por número de entradas y por bytes (tamaño serializado), y
+cada entrada expira tras `ttl_s` segundos. Es segura entre hilos.
+
+La comparten `/simulate`, `/export` y `/simulate/batch` a través de `simular_con_cache`,
+que detrás de la caché en memoria consulta el almacén SQLite (`almacenamiento`).
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from .almacenamiento import hash_canonico, obtener_almacen
+from .metricas import span
+from .robot import RobotAlmacen
+
+MAX_ENTRADAS = 1024
+MAX_BYTES = 64 * 1024 * 1024
+TTL_S = 600.0
+TIPO_SIMULACION = 'simulacion'
+
+
+def escenario_canonico(escenario, detalle=True):
+    """Forma canónica (serializable) de un escenario validado (argumentos de `RobotAlmacen`)."""
+    layout = escenario['layout']
+    return {
+        'paquetes': sorted((int(f), int(c)) for f, c in escenario['paquetes']),
+        'inicio': [int(v) for v in escenario['inicio']],
+        'final': [int(v) for v in escenario.get('final') or layout.final],
+        'costo_celda': float(escenario['costo_celda']),
+        'costo_pasillo': float(escenario['costo_pasillo']),
+        'estrategia': escenario['estrategia'],
+        'layout': layout.to_dict(),
+        'detalle': bool(detalle),
+    }
+
+
+def clave_escenario(escenario, detalle=True):
+    """Hash canónico de un escenario validado (argumentos de `RobotAlmacen`)."""
+    return hash_canonico(escenario_canonico(escenario, detalle))
+
+
+class CacheRutas:
+    """Caché LRU acotada por entradas, bytes y TTL, con contadores de aciertos/fallos."""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES, ttl_s=TTL_S):
+        self.max_entradas = int(max_entradas)
+        self.max_bytes = int(max_bytes)
+        self.ttl_s = float(ttl_s)
+        self._entradas = OrderedDict()  # clave -> (expira, bytes, valor)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    def obtener(self, clave):
+        """Retorna el valor cacheado (o None) y lo marca como usado recientemente."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            if entrada[0] < time.monotonic():
+                self._quitar(clave)
+                self.expiradas += 1
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[2]
+
+    def guardar(self, clave, valor):
+        """Guarda un valor; los que superan `max_bytes` por sí solos no se cachean."""
+        tamano = len(pickle.dumps(valor, pickle.HIGHEST_PROTOCOL))
+        if tamano > self.max_bytes or self.max_entradas <= 0:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (time.monotonic() + self.ttl_s, tamano, valor)
+            self._bytes += tamano
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+                self.desalojadas += 1
+
+    def _quitar(self, clave):
+        _, tamano, _ = self._entradas.pop(clave)
+        self._bytes -= tamano
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def metricas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0,
+                'expiradas': self.expiradas,
+                'desalojadas': self.desalojadas,
+                'max_entradas': self.max_entradas,
+                'max_bytes': self.max_bytes,
+                'ttl_s': self.ttl_s,
+            }
+
+
+cache_rutas = CacheRutas()
+
+
+def simular_con_cache(escenario, detalle=True, cache=None, persistir=True):
+    """Resultado de `RobotAlmacen(**escenario).ejecutar_recoleccion(detalle)` pasando por la caché.
+
+    Si falla la caché en memoria se busca la misma clave en el almacén SQLite (si está
+    activo) y, si tampoco está, se simula y se guarda; el resultado incluye 'id_corrida'.
+    Retorna una copia superficial: el llamador puede añadir claves sin alterar la caché.
+    """
+    cache = cache_rutas if cache is None else cache
+    clave = clave_escenario(escenario, detalle)
+    resultado = cache.obtener(clave)
+    if resultado is None:
+        almacen = obtener_almacen() if persistir else None
+        corrida = almacen.buscar_por_clave(TIPO_SIMULACION, clave) if almacen else None
+        if corrida is not None:
+            resultado = corrida['resultado']
+            resultado['id_corrida'] = corrida['id']
+        else:
+            with span('ruteo'):
+                resultado = RobotAlmacen(**escenario).ejecutar_recoleccion(detalle=detalle)
+            if almacen:
+                resultado['id_corrida'] = almacen.guardar_corrida(
+                    TIPO_SIMULACION, clave, escenario_canonico(escenario, detalle), resultado)
+        cache.guardar(clave, resultado)
+    return dict(resultado)
@@ -33,9 +33,14 @@ ALMACENES = [
     }
 ]
 
+
 def get_almacen_by_column(col):
-    """Retorna el almacén correspondiente a una columna"""
-    for almacen in ALMACENES:
-        if col in almacen["columnas"]:
-            return almacen
-    return None
+    """Retorna el almacén correspondiente a una columna del layout por defecto (O(1))."""
+    from .layout import obtener_layout  # layout importa este módulo
+    return obtener_layout().almacen_de_columna(col)
+
+
+def zones_for_columns(cols):
+    """Retorna el almacén (o None) de cada columna de `cols` en el layout por defecto, en una sola pasada."""
+    from .layout import obtener_layout
+    return obtener_layout().zones_for_columns(cols)
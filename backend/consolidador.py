@@ -1,9 +1,62 @@
 """
 Módulo consolidador: Recibe múltiples órdenes de pedido y genera una lista
 de picking consolidada y optimizada minimizando distancia de recorrido.
+
+Para archivos muy grandes, `ConsolidadorIncremental` acepta líneas NDJSON/CSV de a
+poco y agrega con contadores compactos por (fila, col, sku).
 """
 
-from .config import FILAS, COLUMNAS, PASILLOS
+import csv
+import json
+
+from .entrada import GestorEntrada, MAX_EJEMPLOS_RECHAZO
+from .layout import obtener_layout
+from .metricas import span
+from .robot import RobotAlmacen
+from .secuenciador import ESTRATEGIA_POR_DEFECTO
+
+
+def medir_ruta_picking(ubicaciones, layout, costo_celda=None, costo_pasillo=None, estrategia=ESTRATEGIA_POR_DEFECTO):
+    """(pasos, costo) que cobra `RobotAlmacen` al recoger las ubicaciones (fila, col).
+
+    Se ejecuta la misma recolección que `/simulate` (sale de INICIO, recorre las
+    columnas con `estrategia` y termina en el punto de entrega FINAL), así que el costo
+    de la consolidación coincide con el de simular esas ubicaciones. Basta recorrer la
+    fila mínima y máxima de cada columna: las intermedias quedan en el camino y no
+    cambian ni los pasos ni el costo.
+    """
+    extremos = {}
+    for fila, col in ubicaciones:
+        lo_hi = extremos.get(col)
+        if lo_hi is None:
+            extremos[col] = [fila, fila]
+        elif fila < lo_hi[0]:
+            lo_hi[0] = fila
+        elif fila > lo_hi[1]:
+            lo_hi[1] = fila
+    paquetes = [[fila, col] for col, (lo, hi) in extremos.items() for fila in ((lo,) if lo == hi else (lo, hi))]
+    robot = RobotAlmacen(paquetes=paquetes, costo_celda=costo_celda,
+                         costo_pasillo=costo_pasillo, estrategia=estrategia, layout=layout)
+    resultado = robot.ejecutar_recoleccion(detalle=False)
+    return resultado['pasos_totales'], robot.costo_total
+
+
+def _orden_de_linea(id_orden, fila, col, cantidad, sku=None):
+    """Una línea de pedido suelta como orden de un solo item."""
+    return {'id_orden': id_orden, 'items': [[fila, col, cantidad, sku]]}
+
+
+def _numero_csv(valor):
+    """Campo CSV numérico como int o float; si no es un número se deja como está (se rechaza al validar)."""
+    if not isinstance(valor, str):
+        return valor
+    try:
+        return int(valor)
+    except ValueError:
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
 
 
 class ConsolidadorPicking:
@@ -13,7 +66,8 @@ class ConsolidadorPicking:
         pass
 
     @staticmethod
-    def consolidar_ordenes(ordenes):
+    @span('consolidacion')
+    def consolidar_ordenes(ordenes, layout=None, costo_celda=None, costo_pasillo=None, estrategia=ESTRATEGIA_POR_DEFECTO):
         """
         Recibe múltiples órdenes y retorna lista consolidada y optimizada.
         
@@ -23,44 +77,49 @@ class ConsolidadorPicking:
                     'id_orden': str,
                     'items': [[fila, col, cantidad, sku], ...]
                 }
+            layout: id, dict o `WarehouseLayout`; los items mal formados o fuera de la cuadrícula
+                se descartan y se informan en 'validacion'
+            costo_celda / costo_pasillo: costos para la ruta real (por defecto los del layout)
+            estrategia: estrategia de `RobotAlmacen` con la que se mide `costo_ruta`
         
         Returns:
             dict con:
                 {
                     'picking_list': lista consolidada ordenada,
                     'rutas': rutas optimizadas por zona,
-                    'estadisticas': stats de consolidación
+                    'estadisticas': stats de consolidación,
+                    'validacion': reporte de items rechazados (`GestorEntrada.depurar_ordenes`)
                 }
         """
         if not ordenes:
             return {
                 'picking_list': [],
                 'rutas': [],
-                'estadisticas': {'total_items': 0, 'ordenes': 0, 'distancia_estimada': 0}
+                'estadisticas': {'total_items': 0, 'ordenes': 0, 'distancia_estimada': 0, 'costo_ruta': 0, 'pasos_ruta': 0},
+                'validacion': GestorEntrada.depurar_ordenes([])['reporte'],
             }
 
-        # 1. Consolidar todos los items de todas las órdenes
+        layout = obtener_layout(layout)
+        if not isinstance(ordenes, (list, tuple)):
+            ordenes = [ordenes]
+
+        # 1. Validar celdas y cantidades de todos los items (sin deduplicar: se consolidan)
+        depuracion = GestorEntrada.depurar_ordenes(ordenes, layout)
+        items, validacion = depuracion['items'], depuracion['reporte']
+
+        # 2. Consolidar todos los items de todas las órdenes
         items_consolidados = {}  # key: (fila, col), value: {sku: cantidad, ordenes: []}
-        
-        for orden in ordenes:
-            orden_id = orden.get('id_orden', 'DESCONOCIDA')
-            items = orden.get('items', [])
-            
-            for item in items:
-                if len(item) < 3:
-                    continue
-                fila, col, cantidad = item[0], item[1], item[2]
-                sku = item[3] if len(item) > 3 else f"SKU_{fila}_{col}"
-                
-                key = (fila, col)
-                if key not in items_consolidados:
-                    items_consolidados[key] = {'cantidad': 0, 'skus': {}, 'ordenes': set()}
-                
-                items_consolidados[key]['cantidad'] += cantidad
-                items_consolidados[key]['skus'][sku] = items_consolidados[key]['skus'].get(sku, 0) + cantidad
-                items_consolidados[key]['ordenes'].add(orden_id)
-
-        # 2. Agrupar por columna para recorrido eficiente
+
+        for orden_id, fila, col, cantidad, sku in items:
+            key = (fila, col)
+            if key not in items_consolidados:
+                items_consolidados[key] = {'cantidad': 0, 'skus': {}, 'ordenes': set()}
+
+            items_consolidados[key]['cantidad'] += cantidad
+            items_consolidados[key]['skus'][sku] = items_consolidados[key]['skus'].get(sku, 0) + cantidad
+            items_consolidados[key]['ordenes'].add(orden_id)
+
+        # 3. Agrupar por columna para recorrido eficiente
         por_columna = {}
         for (fila, col), data in items_consolidados.items():
             if col not in por_columna:
@@ -73,21 +132,25 @@ class ConsolidadorPicking:
                 'ordenes': list(data['ordenes'])
             })
 
-        # 3. Ordenar dentro de cada columna (de arriba a abajo o abajo a arriba)
+        # 4. Ordenar dentro de cada columna (de arriba a abajo o abajo a arriba)
         for col in por_columna:
             por_columna[col].sort(key=lambda x: x['fila'])
 
-        # 4. Crear picking list ordenada (recorrido por columnas)
+        # 5. Crear picking list ordenada (recorrido por columnas), con el almacén (zona)
+        #    de cada columna resuelto en una sola consulta al layout
         picking_list = []
         columnas_ordenadas = sorted(por_columna.keys())
-        
-        for col in columnas_ordenadas:
+        almacenes = layout.zones_for_columns(columnas_ordenadas)
+
+        for col, almacen in zip(columnas_ordenadas, almacenes):
             for item in por_columna[col]:
+                item['almacen'] = almacen['nombre'] if almacen else None
                 picking_list.append(item)
 
-        # 5. Calcular estadísticas
+        # 6. Calcular estadísticas
         total_items = sum(item['cantidad'] for item in picking_list)
         distancia_estimada = ConsolidadorPicking._calcular_distancia(picking_list)
+        pasos_ruta, costo_ruta = medir_ruta_picking(items_consolidados.keys(), layout, costo_celda, costo_pasillo, estrategia)
 
         return {
             'picking_list': picking_list,
@@ -97,13 +160,19 @@ class ConsolidadorPicking:
                 'ordenes': len(ordenes),
                 'ubicaciones_unicas': len(items_consolidados),
                 'distancia_estimada': round(distancia_estimada, 2),
+                'costo_ruta': round(costo_ruta, 2),
+                'pasos_ruta': pasos_ruta,
                 'columnas_visitadas': columnas_ordenadas
-            }
+            },
+            'validacion': validacion,
         }
 
     @staticmethod
     def _calcular_distancia(picking_list):
-        """Calcula distancia aproximada del recorrido"""
+        """Calcula distancia aproximada del recorrido (Manhattan desde (0,0), sin pasillos).
+
+        Se conserva como estimación rápida; la ruta real está en `costo_ruta`/`pasos_ruta`.
+        """
         if not picking_list:
             return 0
         
@@ -119,13 +188,14 @@ class ConsolidadorPicking:
         return distancia
 
     @staticmethod
-    def optimizar_picking(items_ubicaciones):
+    def optimizar_picking(items_ubicaciones, layout=None):
         """
         Versión mejorada: recibe items y retorna ruta optimizada
         usando agrupación por zonas.
         
         Args:
             items_ubicaciones: list de [fila, col, cantidad, sku]
+            layout: id, dict o `WarehouseLayout` que define los almacenes (zonas)
         
         Returns:
             list ordenada optimizada
@@ -133,11 +203,15 @@ class ConsolidadorPicking:
         if not items_ubicaciones:
             return []
 
-        # Agrupar por zona (columna como proxy)
+        layout = obtener_layout(layout)
+        sin_zona = len(layout.almacenes)
+
+        # Agrupar por zona (almacén del layout; columnas sin almacén van al final)
+        indices = layout.zone_indexes_for_columns([item[1] for item in items_ubicaciones])
         zonas = {}
-        for item in items_ubicaciones:
-            fila, col = item[0], item[1]
-            zona = col // 3  # Dividir en 3 zonas (ajustable)
+        for item, zona in zip(items_ubicaciones, indices):
+            if zona < 0:
+                zona = sin_zona
             
             if zona not in zonas:
                 zonas[zona] = []
@@ -175,3 +249,182 @@ class ConsolidadorPicking:
         
         texto += "═" * 80 + "\n"
         return texto
+
+
+class ConsolidadorIncremental:
+    """Consolidación por streaming para olas con cientos de miles de líneas de pedido.
+
+    Las líneas se agregan a medida que llegan (NDJSON, CSV o listas) en un único
+    contador {(fila, col, sku): cantidad}; los conjuntos de órdenes por ubicación solo
+    se guardan si `incluir_ordenes=True`. La lista de picking se emite en orden de
+    columna (y fila) con `iterar_picking()`, sin construir la lista completa. Cada
+    bloque se valida como en `consolidar_ordenes` y los rechazos quedan en `validacion`.
+
+    Formato de línea NDJSON (cualquiera de los dos):
+        {"id_orden": "ORD001", "fila": 2, "col": 0, "cantidad": 1, "sku": "SKU-001"}
+        {"id_orden": "ORD001", "items": [[fila, col, cantidad, sku], ...]}
+    Formato CSV: encabezado con las columnas id_orden,fila,col,cantidad,sku.
+    """
+
+    def __init__(self, layout=None, incluir_ordenes=False, costo_celda=None, costo_pasillo=None,
+                 estrategia=ESTRATEGIA_POR_DEFECTO):
+        self.layout = obtener_layout(layout)
+        self.costo_celda = costo_celda
+        self.costo_pasillo = costo_pasillo
+        self.estrategia = estrategia
+        self.incluir_ordenes = incluir_ordenes
+        self.cantidades = {}
+        self.ordenes_por_ubicacion = {} if incluir_ordenes else None
+        self.ids_ordenes = set()
+        self.lineas_descartadas = 0
+        self.validacion = GestorEntrada.depurar_ordenes([])['reporte']
+        self._csv_encabezado = None
+
+    def agregar_ordenes(self, ordenes):
+        """Agrega un bloque de órdenes con el formato de `ConsolidadorPicking.consolidar_ordenes`.
+
+        Los items se validan con `GestorEntrada.depurar_ordenes` (mismas reglas que
+        /consolidate); los rechazados se acumulan en `validacion`. Retorna cuántos se aceptaron.
+        """
+        depuracion = GestorEntrada.depurar_ordenes(ordenes, self.layout)
+        self._acumular_reporte(depuracion['reporte'])
+        cantidades, por_ubicacion = self.cantidades, self.ordenes_por_ubicacion
+        for orden_id, fila, col, cantidad, sku in depuracion['items']:
+            clave = (fila, col, sku)
+            cantidades[clave] = cantidades.get(clave, 0) + cantidad
+            self.ids_ordenes.add(orden_id)
+            if por_ubicacion is not None:
+                por_ubicacion.setdefault((fila, col), set()).add(orden_id)
+        return len(depuracion['items'])
+
+    def agregar_linea(self, id_orden, fila, col, cantidad, sku=None):
+        """Agrega una línea de pedido; retorna False si se descartó."""
+        return self.agregar_ordenes([_orden_de_linea(id_orden, fila, col, cantidad, sku)]) == 1
+
+    def agregar_orden(self, orden):
+        """Agrega una orden con el formato de `ConsolidadorPicking.consolidar_ordenes`."""
+        self.agregar_ordenes([orden])
+
+    def agregar_ndjson(self, lineas):
+        """Consume un iterable de líneas NDJSON (str o bytes) como un solo bloque.
+
+        Las líneas que no son JSON válido o cuyo valor no es un objeto se informan en
+        `validacion` como items mal formados.
+        """
+        ordenes = []
+        for linea in lineas:
+            try:
+                if isinstance(linea, bytes):
+                    linea = linea.decode('utf-8')
+                linea = linea.strip()
+                if not linea:
+                    continue
+                data = json.loads(linea)
+            except ValueError:
+                ordenes.append(linea)
+                continue
+            if isinstance(data, dict) and 'items' not in data:
+                data = _orden_de_linea(data.get('id_orden', 'DESCONOCIDA'), data.get('fila'), data.get('col'),
+                                       data.get('cantidad', 1), data.get('sku'))
+            ordenes.append(data)
+        self.agregar_ordenes(ordenes)
+
+    def agregar_csv(self, lineas):
+        """Consume un iterable de líneas CSV; la primera línea recibida es el encabezado.
+
+        Los campos numéricos se convierten antes de validar ('2.5' es una fila mal formada,
+        no la fila 2).
+        """
+        lector = csv.reader(l.decode('utf-8') if isinstance(l, bytes) else l for l in lineas)
+        ordenes = []
+        for fila_csv in lector:
+            if not fila_csv:
+                continue
+            if self._csv_encabezado is None:
+                self._csv_encabezado = {nombre.strip(): i for i, nombre in enumerate(fila_csv)}
+                continue
+            ordenes.append(_orden_de_linea(self._campo_csv(fila_csv, 'id_orden', 'DESCONOCIDA'),
+                                           _numero_csv(self._campo_csv(fila_csv, 'fila')),
+                                           _numero_csv(self._campo_csv(fila_csv, 'col')),
+                                           _numero_csv(self._campo_csv(fila_csv, 'cantidad', 1)),
+                                           self._campo_csv(fila_csv, 'sku')))
+        self.agregar_ordenes(ordenes)
+
+    def _acumular_reporte(self, reporte):
+        """Suma el reporte de un bloque a `validacion`; los índices de los ejemplos son globales."""
+        total = self.validacion
+        for ejemplo in reporte['ejemplos']:
+            if len(total['ejemplos']) >= MAX_EJEMPLOS_RECHAZO:
+                break
+            total['ejemplos'].append(dict(ejemplo, indice=ejemplo['indice'] + total['recibidos']))
+        for motivo, cantidad in reporte['motivos'].items():
+            total['motivos'][motivo] += cantidad
+        total['recibidos'] += reporte['recibidos']
+        total['aceptados'] += reporte['aceptados']
+        total['rechazados'] += reporte['rechazados']
+        self.lineas_descartadas = total['rechazados']
+
+    def _campo_csv(self, fila_csv, nombre, defecto=None):
+        i = self._csv_encabezado.get(nombre)
+        if i is None or i >= len(fila_csv):
+            return defecto
+        return fila_csv[i]
+
+    def agregar_archivo(self, ruta):
+        """Lee un archivo .ndjson/.jsonl o .csv línea por línea."""
+        ruta = str(ruta)
+        with open(ruta, 'r', encoding='utf-8', newline='') as f:
+            if ruta.endswith('.csv'):
+                self.agregar_csv(f)
+            else:
+                self.agregar_ndjson(f)
+
+    def iterar_picking(self):
+        """Genera los items de picking en orden de columna y fila, uno por ubicación."""
+        almacenes = [a['nombre'] if a else None for a in self.layout.zones_for_columns(range(self.layout.columnas))]
+        actual, item = None, None
+        for (fila, col, sku) in sorted(self.cantidades, key=lambda k: (k[1], k[0], k[2])):
+            cantidad = self.cantidades[(fila, col, sku)]
+            if (fila, col) != actual:
+                if item is not None:
+                    yield item
+                actual = (fila, col)
+                item = {'fila': fila, 'col': col, 'almacen': almacenes[col], 'cantidad': 0, 'skus': {}}
+                if self.ordenes_por_ubicacion is not None:
+                    item['ordenes'] = sorted(self.ordenes_por_ubicacion[actual])
+            item['cantidad'] += cantidad
+            item['skus'][sku] = cantidad
+        if item is not None:
+            yield item
+
+    def estadisticas(self):
+        """Estadísticas agregadas (no requiere materializar la lista de picking)."""
+        ubicaciones = {(fila, col) for fila, col, _ in self.cantidades}
+        columnas = sorted({col for _, col in ubicaciones})
+        distancia, pos = 0, (0, 0)
+        for fila, col in sorted(ubicaciones, key=lambda k: (k[1], k[0])):
+            distancia += abs(fila - pos[0]) + abs(col - pos[1])
+            pos = (fila, col)
+        pasos_ruta, costo_ruta = medir_ruta_picking(ubicaciones, self.layout, self.costo_celda, self.costo_pasillo,
+                                                    self.estrategia)
+        return {
+            'total_items': sum(self.cantidades.values()),
+            'ordenes': len(self.ids_ordenes),
+            'ubicaciones_unicas': len(ubicaciones),
+            'distancia_estimada': round(distancia, 2),
+            'costo_ruta': round(costo_ruta, 2),
+            'pasos_ruta': pasos_ruta,
+            'columnas_visitadas': columnas,
+            'lineas_descartadas': self.lineas_descartadas,
+        }
+
+    @span('consolidacion')
+    def resultado(self):
+        """Resultado completo con el mismo formato que `consolidar_ordenes`."""
+        estadisticas = self.estadisticas()
+        return {
+            'picking_list': list(self.iterar_picking()),
+            'rutas': estadisticas['columnas_visitadas'],
+            'estadisticas': estadisticas,
+            'validacion': self.validacion,
+        }
@@ -1,7 +1,15 @@
 from datetime import date, timedelta
 import math
 
-from .config import get_almacen_by_column
+from .layout import obtener_layout
+
+try:
+    import numpy as np
+except ImportError:  # la ruta iterativa no necesita NumPy
+    np = None
+
+# Con menos ubicaciones que esto, convertir a arreglos cuesta más que recorrer la lista
+MIN_UBICACIONES_VECTORIZADO = 32
 
 
 class ConteoCiclico:
@@ -16,42 +24,149 @@ class ConteoCiclico:
       - lista priorizada con fechas planificadas (ISO) para los conteos necesarios
     """
 
-    def __init__(self, frecuencia_minima: int = 5, periodo_dias: int = 365, weights: dict = None, zone_weights: dict = None):
+    def __init__(self, frecuencia_minima: int = 5, periodo_dias: int = 365, weights: dict = None, zone_weights: dict = None, layout=None):
         self.frecuencia_minima = int(frecuencia_minima)
         self.periodo_dias = int(periodo_dias)
         # Weights for scoring: keys: 'faltantes', 'movimientos', 'criticidad'
         self.weights = weights or {'faltantes': 100, 'movimientos': 1, 'criticidad': 50}
         # Optional additional bonus per almacen (by nombre)
         self.zone_weights = zone_weights or {}
+        # Layout del almacén (zonas por columna)
+        self.layout = obtener_layout(layout)
 
     def generar_plan(self, ubicaciones, historial=None):
         """Genera un plan priorizado de conteos.
 
         ubicaciones: list[dict]
-        historial: no usado actualmente, reservado para futuras mejoras
+        historial: conteos ya realizados por SKU, {sku: [fecha ISO, ...]} o {sku: n}
+            (p. ej. `AlmacenResultados.historial_conteos`). Las fechas fuera del periodo
+            se ignoran; para cada SKU se usa el mayor entre este historial y su
+            'conteos_ultimos_365dias'.
+
+        Con NumPy disponible y listas grandes la puntuación (faltantes, bonus de zona y
+        score) se calcula sobre columnas en una sola pasada vectorizada; si no, ubicación
+        por ubicación.
+        Ambos caminos producen el mismo plan.
         """
         hoy = date.today()
+        conteos_historial = self._contar_historial(historial, hoy)
+        if np is not None and len(ubicaciones) >= MIN_UBICACIONES_VECTORIZADO:
+            return self._plan_columnar(ubicaciones, conteos_historial, hoy)
+        return self._plan_iterativo(ubicaciones, conteos_historial, hoy)
+
+    @staticmethod
+    def _columnas(ubicaciones):
+        columnas = []
+        for item in ubicaciones:
+            try:
+                columnas.append(int(item.get('col')) if item.get('col') is not None else None)
+            except (TypeError, ValueError):
+                columnas.append(None)
+        return columnas
+
+    def _fechas(self, needed, hoy):
+        """Fechas ISO de los conteos faltantes repartidos en el periodo (o uno de mantenimiento)."""
+        if needed > 0:
+            interval = max(1, math.floor(self.periodo_dias / needed))
+            return [(hoy + timedelta(days=k * interval)).isoformat() for k in range(needed)]
+        return [(hoy + timedelta(days=math.floor(self.periodo_dias / 2))).isoformat()]
+
+    @staticmethod
+    def _numeros(valores, tipo, convertir):
+        """Arreglo `tipo` de `valores` convertido en bloque si todos son números finitos.
+
+        Si hay otra cosa (texto, objetos), se convierte uno a uno con `convertir`, con las
+        mismas reglas y errores que la ruta iterativa.
+        """
+        arreglo = np.asarray(valores)
+        if arreglo.dtype.kind in 'biu' or (arreglo.dtype.kind == 'f' and np.isfinite(arreglo).all()):
+            return arreglo.astype(tipo)
+        return np.fromiter((convertir(v) for v in valores), tipo, len(valores))
+
+    def _zonas(self, ubicaciones):
+        """Índice de almacén (-1 sin zona) de cada ubicación, con una consulta a la tabla por columnas."""
+        n = self.layout.columnas
+        tabla = np.asarray(self.layout.almacen_por_columna + [-1], dtype=np.int64)
+        cols = np.asarray([item.get('col') for item in ubicaciones])
+        if cols.dtype.kind == 'f':
+            cols = np.where(np.isfinite(cols), cols, -1)
+        elif cols.dtype.kind not in 'biu':
+            cols = np.array([c if c is not None and 0 <= c < n else -1 for c in self._columnas(ubicaciones)])
+        # int() trunca hacia cero; las columnas fuera del layout van a la entrada "sin zona"
+        cols = np.clip(cols, -1, n).astype(np.int64)
+        cols[cols < 0] = n
+        return tabla[cols]
+
+    def _plan_columnar(self, ubicaciones, conteos_historial, hoy):
+        """Puntuación vectorizada: cada campo se extrae una vez a un arreglo y el score es aritmética de arreglos."""
+        n = len(ubicaciones)
+        skus = [item.get('sku') or item.get('ref') or f"{item.get('fila')}-{item.get('col')}" for item in ubicaciones]
+        movimientos = self._numeros([item.get('movimientos', 0) or 0 for item in ubicaciones], np.int64, int)
+        conteos = self._numeros([item.get('conteos_ultimos_365dias', 0) or 0 for item in ubicaciones], np.int64, int)
+        if conteos_historial:
+            conteos = np.maximum(conteos, np.fromiter((conteos_historial.get(sku, 0) for sku in skus), np.int64, n))
+        criticidad = self._numeros([item.get('criticidad', 0) or 0 for item in ubicaciones], np.float64, float)
+
+        # Bonus por zona: tabla por índice de almacén; el último elemento (índice -1) es "sin zona"
+        bonus_zona = np.array([float(self.zone_weights.get(a.get('nombre'), 0) or 0) if a.get('nombre') in self.zone_weights
+                               else 0.0 for a in self.layout.almacenes] + [0.0])
+
+        faltantes = np.maximum(0, self.frecuencia_minima - conteos)
+        score = (faltantes * float(self.weights.get('faltantes', 100)) +
+                 movimientos * float(self.weights.get('movimientos', 1)) +
+                 criticidad * float(self.weights.get('criticidad', 50)) +
+                 bonus_zona[self._zonas(ubicaciones)])
+
+        # Orden: score descendente y luego sku
+        if all(isinstance(sku, str) for sku in skus):
+            orden = np.lexsort((np.array(skus), -score))
+        else:
+            orden = np.array(sorted(range(n), key=lambda i: (-score[i], skus[i])), dtype=np.int64)
+
+        # Columnas de salida ya permutadas; las fechas se calculan una vez por valor de faltantes
+        faltantes_o = faltantes[orden]
+        fechas_por_faltantes = {int(k): self._fechas(int(k), hoy) for k in np.unique(faltantes_o)}
+        orden_l = orden.tolist()
+        plan = [{
+            'sku': skus[i],
+            'fila': ubicaciones[i].get('fila'),
+            'col': ubicaciones[i].get('col'),
+            'conteos_ultimos_365dias': conteo,
+            'faltantes': needed,
+            'score': puntaje,
+            'fechas_planificadas': list(fechas_por_faltantes[needed]),
+        } for i, conteo, needed, puntaje in zip(orden_l, conteos[orden].tolist(), faltantes_o.tolist(),
+                                                 score[orden].tolist())]
+
+        return {
+            'plan': plan,
+            'estadisticas': {
+                'total_items': n,
+                'items_con_faltantes': int(np.count_nonzero(faltantes)),
+                'total_counts_scheduled': int(faltantes.sum())
+            }
+        }
+
+    def _plan_iterativo(self, ubicaciones, conteos_historial, hoy):
+        """Puntuación ubicación por ubicación (sin NumPy)."""
+        # Zona (almacén) de todas las ubicaciones en una sola consulta al índice
+        almacenes = self.layout.zones_for_columns(self._columnas(ubicaciones))
 
         # Enriquecer y calcular prioridad
         enriched = []
-        for item in ubicaciones:
+        for item, almacen in zip(ubicaciones, almacenes):
             sku = item.get('sku') or item.get('ref') or f"{item.get('fila')}-{item.get('col')}"
             movimientos = int(item.get('movimientos', 0) or 0)
-            conteos_365 = int(item.get('conteos_ultimos_365dias', 0) or 0)
+            conteos_365 = max(int(item.get('conteos_ultimos_365dias', 0) or 0), conteos_historial.get(sku, 0))
             criticidad = float(item.get('criticidad', 0) or 0)
 
             # Cuántos conteos faltan para llegar a la frecuencia mínima
             faltantes = max(0, self.frecuencia_minima - conteos_365)
 
-            # Determinar zona (almacén) y posible bonus
-            almacen = None
+            # Posible bonus por zona
             zona_bonus = 0
-            try:
-                almacen = get_almacen_by_column(int(item.get('col'))) if item.get('col') is not None else None
-                if almacen and almacen.get('nombre') in self.zone_weights:
-                    zona_bonus = float(self.zone_weights.get(almacen.get('nombre'), 0) or 0)
-            except Exception:
-                almacen = None
+            if almacen and almacen.get('nombre') in self.zone_weights:
+                zona_bonus = float(self.zone_weights.get(almacen.get('nombre'), 0) or 0)
 
             # Puntuación usando pesos configurables
             score = (
@@ -74,23 +189,16 @@ class ConteoCiclico:
         # Ordenar por score descendente (más urgente primero), luego por sku
         enriched.sort(key=lambda x: (-x['score'], x['sku']))
 
-        # Generar fechas de conteo para cada elemento
+        # Generar fechas de conteo para cada elemento (una vez por valor de faltantes)
         plan = []
         total_counts_scheduled = 0
+        fechas_por_faltantes = {}
         for idx, it in enumerate(enriched):
             needed = it['faltantes']
-            fechas = []
-            if needed > 0:
-                # repartir los conteos faltantes uniformemente en el periodo
-                interval = max(1, math.floor(self.periodo_dias / needed))
-                for k in range(needed):
-                    planned_date = hoy + timedelta(days=k * interval)
-                    fechas.append(planned_date.isoformat())
-                total_counts_scheduled += needed
-            else:
-                # No necesita conteos extra: programamos un conteo de mantenimiento cada periodo (opcional)
-                planned_date = hoy + timedelta(days=math.floor(self.periodo_dias / 2))
-                fechas.append(planned_date.isoformat())
+            if needed not in fechas_por_faltantes:
+                fechas_por_faltantes[needed] = self._fechas(needed, hoy)
+            fechas = list(fechas_por_faltantes[needed])
+            total_counts_scheduled += needed
 
             plan.append({
                 'sku': it['sku'],
@@ -113,6 +221,20 @@ class ConteoCiclico:
             'estadisticas': estadisticas
         }
 
+    def _contar_historial(self, historial, hoy):
+        """Conteos por SKU dentro del periodo a partir del historial (fechas ISO o totales)."""
+        if not historial:
+            return {}
+        desde = (hoy - timedelta(days=self.periodo_dias)).isoformat()
+        hasta = hoy.isoformat()
+        conteos = {}
+        for sku, registros in historial.items():
+            if isinstance(registros, (int, float)):
+                conteos[str(sku)] = int(registros)
+            else:
+                conteos[str(sku)] = sum(1 for fecha in registros if desde < str(fecha)[:10] <= hasta)
+        return conteos
+
 
 if __name__ == '__main__':
     # Ejemplo rápido
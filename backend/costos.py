@@ -0,0 +1,135 @@
+"""
+Módulo de costos: índice precalculado de costos de movimiento sobre la cuadrícula.
+
+El índice se construye una sola vez por combinación de (filas, columnas, pasillos,
+transiciones, costo_celda, costo_pasillo) y se reutiliza entre solicitudes, de modo
+que el costo y los pasos entre dos celdas cualesquiera se obtienen en tiempo constante.
+"""
+
+from functools import lru_cache
+
+# Por encima de este ancho la matriz columna→columna ocuparía demasiada memoria;
+# se resuelve con las sumas prefijas (también O(1), algo más lento por llamada).
+MAX_COLUMNAS_MATRIZ = 512
+
+
+class IndiceCostos:
+    """Tablas de costos horizontales (con desvíos por transición) para una cuadrícula.
+
+    - `pasillos_hasta[c]`: número de pasillos en las columnas 0..c (suma prefija),
+      permite contar entradas a pasillos y cruces en O(1).
+    - `pasos_h` / `costo_h`: matriz columna→columna (aplanada) con los pasos y el costo
+      horizontal ya resueltos, incluyendo el desvío por la columna de transición
+      más barata cuando el movimiento cruza un pasillo.
+    """
+
+    __slots__ = ('filas', 'columnas', 'pasillos', 'transiciones', 'costo_celda',
+                 'costo_pasillo', 'pasillos_hasta', 'pasos_h', 'costo_h')
+
+    def __init__(self, filas, columnas, pasillos, transiciones, costo_celda, costo_pasillo):
+        self.filas = int(filas)
+        self.columnas = int(columnas)
+        self.pasillos = frozenset(pasillos)
+        self.transiciones = tuple(sorted(transiciones))
+        self.costo_celda = float(costo_celda)
+        self.costo_pasillo = float(costo_pasillo)
+
+        acumulado = 0
+        self.pasillos_hasta = []
+        for c in range(self.columnas):
+            if c in self.pasillos:
+                acumulado += 1
+            self.pasillos_hasta.append(acumulado)
+
+        n = self.columnas
+        if n > MAX_COLUMNAS_MATRIZ:
+            self.pasos_h = self.costo_h = None
+            return
+        self.pasos_h = [0] * (n * n)
+        self.costo_h = [0.0] * (n * n)
+        for c1 in range(n):
+            for c2 in range(n):
+                pasos, costo = self._horizontal_con_desvio(c1, c2)
+                self.pasos_h[c1 * n + c2] = pasos
+                self.costo_h[c1 * n + c2] = costo
+
+    def _horizontal_directo(self, col1, col2):
+        """Pasos y costo de un movimiento horizontal sin desvíos (suma prefija)."""
+        if col1 == col2:
+            return 0, 0.0
+        left, right = min(col1, col2), max(col1, col2)
+        pasos = right - left
+        # El costo se aplica al entrar en cada columna left+1..right
+        entradas_pasillo = self.pasillos_hasta[right] - self.pasillos_hasta[left]
+        costo = entradas_pasillo * self.costo_pasillo + (pasos - entradas_pasillo) * self.costo_celda
+        return pasos, costo
+
+    def horizontal_directo(self, col1, col2):
+        """(pasos, costo, entradas_a_pasillo) de un movimiento horizontal sin desvíos."""
+        if col1 == col2:
+            return 0, 0.0, 0
+        left, right = min(col1, col2), max(col1, col2)
+        entradas_pasillo = self.pasillos_hasta[right] - self.pasillos_hasta[left]
+        pasos, costo = self._horizontal_directo(col1, col2)
+        return pasos, costo, entradas_pasillo
+
+    def cruza_pasillo(self, col1, col2):
+        """True si hay un pasillo ESTRICTAMENTE entre las dos columnas."""
+        left, right = min(col1, col2), max(col1, col2)
+        if right - left < 2:
+            return False
+        return self.pasillos_hasta[right - 1] - self.pasillos_hasta[left] > 0
+
+    def transicion_desvio(self, col1, col2):
+        """Columna de transición usada para ir de col1 a col2, o None si el movimiento es directo."""
+        if not self.cruza_pasillo(col1, col2):
+            return None
+        if col1 in self.transiciones or col2 in self.transiciones:
+            return None
+        mejor, mejor_costo = None, None
+        for t in self.transiciones:
+            if not 0 <= t < self.columnas:
+                continue
+            costo = self._horizontal_directo(col1, t)[1] + self._horizontal_directo(t, col2)[1]
+            # En empate gana la transición de menor índice
+            if mejor_costo is None or costo < mejor_costo:
+                mejor, mejor_costo = t, costo
+        return mejor
+
+    def _horizontal_con_desvio(self, col1, col2):
+        t = self.transicion_desvio(col1, col2)
+        if t is None:
+            return self._horizontal_directo(col1, col2)
+        pasos_a, costo_a = self._horizontal_directo(col1, t)
+        pasos_de, costo_de = self._horizontal_directo(t, col2)
+        return pasos_a + pasos_de, costo_a + costo_de
+
+    def costo_horizontal(self, col1, col2):
+        """(pasos, costo) horizontal entre dos columnas, respetando transiciones."""
+        if self.pasos_h is None:
+            return self._horizontal_con_desvio(col1, col2)
+        i = col1 * self.columnas + col2
+        return self.pasos_h[i], self.costo_h[i]
+
+    def costo_movimiento(self, fila1, col1, fila2, col2):
+        """(pasos, costo) entre dos celdas con descomposición V-H, en O(1)."""
+        pasos_v = abs(fila2 - fila1)
+        if self.pasos_h is None:
+            pasos_h, costo_h = self._horizontal_con_desvio(col1, col2)
+            return pasos_v + pasos_h, pasos_v * self.costo_celda + costo_h
+        i = col1 * self.columnas + col2
+        return pasos_v + self.pasos_h[i], pasos_v * self.costo_celda + self.costo_h[i]
+
+
+@lru_cache(maxsize=64)
+def _indice_cacheado(filas, columnas, pasillos, transiciones, costo_celda, costo_pasillo):
+    return IndiceCostos(filas, columnas, pasillos, transiciones, costo_celda, costo_pasillo)
+
+
+def obtener_indice_costos(filas, columnas, pasillos, transiciones, costo_celda, costo_pasillo):
+    """Retorna el índice de costos para los parámetros dados, reutilizándolo si ya existe."""
+    return _indice_cacheado(
+        int(filas), int(columnas),
+        tuple(sorted(set(pasillos))), tuple(sorted(set(transiciones))),
+        float(costo_celda), float(costo_pasillo),
+    )
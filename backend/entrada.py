@@ -1,4 +1,22 @@
-from .config import FILAS, COLUMNAS, PASILLOS, PAQUETES, INICIO, COSTO_CELDA, COSTO_PASILLO
+import math
+from itertools import chain
+
+from .config import FILAS, COLUMNAS, PASILLOS, PAQUETES
+from .layout import obtener_layout
+from .metricas import span
+from .secuenciador import ESTRATEGIAS, ESTRATEGIA_POR_DEFECTO
+
+try:
+    import numpy as np
+except ImportError:  # la depuración iterativa (bitmap en bytearray) no necesita NumPy
+    np = None
+
+# Con menos paquetes que esto, convertir a arreglos cuesta más que recorrer la lista
+MIN_PAQUETES_VECTORIZADO = 256
+# Cuadrículas más grandes deduplican con un conjunto/np.unique en lugar del bitmap de celdas
+MAX_CELDAS_BITMAP = 1 << 22
+MAX_EJEMPLOS_RECHAZO = 20
+MOTIVOS_RECHAZO = ('mal_formado', 'fuera_de_rango', 'duplicado')
 
 
 class GestorEntrada:
@@ -60,25 +78,279 @@ class GestorEntrada:
         return paquetes
 
     @staticmethod
-    def validar_paquetes(paquetes):
-        """Valida una lista de paquetes recibida por API"""
-        validos = []
-        for fila, col in paquetes:
-            if 0 <= fila < FILAS and 0 <= col < COLUMNAS:
-                validos.append([int(fila), int(col)])
-        return validos
+    def validar_paquetes(paquetes, layout=None):
+        """Valida una lista de paquetes recibida por API (sin rechazos ni duplicados)"""
+        return GestorEntrada.depurar_paquetes(paquetes, layout)['paquetes']
+
+    @staticmethod
+    def depurar_paquetes(paquetes, layout=None, deduplicar=True):
+        """Separa los paquetes [fila, col] aceptados de los rechazados.
+
+        Se rechazan los mal formados (no son un par de enteros), los que caen fuera
+        de la cuadrícula y, con `deduplicar`, las repeticiones de una celda ya vista
+        (se conserva la primera). Los duplicados se detectan con un bitmap de
+        filas × columnas. Con NumPy y listas grandes todo se evalúa por columnas.
+
+        Retorna {'paquetes': [[fila, col], ...] en el orden de entrada,
+                 'indices': posición de cada paquete aceptado en la entrada,
+                 'reporte': {'recibidos', 'aceptados', 'rechazados', 'motivos', 'ejemplos'}}.
+        """
+        layout = obtener_layout(layout)
+        if paquetes is None:
+            paquetes = []
+        elif not isinstance(paquetes, (list, tuple)):
+            # Un valor suelto (número, texto, objeto) cuenta como un único paquete mal formado
+            iterable = hasattr(paquetes, '__iter__') and not isinstance(paquetes, (str, bytes, dict))
+            paquetes = list(paquetes) if iterable else [paquetes]
+        if np is not None and len(paquetes) >= MIN_PAQUETES_VECTORIZADO:
+            arreglo = _arreglo_celdas(paquetes)
+            if arreglo is not None:
+                return _depurar_columnar(paquetes, arreglo, layout, deduplicar)
+        return _depurar_iterativo(paquetes, layout, deduplicar)
+
+    @staticmethod
+    def depurar_ordenes(ordenes, layout=None):
+        """Separa los items [fila, col, cantidad, sku] aceptados de los rechazados, en una pasada.
+
+        Como `depurar_paquetes` sin deduplicar (las repeticiones de una celda se consolidan)
+        y con el motivo extra 'cantidad_invalida' (ver `validar_cantidad`). Las órdenes que
+        no son objetos y los 'items' que no son listas cuentan como un item mal formado.
+
+        Retorna {'items': [(id_orden, fila, col, cantidad, sku), ...] en el orden de entrada,
+                 'inicios': posición en 'items' del primer aceptado de cada orden (los de
+                            la orden k van de inicios[k] a inicios[k + 1] o al final),
+                 'reporte': {'recibidos', 'aceptados', 'rechazados', 'motivos', 'ejemplos'}};
+        cada ejemplo incluye además su 'id_orden'.
+        """
+        layout = obtener_layout(layout)
+        filas, columnas = layout.filas, layout.columnas
+        motivos = dict.fromkeys(MOTIVOS_RECHAZO + ('cantidad_invalida',), 0)
+        ejemplos, items, inicios = [], [], []
+        indice = -1
+
+        def rechazar(motivo, orden_id, valor):
+            motivos[motivo] += 1
+            if len(ejemplos) < MAX_EJEMPLOS_RECHAZO:
+                ejemplos.append({'indice': indice, 'valor': valor, 'motivo': motivo, 'id_orden': orden_id})
+
+        for orden in ordenes:
+            inicios.append(len(items))
+            if not isinstance(orden, dict):
+                indice += 1
+                rechazar('mal_formado', 'DESCONOCIDA', orden)
+                continue
+            orden_id = orden.get('id_orden', 'DESCONOCIDA')
+            if not isinstance(orden_id, (str, int)):
+                orden_id = str(orden_id)
+            lista = orden.get('items', [])
+            if not isinstance(lista, (list, tuple)):
+                indice += 1
+                rechazar('mal_formado', orden_id, lista)
+                continue
+            for item in lista:
+                indice += 1
+                if not isinstance(item, (list, tuple)) or len(item) < 3:
+                    rechazar('mal_formado', orden_id, item)
+                    continue
+                fila, col = item[0], item[1]
+                if type(fila) is not int or type(col) is not int:
+                    fila, col = _entero(fila), _entero(col)
+                    if fila is None or col is None:
+                        rechazar('mal_formado', orden_id, item)
+                        continue
+                if not (0 <= fila < filas and 0 <= col < columnas):
+                    rechazar('fuera_de_rango', orden_id, item)
+                    continue
+                cantidad = item[2]
+                if type(cantidad) is not int or cantidad <= 0:
+                    cantidad = GestorEntrada.validar_cantidad(cantidad)
+                    if cantidad is None:
+                        rechazar('cantidad_invalida', orden_id, item)
+                        continue
+                sku = item[3] if len(item) > 3 else None
+                if not sku:
+                    sku = f"SKU_{fila}_{col}"
+                elif not isinstance(sku, str):
+                    sku = str(sku)
+                items.append((orden_id, fila, col, cantidad, sku))
+
+        recibidos = indice + 1
+        return {'items': items, 'inicios': inicios, 'reporte': {
+            'recibidos': recibidos,
+            'aceptados': len(items),
+            'rechazados': recibidos - len(items),
+            'motivos': motivos,
+            'ejemplos': ejemplos,
+        }}
 
     @staticmethod
-    def validar_inicio(inicio):
+    def validar_inicio(inicio, layout=None):
+        layout = obtener_layout(layout)
         if not isinstance(inicio, (list, tuple)) or len(inicio) != 2:
             return [0, 0]
         fila, col = inicio
-        if 0 <= fila < FILAS and 0 <= col < COLUMNAS:
+        if layout.contiene(fila, col):
             return [int(fila), int(col)]
         return [0, 0]
 
     @staticmethod
-    def validar_costos(costos):
-        celda = float(costos.get('celda', COSTO_CELDA))
-        pasillo = float(costos.get('pasillo', COSTO_PASILLO))
+    def validar_costos(costos, layout=None):
+        layout = obtener_layout(layout)
+        celda = float(costos.get('celda', layout.costo_celda))
+        pasillo = float(costos.get('pasillo', layout.costo_pasillo))
         return {'celda': celda, 'pasillo': pasillo}
+
+    @staticmethod
+    def validar_cantidad(valor):
+        """Cantidad de un item si es un número finito y positivo (no bool); None si no."""
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            return None
+        if not math.isfinite(valor) or valor <= 0:
+            return None
+        return valor
+
+    @staticmethod
+    def validar_estrategia(estrategia):
+        if isinstance(estrategia, str) and estrategia.strip().lower() in ESTRATEGIAS:
+            return estrategia.strip().lower()
+        return ESTRATEGIA_POR_DEFECTO
+
+    @staticmethod
+    def validar_escenario(data):
+        """Valida un escenario de simulación completo (mismos campos que /simulate).
+
+        'layout' puede ser el id de un layout registrado o un dict con su definición.
+        Retorna un dict con los argumentos de `RobotAlmacen`.
+        """
+        return GestorEntrada.depurar_escenario(data)[0]
+
+    @staticmethod
+    @span('validacion')
+    def depurar_escenario(data):
+        """Como `validar_escenario`, pero retorna (escenario, reporte de paquetes rechazados)."""
+        data = data or {}
+        layout = obtener_layout(data.get('layout'))
+        costos = data.get('costos', {})
+        costos_validos = GestorEntrada.validar_costos(costos, layout) if costos else {'celda': data.get('costo_celda', layout.costo_celda), 'pasillo': data.get('costo_pasillo', layout.costo_pasillo)}
+        depuracion = GestorEntrada.depurar_paquetes(data.get('paquetes', PAQUETES), layout)
+        return {
+            'paquetes': depuracion['paquetes'],
+            'inicio': GestorEntrada.validar_inicio(data.get('inicio', layout.inicio), layout),
+            'costo_celda': costos_validos['celda'],
+            'costo_pasillo': costos_validos['pasillo'],
+            'estrategia': GestorEntrada.validar_estrategia(data.get('strategy')),
+            'layout': layout,
+        }, depuracion['reporte']
+
+
+def _entero(valor):
+    """Valor como int si es entero (o float sin parte decimal); None si no (incluidos los bool)."""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return int(valor)
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return None
+
+
+def _arreglo_celdas(paquetes):
+    """Arreglo (n, 2) de los paquetes si todos son pares numéricos; None si hay que revisarlos uno a uno."""
+    try:
+        arreglo = np.asarray(paquetes)
+    except (ValueError, TypeError):  # listas de distinto largo
+        return None
+    if arreglo.ndim != 2 or arreglo.shape[1] != 2 or arreglo.dtype.kind not in 'iuf':
+        return None
+    # NumPy convierte True/False a 1/0 al mezclarlos con números; esos paquetes se revisan uno a uno
+    if bool in set(map(type, chain.from_iterable(paquetes))):
+        return None
+    return arreglo
+
+
+def _reporte(paquetes, recibidos, motivos, rechazos):
+    """rechazos: [(indice, motivo)] ordenados por índice (solo se usan los primeros como ejemplo)."""
+    rechazados = sum(motivos.values())
+    return {
+        'recibidos': recibidos,
+        'aceptados': recibidos - rechazados,
+        'rechazados': rechazados,
+        'motivos': motivos,
+        'ejemplos': [{'indice': i, 'valor': paquetes[i], 'motivo': motivo}
+                     for i, motivo in rechazos[:MAX_EJEMPLOS_RECHAZO]],
+    }
+
+
+def _depurar_iterativo(paquetes, layout, deduplicar):
+    filas, columnas = layout.filas, layout.columnas
+    vistos = bytearray(filas * columnas) if filas * columnas <= MAX_CELDAS_BITMAP else set()
+    usa_bitmap = isinstance(vistos, bytearray)
+    motivos = dict.fromkeys(MOTIVOS_RECHAZO, 0)
+    rechazos = []
+    validos, indices = [], []
+    for i, paquete in enumerate(paquetes):
+        fila = col = None
+        if isinstance(paquete, (list, tuple)) and len(paquete) == 2:
+            fila, col = paquete
+            if type(fila) is not int or type(col) is not int:
+                fila, col = _entero(fila), _entero(col)
+        if fila is None or col is None:
+            motivo = 'mal_formado'
+        elif not (0 <= fila < filas and 0 <= col < columnas):
+            motivo = 'fuera_de_rango'
+        else:
+            celda = fila * columnas + col
+            if deduplicar and (vistos[celda] if usa_bitmap else celda in vistos):
+                motivo = 'duplicado'
+            else:
+                if deduplicar:
+                    if usa_bitmap:
+                        vistos[celda] = 1
+                    else:
+                        vistos.add(celda)
+                validos.append([fila, col])
+                indices.append(i)
+                continue
+        motivos[motivo] += 1
+        if len(rechazos) < MAX_EJEMPLOS_RECHAZO:
+            rechazos.append((i, motivo))
+    return {'paquetes': validos, 'indices': indices,
+            'reporte': _reporte(paquetes, len(paquetes), motivos, rechazos)}
+
+
+def _depurar_columnar(paquetes, arreglo, layout, deduplicar):
+    n = len(arreglo)
+    filas_layout, columnas_layout = layout.filas, layout.columnas
+    # Código de rechazo por paquete: 0 aceptado, 1.. índice en MOTIVOS_RECHAZO + 1
+    codigo = np.zeros(n, dtype=np.int8)
+    if arreglo.dtype.kind == 'f':
+        enteros = np.isfinite(arreglo).all(axis=1)
+        enteros[enteros] = (arreglo[enteros] == np.floor(arreglo[enteros])).all(axis=1)
+        codigo[~enteros] = 1
+        arreglo = np.where(enteros[:, None], arreglo, -1)
+    arreglo = arreglo.astype(np.int64, copy=False)
+    filas, columnas = arreglo[:, 0], arreglo[:, 1]
+    fuera = (filas < 0) | (filas >= filas_layout) | (columnas < 0) | (columnas >= columnas_layout)
+    codigo[fuera & (codigo == 0)] = 2
+
+    if deduplicar:
+        candidatos = np.flatnonzero(codigo == 0)
+        lineal = filas[candidatos] * columnas_layout + columnas[candidatos]
+        if filas_layout * columnas_layout <= MAX_CELDAS_BITMAP:
+            # Bitmap de celdas con el primer índice que la ocupa
+            primero = np.full(filas_layout * columnas_layout, n, dtype=np.int64)
+            np.minimum.at(primero, lineal, candidatos)
+            repetidos = primero[lineal] != candidatos
+        else:
+            _, primeros = np.unique(lineal, return_index=True)
+            repetidos = np.ones(len(candidatos), dtype=bool)
+            repetidos[primeros] = False
+        codigo[candidatos[repetidos]] = 3
+
+    aceptados = np.flatnonzero(codigo == 0)
+    conteos = np.bincount(codigo, minlength=len(MOTIVOS_RECHAZO) + 1)
+    motivos = {motivo: int(conteos[k + 1]) for k, motivo in enumerate(MOTIVOS_RECHAZO)}
+    ejemplos = np.flatnonzero(codigo)[:MAX_EJEMPLOS_RECHAZO]
+    rechazos = [(int(i), MOTIVOS_RECHAZO[codigo[i] - 1]) for i in ejemplos]
+    return {'paquetes': arreglo[aceptados].tolist(), 'indices': aceptados.tolist(),
+            'reporte': _reporte(paquetes, n, motivos, rechazos)}
@@ -0,0 +1,61 @@
+"""
+Módulo evaluador: puntuación vectorizada (NumPy) de muchas rutas candidatas a la vez.
+
+Sobre rutas ortogonales (las que genera `RobotAlmacen`) aplica las mismas reglas de
+costo que `RobotAlmacen._registrar_paso`, con los pasillos y costos del layout:
+  - Movimiento vertical: cada fila recorrida cuesta `costo_celda`.
+  - Movimiento horizontal: cada columna en la que se entra cuesta `costo_pasillo`
+    si es pasillo y `costo_celda` si no.
+Un tramo diagonal se cobra como su descomposición V-H (vertical + horizontal directo);
+`_registrar_paso` no cobra esos tramos, pero el robot nunca los genera.
+"""
+
+import numpy as np
+
+from .layout import obtener_layout
+
+
+def _costo_acumulado_columnas(columnas, pasillos, costo_celda, costo_pasillo):
+    """acumulado[c] = costo horizontal de ir de la columna 0 a la c (suma prefija)."""
+    entradas = np.zeros(columnas, dtype=np.float64)
+    es_pasillo = np.zeros(columnas, dtype=bool)
+    es_pasillo[[p for p in pasillos if 0 <= p < columnas]] = True
+    entradas[1:] = np.where(es_pasillo[1:], costo_pasillo, costo_celda)
+    return np.cumsum(entradas)
+
+
+def evaluar_rutas(rutas, costo_celda=None, costo_pasillo=None, columnas=None, pasillos=None, layout=None):
+    """Evalúa N rutas de K puntos cada una.
+
+    rutas: array (N, K, 2) de [fila, columna]. Para rutas de distinta longitud basta con
+        repetir el último punto hasta completar K (los tramos nulos no cuestan).
+    layout: id, dict o `WarehouseLayout` (por defecto el del simulador); de él salen las
+        filas, columnas, pasillos y costos que no se pasen explícitamente.
+    Retorna (costos, pasos): arrays de tamaño N con el costo total y los pasos de cada ruta.
+    Lanza ValueError si algún punto cae fuera de la cuadrícula.
+    """
+    layout = obtener_layout(layout)
+    costo_celda = layout.costo_celda if costo_celda is None else costo_celda
+    costo_pasillo = layout.costo_pasillo if costo_pasillo is None else costo_pasillo
+    columnas = layout.columnas if columnas is None else columnas
+    pasillos = layout.pasillos if pasillos is None else pasillos
+
+    rutas = np.asarray(rutas, dtype=np.int64)
+    if rutas.ndim != 3 or rutas.shape[2] != 2:
+        raise ValueError(f"Se esperaba un array (N, K, 2), se recibió {rutas.shape}")
+    filas, cols = rutas[:, :, 0], rutas[:, :, 1]
+    if rutas.size and (filas.min() < 0 or filas.max() >= layout.filas or cols.min() < 0 or cols.max() >= columnas):
+        raise ValueError(f"Hay puntos fuera de la cuadrícula de {layout.filas}x{columnas}")
+    if rutas.shape[1] < 2:
+        n = rutas.shape[0]
+        return np.zeros(n, dtype=np.float64), np.zeros(n, dtype=np.int64)
+
+    acumulado = _costo_acumulado_columnas(columnas, pasillos, float(costo_celda), float(costo_pasillo))
+
+    pasos_v = np.abs(np.diff(filas, axis=1))
+    pasos_h = np.abs(np.diff(cols, axis=1))
+    costo_h = np.abs(np.diff(acumulado[cols], axis=1))
+
+    costos = pasos_v.sum(axis=1) * float(costo_celda) + costo_h.sum(axis=1)
+    pasos = pasos_v.sum(axis=1) + pasos_h.sum(axis=1)
+    return costos, pasos
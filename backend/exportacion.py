@@ -0,0 +1,117 @@
+"""
+Módulo exportacion: generación de reportes en segundo plano.
+
+Las exportaciones grandes no se generan en el hilo de la petición: se encolan en un
+pool de hilos y la API devuelve un `job_id` que el cliente consulta hasta que el
+archivo está listo para descargar. Cada trabajo escribe directamente a un archivo
+temporal con el `Exportador` (xlsx write-only, csv, txt o parquet), por lo que la memoria no crece con el
+tamaño del reporte. Los trabajos terminados expiran tras `ttl_s` segundos y su
+archivo se elimina.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Reportes con más pasos que esto se generan como trabajo en segundo plano
+UMBRAL_PASOS_ASINCRONO = 5000
+TTL_TRABAJOS_S = 3600.0
+
+FORMATOS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'reporte_recoleccion.xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'reporte_recoleccion.csv'),
+    'txt': ('text/plain; charset=utf-8', 'resumen_recoleccion.txt'),
+    'parquet': ('application/vnd.apache.parquet', 'reporte_recoleccion.parquet'),
+}
+
+
+class GestorExportaciones:
+    """Cola de trabajos de exportación con estado consultable por id."""
+
+    def __init__(self, max_workers=2, ttl_s=TTL_TRABAJOS_S, directorio=None):
+        self.ttl_s = float(ttl_s)
+        self.directorio = directorio or tempfile.gettempdir()
+        self._max_workers = max_workers
+        self._pool = None
+        self._trabajos = {}
+        self._lock = threading.Lock()
+
+    def _obtener_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='exportacion')
+        return self._pool
+
+    def enviar(self, escribir, formato='xlsx', filas=None):
+        """Encola `escribir(stream_binario)` y retorna el id del trabajo.
+
+        `escribir` produce el reporte (p. ej. con `Exportador.exportar`) sobre el archivo
+        temporal del trabajo; `filas` es informativo para el estado.
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de exportación desconocido: {formato}")
+        self._limpiar()
+        id_trabajo = uuid.uuid4().hex
+        trabajo = {
+            'job_id': id_trabajo,
+            'estado': 'pendiente',
+            'formato': formato,
+            'filas': filas,
+            'creado': time.time(),
+            'terminado': None,
+            'error': None,
+            'ruta': None,
+        }
+        with self._lock:
+            self._trabajos[id_trabajo] = trabajo
+        self._obtener_pool().submit(self._ejecutar, trabajo, escribir)
+        return id_trabajo
+
+    def _ejecutar(self, trabajo, escribir):
+        trabajo['estado'] = 'en_proceso'
+        fd, ruta = tempfile.mkstemp(prefix='export_', suffix='.' + trabajo['formato'], dir=self.directorio)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                resultado = escribir(f)
+            if isinstance(resultado, int):
+                trabajo['filas'] = resultado
+        except Exception as e:
+            os.remove(ruta)
+            trabajo['error'] = str(e)
+            trabajo['estado'] = 'error'
+        else:
+            trabajo['ruta'] = ruta
+            trabajo['estado'] = 'listo'
+        trabajo['terminado'] = time.time()
+
+    def estado(self, id_trabajo):
+        """Estado público de un trabajo (sin la ruta interna), o None si no existe."""
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None:
+            return None
+        return {k: v for k, v in trabajo.items() if k != 'ruta'}
+
+    def archivo(self, id_trabajo):
+        """(ruta, media_type, nombre) del reporte terminado, o None si no está listo."""
+        trabajo = self._trabajos.get(id_trabajo)
+        if trabajo is None or trabajo['estado'] != 'listo':
+            return None
+        media_type, nombre = FORMATOS[trabajo['formato']]
+        return trabajo['ruta'], media_type, nombre
+
+    def _limpiar(self):
+        """Elimina los trabajos terminados hace más de `ttl_s` y sus archivos."""
+        limite = time.time() - self.ttl_s
+        with self._lock:
+            expirados = [t for t in self._trabajos.values()
+                         if t['terminado'] is not None and t['terminado'] < limite]
+            for trabajo in expirados:
+                del self._trabajos[trabajo['job_id']]
+        for trabajo in expirados:
+            if trabajo['ruta'] and os.path.exists(trabajo['ruta']):
+                os.remove(trabajo['ruta'])
+
+
+exportaciones = GestorExportaciones()
@@ -1,88 +1,290 @@
-from .config import FILAS, COLUMNAS, PASILLOS, PAQUETES, INICIO, COSTO_CELDA, COSTO_PASILLO
+import csv
+import io
+import os
+
+from .layout import obtener_layout
+from .metricas import span
+
+FILAS_POR_BLOQUE_CSV = 500
+FILAS_POR_GRUPO_PARQUET = 10000
+FORMATOS_EXPORTACION = ('csv', 'txt', 'xlsx', 'parquet')
+
+# Columnas de la exportación por lotes (una fila por resultado de simulación)
+COLUMNAS_LOTE = ['indice', 'estrategia', 'total_cost', 'movimientos', 'pasos_totales',
+                 'costo_promedio', 'costo_maximo', 'costo_minimo', 'movimientos_pasillo', 'error']
 
 
 class Exportador:
-    """Exportador (backend) genera CSV y TXT sin forzar pandas"""
+    """Exporta resultados de `ejecutar_recoleccion` (completos o compactos) a CSV, TXT, XLSX o Parquet.
+
+    Trabaja sobre el dict de resultado, no sobre el robot, y escribe en cualquier stream
+    binario; pandas no es necesario (openpyxl y pyarrow son opcionales por formato).
+    """
 
     @staticmethod
-    def exportar_resultados(robot):
-        # Intentar Excel con pandas si disponible
-        try:
-            import pandas as pd
-            df = pd.DataFrame(robot.pasos)
-            df.to_excel('reporte_recoleccion.xlsx', index=False, engine='openpyxl')
-            print("  - reporte_recoleccion.xlsx")
-        except Exception:
-            pass
-        Exportador._exportar_csv(robot)
-        Exportador._exportar_resumen_txt(robot)
-        print("\n✓ Reportes exportados exitosamente")
+    def estadisticas(resultado):
+        """Resumen del resultado calculado en una sola pasada sobre sus pasos.
+
+        Con un resultado compacto (sin 'pasos') solo se conocen los totales.
+        """
+        pasos = resultado.get('pasos')
+        if pasos is None:
+            movimientos = resultado.get('movimientos', 0)
+            total = resultado.get('total_cost', 0)
+            return {
+                'total_cost': total,
+                'movimientos': movimientos,
+                'pasos_totales': resultado.get('pasos_totales', 0),
+                'costo_promedio': round(total / movimientos, 2) if movimientos else 0,
+                'costo_maximo': None,
+                'costo_minimo': None,
+                'movimientos_pasillo': None,
+            }
+
+        n = pasos_totales = en_pasillo = 0
+        suma = 0.0
+        maximo = minimo = None
+        for paso in pasos:
+            costo = paso['Costo']
+            n += 1
+            suma += costo
+            pasos_totales += paso['Pasos']
+            if maximo is None or costo > maximo:
+                maximo = costo
+            if minimo is None or costo < minimo:
+                minimo = costo
+            if paso['Es Pasillo'] == 'Sí':
+                en_pasillo += 1
+        return {
+            'total_cost': resultado.get('total_cost', round(suma, 2)),
+            'movimientos': n,
+            'pasos_totales': pasos_totales,
+            'costo_promedio': round(suma / n, 2) if n else 0,
+            'costo_maximo': maximo,
+            'costo_minimo': minimo,
+            'movimientos_pasillo': en_pasillo,
+        }
+
+    @staticmethod
+    @span('exportacion')
+    def exportar(resultado, destino, formato='csv', contexto=None):
+        """Escribe un resultado en el stream binario `destino`.
+
+        contexto: escenario validado (`GestorEntrada.validar_escenario`) usado por el
+        resumen TXT para describir el almacén; opcional.
+        """
+        if formato not in FORMATOS_EXPORTACION:
+            raise ValueError(f"Formato de exportación desconocido: {formato}")
+        pasos = resultado.get('pasos') or []
+        if formato == 'csv':
+            for bloque in Exportador.iterar_csv(pasos):
+                destino.write(bloque.encode('utf-8'))
+        elif formato == 'txt':
+            destino.write(Exportador.resumen_txt(resultado, contexto).encode('utf-8'))
+        elif formato == 'xlsx':
+            Exportador.escribir_xlsx(pasos, destino)
+        else:
+            Exportador.escribir_parquet(pasos, destino)
+
+    @staticmethod
+    def exportar_resultados(resultado, directorio='.', contexto=None, formatos=('csv', 'txt', 'xlsx')):
+        """Escribe el reporte en `directorio` en cada formato disponible y retorna las rutas."""
+        rutas = []
+        for formato in formatos:
+            nombre = 'resumen_recoleccion.txt' if formato == 'txt' else f'reporte_recoleccion.{formato}'
+            ruta = os.path.join(directorio, nombre)
+            try:
+                with open(ruta, 'wb') as f:
+                    Exportador.exportar(resultado, f, formato, contexto)
+            except ImportError:
+                # Formato con dependencia opcional no instalada (openpyxl / pyarrow)
+                os.remove(ruta)
+                continue
+            rutas.append(ruta)
+        return rutas
+
+    @staticmethod
+    def iterar_csv(pasos, filas_por_bloque=FILAS_POR_BLOQUE_CSV):
+        """Genera el CSV de los pasos por bloques de texto, a medida que se escriben las filas."""
+        if not pasos:
+            return
+        encabezados = list(pasos[0].keys())
+        yield from Exportador._iterar_csv_filas(
+            encabezados, ([paso.get(col) for col in encabezados] for paso in pasos), filas_por_bloque)
+
+    @staticmethod
+    def _iterar_csv_filas(encabezados, filas, filas_por_bloque=FILAS_POR_BLOQUE_CSV):
+        sio = io.StringIO()
+        writer = csv.writer(sio)
+        writer.writerow(encabezados)
+        for i, fila in enumerate(filas, 1):
+            writer.writerow(fila)
+            if i % filas_por_bloque == 0:
+                yield sio.getvalue()
+                sio.seek(0)
+                sio.truncate()
+        if sio.tell():
+            yield sio.getvalue()
+
+    @staticmethod
+    def escribir_xlsx(pasos, destino, hoja='Pasos'):
+        """Escribe los pasos en un .xlsx con openpyxl en modo write-only (memoria constante).
+
+        `destino` es una ruta o un stream binario. Requiere openpyxl (ImportError si falta).
+        """
+        encabezados = list(pasos[0].keys()) if pasos else []
+        Exportador._escribir_xlsx_filas(encabezados, ([paso.get(col) for col in encabezados] for paso in pasos),
+                                        destino, hoja)
 
     @staticmethod
-    def _exportar_csv(robot):
+    def _escribir_xlsx_filas(encabezados, filas, destino, hoja):
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(hoja)
+        if encabezados:
+            ws.append(encabezados)
+        for fila in filas:
+            ws.append(fila)
+        wb.save(destino)
+
+    @staticmethod
+    def _pyarrow():
         try:
-            import pandas as pd
-            df = pd.DataFrame(robot.pasos)
-            df.to_csv('reporte_recoleccion.csv', index=False)
-            print("  - reporte_recoleccion.csv")
-        except Exception:
-            with open('reporte_recoleccion.csv', 'w', encoding='utf-8') as f:
-                if not robot.pasos:
-                    return
-                encabezados = list(robot.pasos[0].keys())
-                f.write(','.join(encabezados) + '\n')
-                for paso in robot.pasos:
-                    valores = [str(paso[col]).replace(',', ';') for col in encabezados]
-                    f.write(','.join(valores) + '\n')
-            print("  - reporte_recoleccion.csv")
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Se requiere pyarrow para exportar a Parquet") from e
+        return pyarrow
+
+    @staticmethod
+    def escribir_parquet(pasos, destino):
+        """Escribe los pasos en Parquet (una columna por campo). Requiere pyarrow."""
+        pa = Exportador._pyarrow()
+        encabezados = list(pasos[0].keys()) if pasos else []
+        tabla = pa.table({col: [paso.get(col) for paso in pasos] for col in encabezados})
+        pa.parquet.write_table(tabla, destino)
+
+    @staticmethod
+    def _fila_lote(resultado, i):
+        if 'error' in resultado:
+            return [resultado.get('indice', i), resultado.get('estrategia'), None, None, None,
+                    None, None, None, None, resultado['error']]
+        stats = Exportador.estadisticas(resultado)
+        return [resultado.get('indice', i), resultado.get('estrategia'), stats['total_cost'],
+                stats['movimientos'], stats['pasos_totales'], stats['costo_promedio'],
+                stats['costo_maximo'], stats['costo_minimo'], stats['movimientos_pasillo'], None]
+
+    @staticmethod
+    @span('exportacion_lote')
+    def exportar_lote(resultados, destino, formato='csv'):
+        """Escribe un iterable de resultados (p. ej. `simular_lote`) como una tabla, una fila por resultado.
+
+        Los resultados se consumen uno a uno (CSV/TXT por bloques, XLSX write-only,
+        Parquet por grupos de filas), así que el lote nunca se mantiene completo en memoria.
+        Retorna el número de filas escritas.
+        """
+        if formato not in FORMATOS_EXPORTACION:
+            raise ValueError(f"Formato de exportación desconocido: {formato}")
+        escritas = 0
+
+        def filas():
+            nonlocal escritas
+            for i, resultado in enumerate(resultados):
+                escritas += 1
+                yield Exportador._fila_lote(resultado, i)
+
+        if formato == 'csv':
+            for bloque in Exportador._iterar_csv_filas(COLUMNAS_LOTE, filas()):
+                destino.write(bloque.encode('utf-8'))
+        elif formato == 'txt':
+            destino.write((' | '.join(COLUMNAS_LOTE) + '\n').encode('utf-8'))
+            for fila in filas():
+                destino.write((' | '.join('' if v is None else str(v) for v in fila) + '\n').encode('utf-8'))
+        elif formato == 'xlsx':
+            Exportador._escribir_xlsx_filas(COLUMNAS_LOTE, filas(), destino, 'Resultados')
+        else:
+            pa = Exportador._pyarrow()
+            esquema = pa.schema([
+                ('indice', pa.int64()), ('estrategia', pa.string()), ('total_cost', pa.float64()),
+                ('movimientos', pa.int64()), ('pasos_totales', pa.int64()), ('costo_promedio', pa.float64()),
+                ('costo_maximo', pa.float64()), ('costo_minimo', pa.float64()),
+                ('movimientos_pasillo', pa.int64()), ('error', pa.string()),
+            ])
+            with pa.parquet.ParquetWriter(destino, esquema) as writer:
+                grupo = []
+                for fila in filas():
+                    grupo.append(fila)
+                    if len(grupo) >= FILAS_POR_GRUPO_PARQUET:
+                        writer.write_table(pa.Table.from_pylist([dict(zip(COLUMNAS_LOTE, f)) for f in grupo], esquema))
+                        grupo = []
+                if grupo:
+                    writer.write_table(pa.Table.from_pylist([dict(zip(COLUMNAS_LOTE, f)) for f in grupo], esquema))
+        return escritas
 
     @staticmethod
-    def _exportar_resumen_txt(robot):
-        with open('resumen_recoleccion.txt', 'w', encoding='utf-8') as f:
-            f.write("=" * 70 + "\n")
-            f.write("RESUMEN DE RECOLECCIÓN DE ALMACÉN\n")
-            f.write("=" * 70 + "\n\n")
-            f.write("CONFIGURACIÓN DEL ALMACÉN:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"  • Dimensiones: {FILAS} filas x {COLUMNAS} columnas\n")
-            f.write(f"  • Pasillos en columnas: {PASILLOS}\n")
-            f.write(f"  • Paquetes a recolectar: {len(robot.paquetes)}\n")
-            f.write(f"  • Posición inicial: ({robot.inicio[0]}, {robot.inicio[1]})\n\n")
-            f.write("RESULTADOS DE LA RECOLECCIÓN:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"  • Costo total: {robot.costo_total:.2f} unidades\n")
-            f.write(f"  • Total de movimientos: {len(robot.pasos)}\n")
-            f.write(f"  • Posición final: ({robot.fila_actual}, {robot.col_actual})\n\n")
-            f.write("COSTOS POR TIPO:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"  • Costo por celda normal: {robot.costo_celda_valor}\n")
-            f.write(f"  • Costo por pasillo: {robot.costo_pasillo_valor}\n\n")
-            if robot.pasos:
-                costos = [paso['Costo'] for paso in robot.pasos]
-                f.write("ESTADÍSTICAS:\n")
-                f.write("-" * 70 + "\n")
-                f.write(f"  • Costo promedio por movimiento: {sum(costos)/len(costos):.2f}\n")
-                f.write(f"  • Costo máximo en movimiento: {max(costos):.2f}\n")
-                f.write(f"  • Costo mínimo en movimiento: {min(costos):.2f}\n\n")
-                movimientos_pasillos = sum(1 for paso in robot.pasos if paso['Es Pasillo'] == 'Sí')
-                f.write("MOVIMIENTOS:\n")
-                f.write("-" * 70 + "\n")
-                f.write(f"  • Movimientos en pasillos: {movimientos_pasillos}\n")
-                f.write(f"  • Movimientos en celdas normales: {len(robot.pasos) - movimientos_pasillos}\n\n")
-            f.write("TABLA DETALLADA DE MOVIMIENTOS:\n")
-            f.write("-" * 70 + "\n")
-            if robot.pasos:
-                encabezados = list(robot.pasos[0].keys())
-                anchos = {col: max(len(col), 12) for col in encabezados}
-                encabezado_line = " | ".join(f"{col:{anchos[col]}}" for col in encabezados)
-                f.write(encabezado_line + "\n")
-                f.write("-" * len(encabezado_line) + "\n")
-                for paso in robot.pasos:
-                    valores = [str(paso[col]) for col in encabezados]
-                    fila = " | ".join(f"{val:{anchos[encabezados[i]]}}" for i, val in enumerate(valores))
-                    f.write(fila + "\n")
-            f.write("\n" + "=" * 70 + "\n")
-        print("  - resumen_recoleccion.txt")
+    def resumen_txt(resultado, contexto=None):
+        """Texto del resumen de recolección (configuración, resultados, estadísticas y tabla de pasos)."""
+        contexto = contexto or {}
+        layout = obtener_layout(contexto.get('layout'))
+        stats = Exportador.estadisticas(resultado)
+        pasos = resultado.get('pasos') or []
+        inicio = contexto.get('inicio', layout.inicio)
+        pos_final = resultado.get('pos_final') or layout.final
+        lineas = [
+            "=" * 70,
+            "RESUMEN DE RECOLECCIÓN DE ALMACÉN",
+            "=" * 70,
+            "",
+            "CONFIGURACIÓN DEL ALMACÉN:",
+            "-" * 70,
+            f"  • Dimensiones: {layout.filas} filas x {layout.columnas} columnas",
+            f"  • Pasillos en columnas: {layout.pasillos}",
+        ]
+        if 'paquetes' in contexto:
+            lineas.append(f"  • Paquetes a recolectar: {len(contexto['paquetes'])}")
+        lineas += [
+            f"  • Posición inicial: ({inicio[0]}, {inicio[1]})",
+            "",
+            "RESULTADOS DE LA RECOLECCIÓN:",
+            "-" * 70,
+            f"  • Costo total: {stats['total_cost']:.2f} unidades",
+            f"  • Total de movimientos: {stats['movimientos']}",
+            f"  • Pasos totales: {stats['pasos_totales']}",
+            f"  • Posición final: ({pos_final[0]}, {pos_final[1]})",
+            "",
+            "COSTOS POR TIPO:",
+            "-" * 70,
+            f"  • Costo por celda normal: {contexto.get('costo_celda', layout.costo_celda)}",
+            f"  • Costo por pasillo: {contexto.get('costo_pasillo', layout.costo_pasillo)}",
+            "",
+        ]
+        if stats['movimientos']:
+            lineas += [
+                "ESTADÍSTICAS:",
+                "-" * 70,
+                f"  • Costo promedio por movimiento: {stats['costo_promedio']:.2f}",
+            ]
+            if stats['costo_maximo'] is not None:
+                lineas += [
+                    f"  • Costo máximo en movimiento: {stats['costo_maximo']:.2f}",
+                    f"  • Costo mínimo en movimiento: {stats['costo_minimo']:.2f}",
+                    "",
+                    "MOVIMIENTOS:",
+                    "-" * 70,
+                    f"  • Movimientos en pasillos: {stats['movimientos_pasillo']}",
+                    f"  • Movimientos en celdas normales: {stats['movimientos'] - stats['movimientos_pasillo']}",
+                ]
+            lineas.append("")
+        if pasos:
+            lineas += ["TABLA DETALLADA DE MOVIMIENTOS:", "-" * 70]
+            encabezados = list(pasos[0].keys())
+            anchos = {col: max(len(col), 12) for col in encabezados}
+            encabezado_line = " | ".join(f"{col:{anchos[col]}}" for col in encabezados)
+            lineas += [encabezado_line, "-" * len(encabezado_line)]
+            for paso in pasos:
+                lineas.append(" | ".join(f"{str(paso[col]):{anchos[col]}}" for col in encabezados))
+        lineas += ["", "=" * 70, ""]
+        return "\n".join(lineas)
 
     @staticmethod
     def export_cycle_plan_bytes(plan):
@@ -0,0 +1,289 @@
+"""
+Módulo flota: simulación de varios robots recolectando sobre la misma cuadrícula.
+
+Los picks se reparten entre N robots (bloques contiguos por columna), cada robot
+planifica su ruta con `RobotAlmacen` y luego todos avanzan en pasos de tiempo
+discretos (una celda por tick). Una tabla de reservas por tick evita que dos robots
+ocupen la misma celda o se crucen de frente: el robot que no puede entrar a su
+siguiente celda espera en la actual. Las celdas de INICIO y FINAL (depósito)
+admiten varios robots a la vez.
+
+Si los robots bloqueados forman un ciclo de espera (p. ej. dos robots de frente en la
+misma columna), se replanifica uno de ellos con una búsqueda en anchura sobre las
+celdas libres (movimiento vertical en cualquier columna, horizontal solo por las filas
+de tránsito): primero un desvío hasta su siguiente punto de la ruta y, si no existe,
+un apartadero fuera del camino de los demás al que va y del que vuelve. Nunca hay dos
+robots en la misma celda; si ningún robot del ciclo tiene desvío, la simulación se
+detiene con un error de bloqueo.
+"""
+
+from collections import deque
+
+from .layout import obtener_layout
+from .robot import RobotAlmacen
+from .secuenciador import ESTRATEGIA_POR_DEFECTO
+
+# Tope de caminos nuevos por robot (evita que dos robots se cedan el paso indefinidamente)
+MAX_REPLANIFICACIONES_ROBOT = 50
+
+
+def asignar_picks(paquetes, num_robots):
+    """Reparte los picks en `num_robots` bloques contiguos (orden por columna y fila)."""
+    ordenados = sorted(((int(f), int(c)) for f, c in paquetes), key=lambda p: (p[1], p[0]))
+    n = len(ordenados)
+    grupos = []
+    for i in range(num_robots):
+        grupos.append([list(p) for p in ordenados[i * n // num_robots:(i + 1) * n // num_robots]])
+    return grupos
+
+
+def expandir_ruta(ruta):
+    """Convierte una ruta de puntos clave en la secuencia de celdas visitadas (paso a paso)."""
+    if not ruta:
+        return []
+    celdas = [tuple(ruta[0])]
+    for hacia in ruta[1:]:
+        f, c = celdas[-1]
+        f2, c2 = hacia
+        # Vertical primero, luego horizontal (los tramos del robot ya son ortogonales)
+        paso = 1 if f2 > f else -1
+        for fila in range(f + paso, f2 + paso, paso) if f != f2 else ():
+            celdas.append((fila, c))
+        paso = 1 if c2 > c else -1
+        for col in range(c + paso, c2 + paso, paso) if c != c2 else ():
+            celdas.append((f2, col))
+    return celdas
+
+
+class SimuladorFlota:
+    """Simula una flota de robots con reservas por tick sobre un layout compartido."""
+
+    def __init__(self, num_robots=2, layout=None, costo_celda=None, costo_pasillo=None,
+                 estrategia=ESTRATEGIA_POR_DEFECTO):
+        self.num_robots = max(1, int(num_robots))
+        self.layout = obtener_layout(layout)
+        self.costo_celda = float(costo_celda if costo_celda is not None else self.layout.costo_celda)
+        self.costo_pasillo = float(costo_pasillo if costo_pasillo is not None else self.layout.costo_pasillo)
+        self.estrategia = estrategia
+
+    def _costo_paso(self, desde, hacia):
+        if desde[1] == hacia[1]:
+            return self.costo_celda if desde[0] != hacia[0] else 0.0
+        return self.costo_pasillo if self.layout.es_pasillo(hacia[1]) else self.costo_celda
+
+    def simular(self, paquetes, max_ticks=None):
+        layout = self.layout
+        deposito = {tuple(layout.inicio), tuple(layout.final)}
+
+        caminos = []
+        # claves[r][i]: la celda i del camino es un punto de la ruta (pick, giro o depósito)
+        claves = []
+        grupos = asignar_picks(paquetes, self.num_robots)
+        for grupo in grupos:
+            robot = RobotAlmacen(paquetes=grupo, costo_celda=self.costo_celda, costo_pasillo=self.costo_pasillo,
+                                 estrategia=self.estrategia, layout=layout)
+            resultado = robot.ejecutar_recoleccion(detalle=False)
+            camino = expandir_ruta(resultado['ruta'])
+            puntos = {tuple(p) for p in resultado['ruta']}
+            caminos.append(camino)
+            claves.append([celda in puntos for celda in camino])
+
+        n = len(caminos)
+        indices = [0] * n
+        costos = [0.0] * n
+        esperas = [0] * n
+        fin = [0] * n
+        replanes = [0] * n
+        ocupacion = [[0] * layout.columnas for _ in range(layout.filas)]
+        congestion = [[0] * layout.columnas for _ in range(layout.filas)]
+        error = None
+
+        # Celda → robot que la ocupa en el tick actual (fuera del depósito)
+        ocupadas = {}
+        for r, camino in enumerate(caminos):
+            if camino and camino[0] not in deposito:
+                ocupadas[camino[0]] = r
+
+        pendientes = [r for r in range(n) if len(caminos[r]) > 1]
+        limite_ticks = max_ticks
+        if limite_ticks is None:
+            limite_ticks = sum(len(c) for c in caminos) * 2 + 1
+        tick = 0
+        while pendientes and tick < limite_ticks:
+            tick += 1
+            movidos = set()
+            bloqueados = list(pendientes)
+            # Se reintenta hasta que nadie más pueda avanzar: un robot puede entrar a una
+            # celda que otro liberó en este mismo tick (pero nunca cruzarse de frente).
+            avance = True
+            while avance and bloqueados:
+                avance = False
+                restantes = []
+                for r in bloqueados:
+                    actual = caminos[r][indices[r]]
+                    siguiente = caminos[r][indices[r] + 1]
+                    ocupante = ocupadas.get(siguiente)
+                    if siguiente in deposito or ocupante is None or ocupante == r:
+                        self._mover(r, actual, siguiente, ocupadas, deposito, indices, costos)
+                        movidos.add(r)
+                        avance = True
+                    else:
+                        restantes.append(r)
+                bloqueados = restantes
+
+            ciclo = self._ciclo_espera(bloqueados, caminos, indices, ocupadas)
+            if ciclo:
+                # Los del ciclo esperan este tick; uno de ellos sale con un camino nuevo
+                r, extra = self._replanificar(ciclo, pendientes, caminos, claves, indices, ocupadas, deposito, replanes)
+                if r is None:
+                    error = {
+                        'error': 'Bloqueo entre robots sin desvío posible',
+                        'detail': f"tick {tick}: robots {', '.join(str(o + 1) for o in ciclo)} "
+                                  f"en {', '.join(str(list(caminos[o][indices[o]])) for o in ciclo)}",
+                    }
+                if max_ticks is None:
+                    limite_ticks += 2 * extra
+
+            for r in bloqueados:
+                esperas[r] += 1
+                f, c = caminos[r][indices[r]]
+                congestion[f][c] += 1
+
+            siguientes = []
+            for r in pendientes:
+                f, c = caminos[r][indices[r]]
+                ocupacion[f][c] += 1
+                if indices[r] + 1 < len(caminos[r]):
+                    siguientes.append(r)
+                else:
+                    fin[r] = tick
+            pendientes = siguientes
+            if error:
+                break
+
+        robots = []
+        for r in range(n):
+            robots.append({
+                'robot': r + 1,
+                'picks': len(grupos[r]),
+                'costo': round(costos[r], 2),
+                'pasos': max(0, len(caminos[r]) - 1),
+                'tiempo_espera': esperas[r],
+                'tiempo_fin': fin[r],
+                'replanificaciones': replanes[r],
+            })
+
+        resultado = {
+            'makespan': max(fin) if fin else 0,
+            'costo_total': round(sum(costos), 2),
+            'tiempo_espera_total': sum(esperas),
+            'replanificaciones': sum(replanes),
+            'completado': not pendientes,
+            'robots': robots,
+            'congestion': congestion,
+            'ocupacion': ocupacion,
+        }
+        if error is None and pendientes:
+            error = {'error': 'Simulación incompleta', 'detail': f'se alcanzó el límite de {limite_ticks} ticks'}
+        if error:
+            resultado.update(error)
+        return resultado
+
+    @staticmethod
+    def _ciclo_espera(bloqueados, caminos, indices, ocupadas):
+        """Robots que se esperan en círculo (cada uno quiere la celda del siguiente), o []."""
+        espera = {}
+        for r in bloqueados:
+            espera[r] = ocupadas.get(caminos[r][indices[r] + 1])
+        for inicio in bloqueados:
+            visto = []
+            r = inicio
+            while r in espera and r not in visto:
+                visto.append(r)
+                r = espera[r]
+            if r in visto:
+                return visto[visto.index(r):]
+        return []
+
+    def _replanificar(self, ciclo, pendientes, caminos, claves, indices, ocupadas, deposito, replanes):
+        """Da un camino nuevo a un robot del ciclo; retorna (robot, celdas agregadas) o (None, 0).
+
+        Se prueba primero, del de menor prioridad al de mayor, un desvío hasta el
+        siguiente punto de su ruta que evite las celdas ocupadas; si ninguno lo tiene,
+        el robot se aparta a la celda libre más cercana fuera del tramo inmediato de
+        los demás robots y regresa a la celda donde estaba (no se salta ningún pick).
+        """
+        candidatos = sorted((r for r in ciclo if replanes[r] < MAX_REPLANIFICACIONES_ROBOT), reverse=True)
+        for r in candidatos:
+            i = indices[r]
+            ocupadas_otros = {celda for celda, ocupante in ocupadas.items() if ocupante != r}
+            j = next(k for k in range(i + 1, len(caminos[r])) if claves[r][k] or k == len(caminos[r]) - 1)
+            objetivo = caminos[r][j]
+            if objetivo in ocupadas_otros:
+                continue
+            desvio = self._buscar_camino(caminos[r][i], lambda celda: celda == objetivo, ocupadas_otros)
+            if desvio is not None:
+                extra = len(desvio) - (j - i)
+                caminos[r][i + 1:j + 1] = desvio
+                claves[r][i + 1:j + 1] = [False] * (len(desvio) - 1) + [True]
+                replanes[r] += 1
+                return r, max(0, extra)
+
+        for r in candidatos:
+            i = indices[r]
+            ocupadas_otros = {celda for celda, ocupante in ocupadas.items() if ocupante != r}
+            tramos_otros = set()
+            for o in pendientes:
+                if o != r:
+                    k = indices[o] + 1
+                    while k < len(caminos[o]) - 1 and not claves[o][k]:
+                        k += 1
+                    tramos_otros.update(caminos[o][indices[o]:k + 1])
+            actual = caminos[r][i]
+            ida = self._buscar_camino(actual, lambda celda: celda not in tramos_otros, ocupadas_otros)
+            if ida is not None:
+                vuelta = ida[-2::-1] + [actual]
+                caminos[r][i + 1:i + 1] = ida + vuelta
+                claves[r][i + 1:i + 1] = [False] * (len(ida) + len(vuelta))
+                replanes[r] += 1
+                return r, len(ida) + len(vuelta)
+        return None, 0
+
+    def _buscar_camino(self, origen, es_destino, prohibidas):
+        """Búsqueda en anchura desde `origen` (excluido) hasta la primera celda que cumple `es_destino`."""
+        padres = {origen: None}
+        cola = deque([origen])
+        while cola:
+            celda = cola.popleft()
+            for vecina in self._vecinas(celda):
+                if vecina in padres or vecina in prohibidas:
+                    continue
+                padres[vecina] = celda
+                if es_destino(vecina):
+                    camino = [vecina]
+                    while padres[camino[-1]] != origen:
+                        camino.append(padres[camino[-1]])
+                    return camino[::-1]
+                cola.append(vecina)
+        return None
+
+    def _vecinas(self, celda):
+        """Celdas alcanzables en un tick: vertical en cualquier columna, horizontal en filas de tránsito."""
+        f, c = celda
+        if f > 0:
+            yield (f - 1, c)
+        if f < self.layout.filas - 1:
+            yield (f + 1, c)
+        if f == 0 or f == self.layout.filas - 1:
+            if c > 0:
+                yield (f, c - 1)
+            if c < self.layout.columnas - 1:
+                yield (f, c + 1)
+
+    def _mover(self, r, actual, siguiente, ocupadas, deposito, indices, costos):
+        if ocupadas.get(actual) == r:
+            del ocupadas[actual]
+        if siguiente not in deposito:
+            ocupadas[siguiente] = r
+        costos[r] += self._costo_paso(actual, siguiente)
+        indices[r] += 1
@@ -0,0 +1,185 @@
+"""
+Módulo layout: configuración de almacenes (sitios) como objetos en lugar de constantes.
+
+Un `WarehouseLayout` describe la cuadrícula (filas, columnas, pasillos, columnas de
+transición), las zonas/almacenes y los puntos de inicio/entrega. Al construirse
+precalcula sus tablas de búsqueda (máscara de pasillos, columna→almacén) para que
+todas las consultas sean O(1) incluso en cuadrículas de 100×500 o más.
+
+Los layouts se registran por `id`; el layout por defecto se construye desde `config`.
+"""
+
+import json
+import operator
+
+from .config import (FILAS, COLUMNAS, PASILLOS, ALMACENES, INICIO, FINAL,
+                     COSTO_CELDA, COSTO_PASILLO)
+from .costos import obtener_indice_costos
+
+LAYOUT_POR_DEFECTO = 'default'
+TRANSICIONES_POR_DEFECTO = (0, 8)
+# Layouts que se pueden registrar en el proceso (incluido el por defecto)
+MAX_LAYOUTS_REGISTRADOS = 64
+
+
+class LayoutInvalido(ValueError):
+    """Layout desconocido, mal definido o que no se puede registrar."""
+
+
+def _columna(col):
+    """La columna como int si es un entero (incluidos los de NumPy); None si no."""
+    if type(col) is int:
+        return col
+    try:
+        return operator.index(col)
+    except TypeError:
+        return None
+
+
+class WarehouseLayout:
+    """Configuración inmutable de un almacén con sus tablas de búsqueda precalculadas."""
+
+    def __init__(self, id=LAYOUT_POR_DEFECTO, filas=FILAS, columnas=COLUMNAS, pasillos=PASILLOS,
+                 transiciones=TRANSICIONES_POR_DEFECTO, almacenes=ALMACENES, inicio=INICIO,
+                 final=FINAL, costo_celda=COSTO_CELDA, costo_pasillo=COSTO_PASILLO):
+        self.id = str(id)
+        self.filas = int(filas)
+        self.columnas = int(columnas)
+        if self.filas < 1 or self.columnas < 1:
+            raise ValueError(f"Dimensiones inválidas para el layout '{self.id}': {self.filas}x{self.columnas}")
+        self.pasillos = sorted(int(p) for p in pasillos if 0 <= int(p) < self.columnas)
+        self.transiciones = tuple(sorted(int(t) for t in transiciones if 0 <= int(t) < self.columnas))
+        self.almacenes = [dict(a) for a in almacenes]
+        self.inicio = self._validar_punto(inicio, 'inicio')
+        self.final = self._validar_punto(final, 'final')
+        self.costo_celda = float(costo_celda)
+        self.costo_pasillo = float(costo_pasillo)
+
+        # Máscara de bits de pasillos: bit c encendido si la columna c es pasillo
+        self.mascara_pasillos = 0
+        for p in self.pasillos:
+            self.mascara_pasillos |= 1 << p
+
+        # Columna → índice de almacén (-1 si la columna no pertenece a ninguno)
+        self.almacen_por_columna = [-1] * self.columnas
+        for i, almacen in enumerate(self.almacenes):
+            for col in almacen.get('columnas', []):
+                if 0 <= col < self.columnas and self.almacen_por_columna[col] == -1:
+                    self.almacen_por_columna[col] = i
+
+    def _validar_punto(self, punto, nombre):
+        fila, col = int(punto[0]), int(punto[1])
+        if not (0 <= fila < self.filas and 0 <= col < self.columnas):
+            raise ValueError(f"Punto '{nombre}' fuera del layout '{self.id}': ({fila},{col})")
+        return [fila, col]
+
+    def es_pasillo(self, col):
+        return bool((self.mascara_pasillos >> col) & 1)
+
+    def almacen_de_columna(self, col):
+        """Retorna el almacén (dict) de una columna, o None."""
+        col = _columna(col)
+        if col is not None and 0 <= col < self.columnas:
+            i = self.almacen_por_columna[col]
+            if i >= 0:
+                return self.almacenes[i]
+        return None
+
+    def zone_indexes_for_columns(self, cols):
+        """Índice de almacén (-1 si no hay) de cada columna de `cols`, en una sola pasada.
+
+        Acepta cualquier entero (también los de NumPy); lo demás no tiene almacén.
+        """
+        indice, n = self.almacen_por_columna, self.columnas
+        return [indice[col] if col is not None and 0 <= col < n else -1 for col in map(_columna, cols)]
+
+    def zones_for_columns(self, cols):
+        """Retorna el almacén (o None) de cada columna de `cols`, en una sola pasada."""
+        almacenes = self.almacenes
+        return [almacenes[i] if i >= 0 else None for i in self.zone_indexes_for_columns(cols)]
+
+    def contiene(self, fila, col):
+        return 0 <= fila < self.filas and 0 <= col < self.columnas
+
+    def indice_costos(self, costo_celda=None, costo_pasillo=None):
+        """Índice de costos O(1) de este layout (cacheado por geometría y costos)."""
+        return obtener_indice_costos(
+            self.filas, self.columnas, self.pasillos, self.transiciones,
+            self.costo_celda if costo_celda is None else costo_celda,
+            self.costo_pasillo if costo_pasillo is None else costo_pasillo,
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filas': self.filas,
+            'columnas': self.columnas,
+            'pasillos': list(self.pasillos),
+            'transiciones': list(self.transiciones),
+            'almacenes': self.almacenes,
+            'inicio': self.inicio,
+            'final': self.final,
+            'costo_celda': self.costo_celda,
+            'costo_pasillo': self.costo_pasillo,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        campos = ('id', 'filas', 'columnas', 'pasillos', 'transiciones', 'almacenes',
+                  'inicio', 'final', 'costo_celda', 'costo_pasillo')
+        return cls(**{k: data[k] for k in campos if k in data})
+
+    @classmethod
+    def from_file(cls, ruta):
+        """Carga un layout desde un archivo JSON o YAML (según la extensión)."""
+        ruta = str(ruta)
+        with open(ruta, 'r', encoding='utf-8') as f:
+            if ruta.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise ImportError("Se requiere PyYAML para cargar layouts .yaml") from e
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        return cls.from_dict(data)
+
+
+_layouts = {LAYOUT_POR_DEFECTO: WarehouseLayout()}
+
+
+def registrar_layout(layout):
+    """Registra un layout nuevo por su id y lo retorna.
+
+    Los ids ya registrados (incluido 'default') no se reemplazan y el registro admite
+    como máximo `MAX_LAYOUTS_REGISTRADOS` layouts.
+    """
+    if isinstance(layout, dict):
+        layout = obtener_layout(layout)
+    if layout.id in _layouts:
+        raise LayoutInvalido(f"El layout '{layout.id}' ya está registrado")
+    if len(_layouts) >= MAX_LAYOUTS_REGISTRADOS:
+        raise LayoutInvalido(f"Se alcanzó el máximo de {MAX_LAYOUTS_REGISTRADOS} layouts registrados")
+    _layouts[layout.id] = layout
+    return layout
+
+
+def obtener_layout(layout=None):
+    """Resuelve un layout a partir de None (por defecto), un id registrado, un dict o un objeto."""
+    if layout is None:
+        return _layouts[LAYOUT_POR_DEFECTO]
+    if isinstance(layout, WarehouseLayout):
+        return layout
+    if isinstance(layout, dict):
+        try:
+            return WarehouseLayout.from_dict(layout)
+        except (TypeError, ValueError, KeyError) as e:
+            raise LayoutInvalido(str(e)) from e
+    try:
+        return _layouts[str(layout)]
+    except KeyError:
+        raise LayoutInvalido(f"Layout desconocido: {layout}") from None
+
+
+def listar_layouts():
+    return sorted(_layouts.keys())
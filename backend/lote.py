@@ -0,0 +1,131 @@
+"""
+Módulo lote: evaluación de muchos escenarios de simulación en paralelo.
+
+Los escenarios se validan en el proceso principal; los que ya están en la caché de
+rutas (compartida con `/simulate` y `/export`) se resuelven sin simular y los demás se
+agrupan en bloques que se evalúan en procesos del pool, de modo que el costo de
+serialización se reparte entre varios escenarios y se aprovechan todos los núcleos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .almacenamiento import obtener_almacen
+from .cache import TIPO_SIMULACION, cache_rutas, clave_escenario, escenario_canonico, simular_con_cache
+from .entrada import GestorEntrada
+from .robot import RobotAlmacen
+
+# Por debajo de este número de escenarios no compensa repartir entre procesos
+MIN_ESCENARIOS_POOL = 32
+TAMANO_BLOQUE = 64
+
+_pool = None
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pool
+
+
+def _resumir(resultado, estrategia):
+    """Costo y conteos de pasos; 'estrategia' es la que se ejecutó (la pedida si el resultado no la informa)."""
+    return {
+        'total_cost': resultado['total_cost'],
+        'movimientos': resultado['movimientos'],
+        'pasos_totales': resultado['pasos_totales'],
+        'estrategia': resultado.get('estrategia', estrategia),
+    }
+
+
+def simular_escenario(data, resumen=False):
+    """Valida y simula un escenario; con `resumen` solo devuelve costo y conteos de pasos."""
+    escenario = GestorEntrada.validar_escenario(data)
+    resultado = simular_con_cache(escenario, detalle=not resumen)
+    return _resumir(resultado, escenario['estrategia']) if resumen else resultado
+
+
+def _simular_bloque(trabajos, detalle):
+    """Simula [(indice, escenario validado), ...] y retorna [(indice, resultado, error), ...]."""
+    salida = []
+    for i, escenario in trabajos:
+        try:
+            salida.append((i, RobotAlmacen(**escenario).ejecutar_recoleccion(detalle=detalle), None))
+        except Exception as e:
+            salida.append((i, None, str(e)))
+    return salida
+
+
+def _formatear(i, resultado, estrategia, resumen):
+    salida = _resumir(resultado, estrategia) if resumen else dict(resultado)
+    salida['indice'] = i
+    return salida
+
+
+def simular_lote(escenarios, resumen=False, tamano_bloque=TAMANO_BLOQUE):
+    """Genera los resultados de cada escenario (con su 'indice') a medida que terminan.
+
+    Los escenarios se validan en este proceso: los que ya están en la caché de rutas o en
+    el almacén SQLite se emiten de inmediato y solo los demás se simulan (sus resultados
+    se guardan en la caché y, por bloque, en el almacén).
+    """
+    detalle = not resumen
+    almacen = obtener_almacen()
+    preparados = {}
+    repetidos = {}  # índice simulado -> índices con el mismo escenario en este lote
+    por_clave = {}
+    pendientes = []
+    for i, data in enumerate(escenarios):
+        try:
+            escenario = GestorEntrada.validar_escenario(data)
+        except Exception as e:
+            yield {'indice': i, 'error': str(e)}
+            continue
+        clave = clave_escenario(escenario, detalle)
+        resultado = cache_rutas.obtener(clave)
+        if resultado is not None:
+            yield _formatear(i, resultado, escenario['estrategia'], resumen)
+            continue
+        if clave in por_clave:
+            repetidos[por_clave[clave]].append(i)
+            continue
+        corrida = almacen.buscar_por_clave(TIPO_SIMULACION, clave) if almacen else None
+        if corrida is not None:
+            resultado = dict(corrida['resultado'], id_corrida=corrida['id'])
+            cache_rutas.guardar(clave, resultado)
+            yield _formatear(i, resultado, escenario['estrategia'], resumen)
+            continue
+        por_clave[clave] = i
+        repetidos[i] = []
+        preparados[i] = (clave, escenario)
+        pendientes.append((i, escenario))
+
+    def recoger(bloque):
+        corridas = []
+        for i, resultado, error in bloque:
+            if error is not None:
+                for j in [i] + repetidos[i]:
+                    yield {'indice': j, 'error': error}
+                continue
+            clave, escenario = preparados[i]
+            cache_rutas.guardar(clave, resultado)
+            corridas.append((TIPO_SIMULACION, clave, escenario_canonico(escenario, detalle), resultado))
+            for j in [i] + repetidos[i]:
+                yield _formatear(j, resultado, escenario['estrategia'], resumen)
+        if almacen and corridas:
+            almacen.guardar_corridas(corridas)
+
+    if len(pendientes) < MIN_ESCENARIOS_POOL:
+        for trabajo in pendientes:
+            yield from recoger(_simular_bloque([trabajo], detalle))
+        return
+
+    pool = _obtener_pool()
+    futuros = [
+        pool.submit(_simular_bloque, pendientes[i:i + tamano_bloque], detalle)
+        for i in range(0, len(pendientes), tamano_bloque)
+    ]
+    for futuro in as_completed(futuros):
+        yield from recoger(futuro.result())
+
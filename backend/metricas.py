@@ -0,0 +1,282 @@
+"""
+Módulo metricas: instrumentación de la API (latencias, spans internos y perfilado).
+
+- `RegistroMetricas` guarda histogramas acumulativos con los buckets de Prometheus:
+  latencia por endpoint (método, plantilla de ruta y código de estado) y duración de
+  los spans internos (validación, ruteo, consolidación, exportación). `texto_prometheus`
+  los expone en el formato de texto 0.0.4 que consume `/metrics`.
+- `span(nombre)` mide un bloque; sirve como `with span('ruteo'):` o como decorador.
+  Es seguro entre hilos (los trabajos de exportación corren en un pool).
+- `MiddlewareInstrumentacion` (ASGI puro, sin el costo de `BaseHTTPMiddleware`) mide
+  cada petición, agrega la cabecera `Server-Timing` y atiende `?profile=1` si el
+  perfilado está habilitado (variable de entorno SIMULADOR_PERFILADO=1).
+- `perfilable(endpoint)` envuelve un endpoint para que, si la petición activó el
+  perfilado (`?profile=1`, ver `iniciar_perfil`), corra bajo cProfile en el hilo donde
+  realmente se ejecuta (los endpoints síncronos corren en el threadpool de Starlette).
+"""
+
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+
+BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_FUNCIONES_PERFIL = 30
+
+
+class Histograma:
+    """Histograma por conjunto de etiquetas (conteos por bucket, suma y total)."""
+
+    def __init__(self, nombre, ayuda, etiquetas, buckets=BUCKETS_S):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}  # valores de etiquetas -> [conteos por bucket (+Inf al final), suma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_etiquetas):
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                serie = self._series[valores_etiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valor
+
+    def lineas(self):
+        """Líneas del formato de texto de Prometheus (buckets acumulados)."""
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with self._lock:
+            series = [(clave, list(conteos), suma) for clave, (conteos, suma) in sorted(self._series.items())]
+        for clave, conteos, suma in series:
+            etiquetas = ','.join(f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, clave))
+            separador = ',' if etiquetas else ''
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                le = '+Inf' if limite == float('inf') else repr(limite)
+                lineas.append(f'{self.nombre}_bucket{{{etiquetas}{separador}le="{le}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{{{etiquetas}}} {suma!r}')
+            lineas.append(f'{self.nombre}_count{{{etiquetas}}} {acumulado}')
+        return lineas
+
+    def limpiar(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RegistroMetricas:
+    """Histogramas de peticiones HTTP y de spans internos del proceso."""
+
+    def __init__(self):
+        self.peticiones = Histograma('simulador_http_duracion_segundos',
+                                     'Latencia de las peticiones HTTP por endpoint',
+                                     ('metodo', 'ruta', 'estado'))
+        self.spans = Histograma('simulador_span_duracion_segundos',
+                                'Duración de las etapas internas (validación, ruteo, consolidación, exportación)',
+                                ('span',))
+
+    def observar_peticion(self, metodo, ruta, estado, segundos):
+        self.peticiones.observar(segundos, metodo, ruta, str(estado))
+
+    def observar_span(self, nombre, segundos):
+        self.spans.observar(segundos, nombre)
+
+    def texto_prometheus(self, extras=None):
+        """Exposición en formato de texto de Prometheus.
+
+        extras: métricas adicionales {nombre: (tipo, ayuda, valor)} (p. ej. las de la caché).
+        """
+        lineas = self.peticiones.lineas() + self.spans.lineas()
+        for nombre, (tipo, ayuda, valor) in (extras or {}).items():
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}', f'{nombre} {valor}']
+        return '\n'.join(lineas) + '\n'
+
+    def limpiar(self):
+        self.peticiones.limpiar()
+        self.spans.limpiar()
+
+
+metricas = RegistroMetricas()
+
+
+@contextmanager
+def span(nombre, registro=None):
+    """Mide la duración del bloque (o de la función decorada) como el span `nombre`."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        (registro or metricas).observar_span(nombre, time.perf_counter() - inicio)
+
+
+class MiddlewareInstrumentacion:
+    """Middleware ASGI: latencia por endpoint, cabecera Server-Timing y ?profile=1.
+
+    La latencia se mide hasta que la aplicación envía el inicio de la respuesta (en las
+    respuestas transmitidas no incluye el envío del cuerpo) y se etiqueta con la
+    plantilla de la ruta que resolvió el router. Si el endpoint lanza una excepción
+    antes de responder, la petición se registra con estado 500 y la excepción sigue.
+    Con el perfilado habilitado (`perfilado` o SIMULADOR_PERFILADO=1), ?profile=1 (o
+    true) descarta la respuesta del endpoint y envía el resumen de cProfile en JSON;
+    si no, el parámetro se ignora.
+    """
+
+    def __init__(self, app, registro=None, perfilado=None):
+        self.app = app
+        self.registro = registro
+        if perfilado is None:
+            perfilado = os.environ.get('SIMULADOR_PERFILADO', '').lower() in ('1', 'true')
+        self.perfilado = perfilado
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        perfilar = False
+        if self.perfilado:
+            consulta = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+            perfilar = consulta.get('profile', [''])[-1] in ('1', 'true')
+        registro = self.registro or metricas
+        inicio = time.perf_counter()
+        estado = [500]
+        observada = [False]
+
+        def observar():
+            observada[0] = True
+            duracion = time.perf_counter() - inicio
+            ruta = scope.get('route')
+            ruta = getattr(ruta, 'path', None) or 'sin_ruta'
+            registro.observar_peticion(scope['method'], ruta, estado[0], duracion)
+            return ruta, duracion
+
+        if not perfilar:
+            async def enviar(mensaje):
+                if mensaje['type'] == 'http.response.start':
+                    estado[0] = mensaje['status']
+                    _, duracion = observar()
+                    cabeceras = list(mensaje.get('headers', ()))
+                    cabeceras.append((b'server-timing', f'app;dur={duracion * 1000.0:.3f}'.encode('latin-1')))
+                    mensaje = dict(mensaje, headers=cabeceras)
+                await send(mensaje)
+            try:
+                await self.app(scope, receive, enviar)
+            except Exception:
+                if not observada[0]:
+                    estado[0] = 500
+                    observar()
+                raise
+            return
+
+        async def descartar(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                estado[0] = mensaje['status']
+
+        token = iniciar_perfil()
+        try:
+            await self.app(scope, receive, descartar)
+        finally:
+            perfil = terminar_perfil(token)
+            ruta, duracion = observar()
+        cuerpo = json.dumps({
+            'ruta': ruta,
+            'estado': estado[0],
+            'duracion_ms': round(duracion * 1000.0, 3),
+            'perfil': perfil,
+        }).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(cuerpo)).encode('latin-1'))]})
+        await send({'type': 'http.response.body', 'body': cuerpo})
+
+
+# ----------------------------------------------------------------------
+# Perfilado por petición (?profile=1)
+# ----------------------------------------------------------------------
+# Lista de perfiles de la petición en curso; None si la petición no pidió perfilado
+_perfiles = ContextVar('perfiles', default=None)
+
+
+def iniciar_perfil():
+    """Activa el perfilado para la petición actual; retorna el token para `terminar_perfil`."""
+    return _perfiles.set([])
+
+
+def terminar_perfil(token):
+    """Desactiva el perfilado y retorna el resumen de los perfiles recogidos (o None)."""
+    perfiles = _perfiles.get()
+    _perfiles.reset(token)
+    return resumen_perfil(perfiles) if perfiles else None
+
+
+def perfilable(endpoint):
+    """Envuelve un endpoint (síncrono o async) para perfilarlo si la petición lo pidió."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def envoltura_async(*args, **kwargs):
+            perfiles = _perfiles.get()
+            if perfiles is None:
+                return await endpoint(*args, **kwargs)
+            perfil = cProfile.Profile()
+            perfil.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                perfil.disable()
+                perfiles.append(perfil)
+        return envoltura_async
+
+    @functools.wraps(endpoint)
+    def envoltura(*args, **kwargs):
+        perfiles = _perfiles.get()
+        if perfiles is None:
+            return endpoint(*args, **kwargs)
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            perfil.disable()
+            perfiles.append(perfil)
+    return envoltura
+
+
+def resumen_perfil(perfiles, limite=MAX_FUNCIONES_PERFIL):
+    """Funciones con más tiempo acumulado: [{'funcion', 'llamadas', 'propio_ms', 'acumulado_ms'}, ...]."""
+    estadisticas = pstats.Stats(perfiles[0])
+    for perfil in perfiles[1:]:
+        estadisticas.add(perfil)
+    filas = sorted(estadisticas.stats.items(), key=lambda item: -item[1][3])[:limite]
+    funciones = []
+    for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _) in filas:
+        funciones.append({
+            'funcion': f'{_ruta_corta(archivo)}:{linea}({nombre})',
+            'llamadas': llamadas,
+            'propio_ms': round(propio * 1000.0, 3),
+            'acumulado_ms': round(acumulado * 1000.0, 3),
+        })
+    return {
+        'llamadas_totales': estadisticas.total_calls,
+        'tiempo_total_ms': round(estadisticas.total_tt * 1000.0, 3),
+        'funciones': funciones,
+    }
+
+
+def _ruta_corta(archivo):
+    """`backend/robot.py` en lugar de la ruta absoluta (o el nombre del archivo de terceros)."""
+    partes = archivo.replace('\\', '/').split('/')
+    if 'backend' in partes:
+        return '/'.join(partes[partes.index('backend'):])
+    return os.path.basename(archivo) or archivo
@@ -0,0 +1,143 @@
+"""
+Módulo olas: divide un conjunto de órdenes en olas (tours de picking) con límites
+de capacidad del robot y de costo máximo por tour.
+
+Cada orden se asigna completa a una sola ola. Las órdenes se ordenan por su posición
+en el almacén (columna mínima, máxima y fila media) y se llenan olas consecutivas;
+el costo de cada ola candidata se estima recorriendo con `RobotAlmacen`, y la misma
+estrategia de ruteo, solo la fila mínima y máxima de cada columna: el recorrido cuesta
+lo mismo que con todas las ubicaciones y la estimación es O(columnas). Al final cada
+ola se recorre con `RobotAlmacen`.
+"""
+
+from .entrada import GestorEntrada
+from .layout import obtener_layout
+from .metricas import span
+from .robot import RobotAlmacen
+
+ESTRATEGIA_OLAS = 'secuencial_dp'
+
+
+class PlanificadorOlas:
+    """Agrupa órdenes en olas con capacidad (unidades) y costo de tour limitados."""
+
+    def __init__(self, capacidad_unidades=None, costo_maximo=None, layout=None,
+                 costo_celda=None, costo_pasillo=None, estrategia=ESTRATEGIA_OLAS):
+        self.capacidad_unidades = self._limite(capacidad_unidades, 'capacidad_unidades')
+        self.costo_maximo = self._limite(costo_maximo, 'costo_maximo')
+        self.layout = obtener_layout(layout)
+        self.costo_celda = float(costo_celda if costo_celda is not None else self.layout.costo_celda)
+        self.costo_pasillo = float(costo_pasillo if costo_pasillo is not None else self.layout.costo_pasillo)
+        self.estrategia = estrategia
+
+    @staticmethod
+    def _limite(valor, nombre):
+        """Límite opcional: None o un número positivo (ValueError si no)."""
+        if valor is None:
+            return None
+        if GestorEntrada.validar_cantidad(valor) is None:
+            raise ValueError(f"'{nombre}' debe ser un número positivo: {valor!r}")
+        return valor
+
+    def _estimar_costo(self, extremos):
+        """Costo del tour que cubre los extremos {col: [fila_min, fila_max]} de una ola.
+
+        Se ejecuta la estrategia de ruteo de las olas sobre las filas extremas de cada
+        columna, que es lo que cobra el recorrido completo.
+        """
+        paquetes = [[fila, col] for col, (lo, hi) in extremos.items() for fila in {lo, hi}]
+        robot = RobotAlmacen(paquetes=paquetes, costo_celda=self.costo_celda, costo_pasillo=self.costo_pasillo,
+                             estrategia=self.estrategia, layout=self.layout)
+        robot.ejecutar_recoleccion(detalle=False)
+        return robot.costo_total
+
+    @staticmethod
+    def _resumir_orden(items):
+        """Unidades, ubicaciones y clave espacial de una orden a partir de sus items aceptados."""
+        if not items:
+            return None
+        ubicaciones = {(fila, col) for _, fila, col, _, _ in items}
+        cols = [c for _, c in ubicaciones]
+        clave = (min(cols), max(cols), sum(f for f, _ in ubicaciones) / len(ubicaciones))
+        return {'id_orden': items[0][0], 'unidades': sum(item[3] for item in items),
+                'ubicaciones': ubicaciones, 'clave': clave}
+
+    @span('olas')
+    def planificar(self, ordenes, detalle=False):
+        """Retorna las olas con sus órdenes, ruta y costo, más estadísticas globales.
+
+        Los items se validan con `GestorEntrada.depurar_ordenes` (mismas reglas que
+        /consolidate) y el reporte se devuelve en 'validacion'.
+        """
+        if not isinstance(ordenes, (list, tuple)):
+            ordenes = [ordenes]
+        depuracion = GestorEntrada.depurar_ordenes(ordenes, self.layout)
+        items, inicios = depuracion['items'], depuracion['inicios'] + [len(depuracion['items'])]
+        resumenes = [r for r in (self._resumir_orden(items[a:b]) for a, b in zip(inicios, inicios[1:]))
+                     if r is not None]
+        resumenes.sort(key=lambda r: r['clave'])
+
+        grupos = []
+        actual = None
+        for r in resumenes:
+            if actual is not None:
+                extremos = {col: list(v) for col, v in actual['extremos'].items()}
+                for fila, col in r['ubicaciones']:
+                    if col in extremos:
+                        extremos[col][0] = min(extremos[col][0], fila)
+                        extremos[col][1] = max(extremos[col][1], fila)
+                    else:
+                        extremos[col] = [fila, fila]
+                unidades = actual['unidades'] + r['unidades']
+                cabe = self.capacidad_unidades is None or unidades <= self.capacidad_unidades
+                if cabe and self.costo_maximo is not None:
+                    cabe = self._estimar_costo(extremos) <= self.costo_maximo
+                if cabe:
+                    actual['ordenes'].append(r)
+                    actual['unidades'] = unidades
+                    actual['extremos'] = extremos
+                    continue
+            # Abrir una ola nueva con esta orden
+            extremos = {}
+            for fila, col in r['ubicaciones']:
+                lo_hi = extremos.setdefault(col, [fila, fila])
+                lo_hi[0], lo_hi[1] = min(lo_hi[0], fila), max(lo_hi[1], fila)
+            actual = {'ordenes': [r], 'unidades': r['unidades'], 'extremos': extremos}
+            grupos.append(actual)
+
+        olas = []
+        costo_total = 0.0
+        for i, grupo in enumerate(grupos, 1):
+            ubicaciones = sorted({u for r in grupo['ordenes'] for u in r['ubicaciones']}, key=lambda u: (u[1], u[0]))
+            robot = RobotAlmacen(paquetes=[list(u) for u in ubicaciones], costo_celda=self.costo_celda,
+                                 costo_pasillo=self.costo_pasillo, estrategia=self.estrategia, layout=self.layout)
+            resultado = robot.ejecutar_recoleccion(detalle=detalle)
+            costo_total += robot.costo_total
+            excede = ((self.capacidad_unidades is not None and grupo['unidades'] > self.capacidad_unidades) or
+                      (self.costo_maximo is not None and robot.costo_total > self.costo_maximo))
+            ola = {
+                'id_ola': i,
+                'ordenes': [r['id_orden'] for r in grupo['ordenes']],
+                'unidades': grupo['unidades'],
+                'ubicaciones': len(ubicaciones),
+                'total_cost': resultado['total_cost'],
+                'ruta': resultado['ruta'],
+                # Una orden sola que ya supera los límites queda en su propia ola
+                'excede_limites': excede,
+            }
+            if detalle:
+                ola['pasos'] = resultado['pasos']
+            olas.append(ola)
+
+        return {
+            'olas': olas,
+            'estadisticas': {
+                'olas': len(olas),
+                'ordenes': len(resumenes),
+                'ordenes_descartadas': len(ordenes) - len(resumenes),
+                'unidades': sum(g['unidades'] for g in grupos),
+                'costo_total': round(costo_total, 2),
+                'costo_promedio_ola': round(costo_total / len(olas), 2) if olas else 0,
+            },
+            'validacion': depuracion['reporte'],
+        }
@@ -1,6 +1,7 @@
-from .config import PASILLOS
+from .layout import obtener_layout, TRANSICIONES_POR_DEFECTO
+from .secuenciador import Secuenciador
 
-TRANSITIONS = {0, 8}
+TRANSITIONS = set(TRANSICIONES_POR_DEFECTO)
 
 class Optimizador:
     """
@@ -10,9 +11,12 @@ class Optimizador:
     - El orden de las columnas se determina de forma secuencial.
     """
 
-    def __init__(self, costo_celda, costo_pasillo):
+    def __init__(self, costo_celda, costo_pasillo, layout=None):
         self.costo_celda = float(costo_celda)
         self.costo_pasillo = float(costo_pasillo)
+        self.layout = obtener_layout(layout)
+        # Índice compartido entre instancias con el mismo layout y costos
+        self.indice = self.layout.indice_costos(self.costo_celda, self.costo_pasillo)
 
     def _costo_horizontal_simple(self, col1, col2):
         """Calcula costo y pasos para un movimiento horizontal directo (sin desvíos)."""
@@ -21,7 +25,7 @@ class Optimizador:
         
         # El costo se aplica al movernos a la siguiente columna
         for c in range(min(col1, col2), max(col1, col2)):
-            costo += self.costo_pasillo if (c + 1) in PASILLOS else self.costo_celda
+            costo += self.costo_pasillo if self.layout.es_pasillo(c + 1) else self.costo_celda
             
         return pasos, costo
 
@@ -30,7 +34,14 @@ class Optimizador:
         Calcula el costo y pasos de moverse de una posición a otra, respetando TODAS las restricciones.
         1. Movimientos se descomponen en Vertical y Horizontal (estilo V-H).
         2. Movimientos horizontales que cruzan pasillos deben pasar por columnas de transición (0 u 8).
+        El costo sale del índice precalculado (O(1)); fuera de la cuadrícula se calcula directamente.
         """
+        if 0 <= col1 < self.layout.columnas and 0 <= col2 < self.layout.columnas:
+            return self.indice.costo_movimiento(fila1, col1, fila2, col2)
+        return self._calcular_costo_movimiento_directo(fila1, col1, fila2, col2)
+
+    def _calcular_costo_movimiento_directo(self, fila1, col1, fila2, col2):
+        """Cálculo sin índice, usado para columnas fuera de la cuadrícula configurada."""
         
         # 1. Costo del movimiento vertical (siempre es directo)
         pasos_verticales = abs(fila2 - fila1)
@@ -43,30 +54,20 @@ class Optimizador:
         if col1 != col2:
             left, right = min(col1, col2), max(col1, col2)
             # Un cruce ocurre si un pasillo está ESTRICTAMENTE entre las dos columnas
-            cruza_pasillo = any(p in PASILLOS for p in range(left + 1, right))
+            cruza_pasillo = any(self.layout.es_pasillo(p) for p in range(left + 1, right))
+            transiciones = self.layout.transiciones
             
             # Si el movimiento horizontal cruza un pasillo y no empieza/termina en una transición,
             # se debe desviar por la columna de transición más cercana/barata.
-            if cruza_pasillo and col1 not in TRANSITIONS and col2 not in TRANSITIONS:
-                # Calcular costo vía columna 0
-                pasos_a_0, costo_a_0 = self._costo_horizontal_simple(col1, 0)
-                pasos_de_0, costo_de_0 = self._costo_horizontal_simple(0, col2)
-                pasos_via_0 = pasos_a_0 + pasos_de_0
-                costo_via_0 = costo_a_0 + costo_de_0
-
-                # Calcular costo vía columna 8
-                pasos_a_8, costo_a_8 = self._costo_horizontal_simple(col1, 8)
-                pasos_de_8, costo_de_8 = self._costo_horizontal_simple(8, col2)
-                pasos_via_8 = pasos_a_8 + pasos_de_8
-                costo_via_8 = costo_a_8 + costo_de_8
-
-                # Elegir la ruta de transición más barata
-                if costo_via_0 <= costo_via_8:
-                    pasos_horizontales = pasos_via_0
-                    costo_horizontal = costo_via_0
-                else:
-                    pasos_horizontales = pasos_via_8
-                    costo_horizontal = costo_via_8
+            if cruza_pasillo and transiciones and col1 not in transiciones and col2 not in transiciones:
+                mejor = None
+                for t in transiciones:
+                    pasos_a, costo_a = self._costo_horizontal_simple(col1, t)
+                    pasos_de, costo_de = self._costo_horizontal_simple(t, col2)
+                    # Elegir la ruta de transición más barata (la primera en empate)
+                    if mejor is None or costo_a + costo_de < mejor[1]:
+                        mejor = (pasos_a + pasos_de, costo_a + costo_de)
+                pasos_horizontales, costo_horizontal = mejor
             else:
                 # Movimiento horizontal directo (no cruza pasillos o ya está en transición)
                 pasos_horizontales, costo_horizontal = self._costo_horizontal_simple(col1, col2)
@@ -76,15 +77,23 @@ class Optimizador:
         
         return total_pasos, total_costo
 
-    def optimizar_orden_columnas(self, paquetes, inicio):
+    def optimizar_orden_columnas(self, paquetes, inicio, estrategia='secuencial', final=None):
         """
-        ALGORITMO SECUENCIAL: Visitar solo columnas con paquetes, en orden ascendente.
+        Retorna el orden de visita de las columnas con paquetes.
+        - 'secuencial' (por defecto): solo columnas con paquetes, en orden ascendente.
+        - 'exacta' / 'heuristica' / 'auto': orden calculado por el `Secuenciador`.
         """
         if not paquetes:
             return []
-        
-        columnas_con_paquetes = sorted(list(set(col for _, col in paquetes)))
-        return columnas_con_paquetes
+
+        if estrategia == 'secuencial':
+            return sorted(list(set(col for _, col in paquetes)))
+
+        por_columna = {}
+        for fila, col in paquetes:
+            por_columna.setdefault(col, []).append(fila)
+        plan = Secuenciador(self).planificar(por_columna, inicio, final or self.layout.final, estrategia)
+        return [col for col, _, _ in plan['orden']]
 
     def calcular_costo_con_restriccion(self, pos_actual, col_destino, filas_destino):
         """
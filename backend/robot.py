@@ -1,4 +1,7 @@
-from .config import FILAS, PASILLOS, PAQUETES, INICIO, FINAL, COSTO_CELDA, COSTO_PASILLO
+from .config import PAQUETES
+from .layout import obtener_layout
+from .optimizador import Optimizador
+from .secuenciador import Secuenciador, ESTRATEGIA_POR_DEFECTO
 
 class RobotAlmacen:
     """
@@ -7,16 +10,22 @@ class RobotAlmacen:
     - Baja/sube a recoger paquetes y elige la salida más eficiente.
     """
 
-    def __init__(self, paquetes=None, inicio=None, final=None, costo_celda=None, costo_pasillo=None):
+    def __init__(self, paquetes=None, inicio=None, final=None, costo_celda=None, costo_pasillo=None,
+                 estrategia=ESTRATEGIA_POR_DEFECTO, layout=None):
+        self.layout = obtener_layout(layout)
         self.paquetes_config = paquetes if paquetes is not None else PAQUETES
-        self.inicio = inicio if inicio is not None else INICIO
-        self.final = final if final is not None else FINAL
-        self.costo_celda_valor = float(costo_celda if costo_celda is not None else COSTO_CELDA)
-        self.costo_pasillo_valor = float(costo_pasillo if costo_pasillo is not None else COSTO_PASILLO)
+        self.inicio = inicio if inicio is not None else self.layout.inicio
+        self.final = final if final is not None else self.layout.final
+        self.costo_celda_valor = float(costo_celda if costo_celda is not None else self.layout.costo_celda)
+        self.costo_pasillo_valor = float(costo_pasillo if costo_pasillo is not None else self.layout.costo_pasillo)
+        self.estrategia = estrategia
         
         self.pos_actual = list(self.inicio)
         self.costo_total = 0.0
-        self.pasos_detalle = []
+        # Registro compacto de movimientos; `pasos_detalle` se materializa bajo demanda
+        self.movimientos = []
+        self._pasos_detalle = []
+        self._indice = self.layout.indice_costos(self.costo_celda_valor, self.costo_pasillo_valor)
         self.ruta_visual = [tuple(self.pos_actual)]
 
         self.paquetes_por_columna = {}
@@ -28,51 +37,69 @@ class RobotAlmacen:
         for col in self.paquetes_por_columna:
             self.paquetes_por_columna[col].sort()
 
-    def _registrar_paso(self, desde, hacia, descripcion):
-        """Registra un movimiento, calcula su costo y actualiza la ruta."""
+    def _registrar_paso(self, desde, hacia, descripcion, *args):
+        """Registra un movimiento, calcula su costo y actualiza la ruta.
+
+        `descripcion` es una plantilla de `str.format` con `args`; el texto solo se
+        construye si se piden los pasos detallados.
+        """
         f1, c1 = desde
         f2, c2 = hacia
         
         pasos_movimiento = 0
         costo_movimiento = 0
-        es_pasillo_str = "No"
+        es_pasillo = False
 
         # Movimiento Vertical
         if c1 == c2:
             pasos_movimiento = abs(f1 - f2)
             costo_movimiento = pasos_movimiento * self.costo_celda_valor
-        # Movimiento Horizontal
+        # Movimiento Horizontal: el costo se aplica al entrar en cada celda (suma prefija)
         elif f1 == f2:
-            pasos_movimiento = abs(c1 - c2)
-            for c in range(min(c1, c2), max(c1, c2)):
-                # El costo se aplica al entrar en la siguiente celda
-                if (c + 1) in PASILLOS:
-                    costo_movimiento += self.costo_pasillo_valor
-                else:
-                    costo_movimiento += self.costo_celda_valor
-            # Si el rango de movimiento contiene un pasillo
-            if any(p in PASILLOS for p in range(min(c1, c2) + 1, max(c1, c2) + 1)):
-                 es_pasillo_str = "Sí"
+            pasos_movimiento, costo_movimiento, entradas_pasillo = self._indice.horizontal_directo(c1, c2)
+            es_pasillo = entradas_pasillo > 0
 
         self.costo_total += costo_movimiento
-        self.pasos_detalle.append({
-            'Desde': f"({f1},{c1})",
-            'Hacia': f"({f2},{c2})",
-            'Pasos': pasos_movimiento,
-            'Costo': round(costo_movimiento, 2),
-            'Es Pasillo': es_pasillo_str,
-            'Acumulado': round(self.costo_total, 2),
-            'Descripción': descripcion
-        })
+        self.movimientos.append((f1, c1, f2, c2, pasos_movimiento, costo_movimiento,
+                                 es_pasillo, self.costo_total, descripcion, args))
         
         # Actualizar posición y añadir todos los puntos intermedios a la ruta visual
         # para que el frontend dibuje líneas rectas.
-        self.pos_actual = list(hacia)
-        self.ruta_visual.append(tuple(hacia))
+        self.pos_actual = [f2, c2]
+        self.ruta_visual.append((f2, c2))
+
+    @staticmethod
+    def _materializar_paso(movimiento):
+        f1, c1, f2, c2, pasos, costo, es_pasillo, acumulado, descripcion, args = movimiento
+        return {
+            'Desde': f"({f1},{c1})",
+            'Hacia': f"({f2},{c2})",
+            'Pasos': pasos,
+            'Costo': round(costo, 2),
+            'Es Pasillo': "Sí" if es_pasillo else "No",
+            'Acumulado': round(acumulado, 2),
+            'Descripción': descripcion.format(*args) if args else descripcion
+        }
+
+    @property
+    def pasos_detalle(self):
+        """Pasos legibles (dicts), construidos solo para los movimientos aún no materializados."""
+        if len(self._pasos_detalle) < len(self.movimientos):
+            self._pasos_detalle.extend(
+                self._materializar_paso(m) for m in self.movimientos[len(self._pasos_detalle):]
+            )
+        return self._pasos_detalle
+
+    def ejecutar_recoleccion(self, detalle=True):
+        """Ejecuta el ciclo completo de recolección según la lógica del instructor.
+
+        Con `detalle=False` el resultado no incluye los `pasos` legibles, solo el costo,
+        la ruta y los conteos de movimientos (mucha menos memoria en simulaciones masivas).
+        """
+        self.detalle = detalle
+        if self.estrategia != 'secuencial':
+            return self._ejecutar_con_secuenciador()
 
-    def ejecutar_recoleccion(self):
-        """Ejecuta el ciclo completo de recolección según la lógica del instructor."""
-        
         columnas_a_visitar = sorted(self.paquetes_por_columna.keys())
 
         if not columnas_a_visitar:
@@ -82,37 +109,37 @@ class RobotAlmacen:
 
         # Moverse horizontalmente a la primera columna con paquetes
         if self.pos_actual[1] != columnas_a_visitar[0]:
-            self._registrar_paso(tuple(self.pos_actual), (self.pos_actual[0], columnas_a_visitar[0]), f"Ir a la primera columna ({columnas_a_visitar[0]})")
+            self._avanzar_horizontal(columnas_a_visitar[0], "Ir a la primera columna ({})", columnas_a_visitar[0])
 
         for i, col in enumerate(columnas_a_visitar):
             paquetes_en_col = self.paquetes_por_columna[col]
             
             # 1. Moverse verticalmente a la primera fila de paquete en la columna
-            self._registrar_paso(tuple(self.pos_actual), (paquetes_en_col[0], col), f"Bajar a recoger en ({paquetes_en_col[0]},{col})")
+            self._registrar_paso(tuple(self.pos_actual), (paquetes_en_col[0], col), "Bajar a recoger en ({},{})", paquetes_en_col[0], col)
 
             # 2. Recorrer todos los paquetes en la columna
             for j in range(len(paquetes_en_col) - 1):
-                self._registrar_paso((paquetes_en_col[j], col), (paquetes_en_col[j+1], col), f"Recoger paquete en ({paquetes_en_col[j+1]},{col})")
+                self._registrar_paso((paquetes_en_col[j], col), (paquetes_en_col[j+1], col), "Recoger paquete en ({},{})", paquetes_en_col[j+1], col)
 
             # 3. Decidir cómo moverse a la siguiente columna
             if i + 1 < len(columnas_a_visitar):
                 col_siguiente = columnas_a_visitar[i+1]
                 
                 pasos_a_fila_0 = self.pos_actual[0]
-                pasos_a_fila_final = (FILAS - 1) - self.pos_actual[0]
+                pasos_a_fila_final = (self.layout.filas - 1) - self.pos_actual[0]
 
                 # Elegir la ruta vertical más corta para el tránsito horizontal
                 if pasos_a_fila_0 <= pasos_a_fila_final:
                     fila_transito = 0
                     accion = "Subir"
                 else:
-                    fila_transito = FILAS - 1
+                    fila_transito = self.layout.filas - 1
                     accion = "Bajar"
                 
                 # Moverse verticalmente a la fila de tránsito
-                self._registrar_paso(tuple(self.pos_actual), (fila_transito, self.pos_actual[1]), f"{accion} a fila {fila_transito}")
+                self._registrar_paso(tuple(self.pos_actual), (fila_transito, self.pos_actual[1]), "{} a fila {}", accion, fila_transito)
                 # Moverse horizontalmente a la siguiente columna
-                self._registrar_paso(tuple(self.pos_actual), (fila_transito, col_siguiente), f"Avanzar a columna {col_siguiente}")
+                self._avanzar_horizontal(col_siguiente, "Avanzar a columna {}", col_siguiente)
         
         # 4. Movimiento final al punto de entrega (descompuesto en V y H)
         if tuple(self.pos_actual) != tuple(self.final):
@@ -121,14 +148,104 @@ class RobotAlmacen:
                 self._registrar_paso(tuple(self.pos_actual), (self.final[0], self.pos_actual[1]), "Ajuste vertical para entrega")
             # Movimiento horizontal
             if self.pos_actual[1] != self.final[1]:
-                self._registrar_paso(tuple(self.pos_actual), tuple(self.final), "Ajuste horizontal para entrega")
+                self._avanzar_horizontal(self.final[1], "Ajuste horizontal para entrega")
 
         return self.generar_resultado()
 
-    def generar_resultado(self):
+    def _avanzar_horizontal(self, col_destino, descripcion, *args):
+        """Movimiento horizontal en la fila actual; si cruza un pasillo pasa por la columna de transición."""
+        fila = self.pos_actual[0]
+        transicion = self._indice.transicion_desvio(self.pos_actual[1], col_destino)
+        if transicion is not None:
+            self._registrar_paso(tuple(self.pos_actual), (fila, transicion), "Desvío por columna de transición {}", transicion)
+        self._registrar_paso(tuple(self.pos_actual), (fila, col_destino), descripcion, *args)
+
+    def _ejecutar_con_secuenciador(self):
+        """Recorre las columnas en el orden y sentido decididos por el `Secuenciador`.
+
+        La referencia es el recorrido 'secuencial' ejecutado con los mismos datos. Si el
+        plan costaría más (p. ej. con INICIO o FINAL fuera de las filas de tránsito, donde
+        el recorrido voraz avanza por su propia fila), se ejecuta el voraz, así que el
+        ahorro informado nunca es negativo.
+        """
+        voraz = RobotAlmacen(paquetes=self.paquetes_config, inicio=self.inicio, final=self.final,
+                             costo_celda=self.costo_celda_valor, costo_pasillo=self.costo_pasillo_valor,
+                             estrategia='secuencial', layout=self.layout)
+        voraz.ejecutar_recoleccion(detalle=False)
+        costo_voraz = voraz.costo_total
+
+        optimizador = Optimizador(self.costo_celda_valor, self.costo_pasillo_valor, self.layout)
+        secuenciador = Secuenciador(optimizador)
+        plan = secuenciador.planificar(self.paquetes_por_columna, self.inicio, self.final, self.estrategia)
+        if plan['costo'] > costo_voraz + 1e-9:
+            self.movimientos = voraz.movimientos
+            self.ruta_visual = voraz.ruta_visual
+            self.costo_total = voraz.costo_total
+            self.pos_actual = voraz.pos_actual
+            estrategia = 'secuencial'
+            orden_columnas = sorted(self.paquetes_por_columna.keys())
+        else:
+            self._ejecutar_plan(secuenciador, plan['orden'])
+            estrategia = plan['estrategia']
+            orden_columnas = [col for col, _, _ in plan['orden']]
+
+        resultado = self.generar_resultado()
+        resultado['estrategia'] = estrategia
+        resultado['orden_columnas'] = orden_columnas
+        ahorro = costo_voraz - self.costo_total
+        resultado['comparacion_voraz'] = {
+            'costo_voraz': round(costo_voraz, 2),
+            'costo_optimizado': round(self.costo_total, 2),
+            'ahorro': round(ahorro, 2),
+            'ahorro_pct': round(100.0 * ahorro / costo_voraz, 2) if costo_voraz else 0.0,
+        }
+        return resultado
+
+    def _ejecutar_plan(self, secuenciador, orden):
+        for col, entrada, salida in orden:
+            self._registrar_tramo(secuenciador, (entrada, col), "recoger en ({},{})", entrada, col)
+            filas = self.paquetes_por_columna[col]
+            if entrada > salida:
+                filas = list(reversed(filas))
+            for j in range(len(filas) - 1):
+                self._registrar_paso((filas[j], col), (filas[j + 1], col), "Recoger paquete en ({},{})", filas[j + 1], col)
+
+        self._registrar_tramo(secuenciador, tuple(self.final), "entregar en el punto final")
+
+    def _registrar_tramo(self, secuenciador, hacia, objetivo, *args):
+        """Descompone un tramo del secuenciador en movimientos V-H y los registra.
+
+        Sube/baja a la fila de tránsito, avanza (desviándose por la columna de transición
+        si cruza un pasillo) y entra verticalmente a la celda destino.
+        """
+        desde = tuple(self.pos_actual)
+        _, _, fila_transito = secuenciador.tramo(desde, hacia)
+        if fila_transito is not None:
+            if desde[0] != fila_transito:
+                accion = "Subir" if fila_transito < desde[0] else "Bajar"
+                self._registrar_paso(desde, (fila_transito, desde[1]), "{} a fila {}", accion, fila_transito)
+            transicion = secuenciador.optimizador.indice.transicion_desvio(desde[1], hacia[1])
+            if transicion is not None:
+                self._registrar_paso(tuple(self.pos_actual), (fila_transito, transicion), "Desvío por columna de transición {}", transicion)
+            self._registrar_paso(tuple(self.pos_actual), (fila_transito, hacia[1]), "Avanzar a columna {}", hacia[1])
+        if tuple(self.pos_actual) != tuple(hacia) or fila_transito is None:
+            accion = "Subir" if hacia[0] < self.pos_actual[0] else "Bajar"
+            self._registrar_paso(tuple(self.pos_actual), tuple(hacia), accion + " a " + objetivo, *args)
+
+    def generar_resultado(self, detalle=None):
+        if detalle is None:
+            detalle = getattr(self, 'detalle', True)
+        if detalle:
+            return {
+                'total_cost': round(self.costo_total, 2),
+                'pos_final': self.pos_actual,
+                'pasos': self.pasos_detalle,
+                'ruta': self.ruta_visual,
+            }
         return {
             'total_cost': round(self.costo_total, 2),
             'pos_final': self.pos_actual,
-            'pasos': self.pasos_detalle,
+            'movimientos': len(self.movimientos),
+            'pasos_totales': sum(m[4] for m in self.movimientos),
             'ruta': self.ruta_visual,
         }
@@ -0,0 +1,315 @@
+"""
+Módulo secuenciador: decide en qué orden visitar las columnas con paquetes y por qué
+extremo entrar a cada una.
+
+Modelo de recorrido (el mismo que materializa `RobotAlmacen`):
+  - Dentro de una columna el robot recorre sus paquetes de un extremo al otro
+    (entrar por la fila menor y salir por la mayor, o al revés).
+  - Para cambiar de columna sube/baja a una fila de tránsito (0 o filas-1 del layout), avanza
+    horizontalmente respetando pasillos y columnas de transición, y entra a la siguiente.
+  - Todos los costos salen de `Optimizador.calcular_costo_movimiento`.
+
+Estrategias:
+  - 'secuencial': columnas en orden ascendente (comportamiento original).
+  - 'secuencial_dp': orden ascendente, pero el extremo de entrada de cada columna y la
+    fila de tránsito se eligen con programación dinámica lineal (óptimo global para ese orden).
+  - 'exacta': programación dinámica sobre subconjuntos de columnas (Held-Karp); con más
+    de `limite_exacto` columnas se resuelve con la heurística.
+  - 'heuristica': vecino más cercano + mejoras 2-opt / Or-opt con presupuesto de tiempo.
+  - 'auto': exacta si hay pocas columnas, heurística en otro caso.
+"""
+
+import time
+
+ESTRATEGIAS = ('secuencial', 'secuencial_dp', 'exacta', 'heuristica', 'auto')
+ESTRATEGIA_POR_DEFECTO = 'secuencial'
+
+
+class Secuenciador:
+    """Motor de secuenciación de columnas sobre el modelo de costos del `Optimizador`."""
+
+    def __init__(self, optimizador, filas=None, limite_exacto=10, presupuesto_s=0.25):
+        self.optimizador = optimizador
+        if filas is None:
+            filas = optimizador.layout.filas
+        self.filas_transito = (0, filas - 1) if filas > 1 else (0,)
+        self.limite_exacto = int(limite_exacto)
+        self.presupuesto_s = float(presupuesto_s)
+        self._tramos = {}
+
+    # ------------------------------------------------------------------
+    # Costos de tramos
+    # ------------------------------------------------------------------
+    def tramo(self, desde, hacia):
+        """Mejor tramo entre dos celdas pasando por una fila de tránsito.
+
+        Retorna (pasos, costo, fila_transito); fila_transito es None si ambas celdas
+        están en la misma columna (movimiento vertical directo).
+        """
+        clave = (desde[0], desde[1], hacia[0], hacia[1])
+        resultado = self._tramos.get(clave)
+        if resultado is None:
+            resultado = self._tramos[clave] = self._calcular_tramo(desde, hacia)
+        return resultado
+
+    def _calcular_tramo(self, desde, hacia):
+        f1, c1 = desde
+        f2, c2 = hacia
+        calcular = self.optimizador.calcular_costo_movimiento
+        if c1 == c2:
+            pasos, costo = calcular(f1, c1, f2, c2)
+            return pasos, costo, None
+
+        pasos_h, costo_h = calcular(0, c1, 0, c2)
+        mejor = None
+        for t in self.filas_transito:
+            pasos_sube, costo_sube = calcular(f1, c1, t, c1)
+            pasos_baja, costo_baja = calcular(t, c2, f2, c2)
+            candidato = (pasos_sube + pasos_h + pasos_baja, costo_sube + costo_h + costo_baja, t)
+            if mejor is None or candidato[1] < mejor[1]:
+                mejor = candidato
+        return mejor
+
+    def costo_recorrido(self, orden, inicio, final):
+        """Costo total de un recorrido [(col, entrada, salida), ...] desde inicio hasta final."""
+        return self.medir_recorrido(orden, inicio, final)[1]
+
+    def medir_recorrido(self, orden, inicio, final):
+        """(pasos, costo) de un recorrido [(col, entrada, salida), ...] desde inicio hasta final."""
+        pasos, costo = 0, 0.0
+        pos = tuple(inicio)
+        celda = self.optimizador.costo_celda
+        for col, entrada, salida in orden:
+            pasos_tramo, costo_tramo, _ = self.tramo(pos, (entrada, col))
+            pasos += pasos_tramo + abs(salida - entrada)
+            costo += costo_tramo + abs(salida - entrada) * celda
+            pos = (salida, col)
+        pasos_tramo, costo_tramo, _ = self.tramo(pos, tuple(final))
+        return pasos + pasos_tramo, costo + costo_tramo
+
+    # ------------------------------------------------------------------
+    # Planificación
+    # ------------------------------------------------------------------
+    def planificar(self, paquetes_por_columna, inicio, final, estrategia='auto'):
+        """Retorna el plan de visita [(col, fila_entrada, fila_salida), ...], su costo y sus pasos.
+
+        paquetes_por_columna: dict {col: [filas]} (las filas pueden venir desordenadas)
+        """
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estrategia desconocida: {estrategia}")
+
+        columnas = sorted(paquetes_por_columna.keys())
+        extremos = [(min(paquetes_por_columna[c]), max(paquetes_por_columna[c])) for c in columnas]
+
+        # Held-Karp es exponencial en columnas: por encima del límite (pedida o no) se usa la heurística
+        if estrategia in ('auto', 'exacta'):
+            estrategia = 'exacta' if len(columnas) <= self.limite_exacto else 'heuristica'
+
+        if not columnas:
+            orden = []
+        elif estrategia == 'secuencial':
+            orden = [(col, lo, hi) for col, (lo, hi) in zip(columnas, extremos)]
+        elif estrategia == 'secuencial_dp':
+            orden = self.orientar(columnas, paquetes_por_columna, inicio, final)
+        elif estrategia == 'exacta':
+            orden = self._exacta(columnas, extremos, tuple(inicio), tuple(final))
+        else:
+            orden = self._heuristica(columnas, extremos, tuple(inicio), tuple(final))
+            # El orden heurístico se re-orienta de forma óptima (O(n))
+            orden = self.orientar([col for col, _, _ in orden], paquetes_por_columna, inicio, final)
+
+        pasos, costo = self.medir_recorrido(orden, inicio, final)
+        return {
+            'orden': orden,
+            'costo': costo,
+            'pasos': pasos,
+            'estrategia': estrategia,
+        }
+
+    def orientar(self, columnas_orden, paquetes_por_columna, inicio, final):
+        """Elige, para un orden de columnas fijo, por qué extremo entrar a cada columna.
+
+        Programación dinámica con dos estados por columna (entrar por arriba / por abajo);
+        la fila de tránsito de cada tramo ya es la mejor dentro de `tramo`, así que el
+        resultado es el recorrido de costo mínimo para ese orden. Tiempo O(n).
+        """
+        if not columnas_orden:
+            return []
+        celda = self.optimizador.costo_celda
+        inicio, final = tuple(inicio), tuple(final)
+
+        # costos[k][o]: costo mínimo hasta salir de la columna k con orientación o
+        costos, elecciones = [], []
+        anteriores = None
+        for k, col in enumerate(columnas_orden):
+            filas = paquetes_por_columna[col]
+            lo, hi = min(filas), max(filas)
+            nodos = ((col, lo, hi), (col, hi, lo))
+            interno = (hi - lo) * celda
+            fila_costos, fila_elecciones = [], []
+            for _, entrada, _ in nodos:
+                if anteriores is None:
+                    fila_costos.append(self.tramo(inicio, (entrada, col))[1] + interno)
+                    fila_elecciones.append(-1)
+                    continue
+                mejor = None
+                for o, (col_ant, _, salida_ant) in enumerate(anteriores):
+                    valor = costos[k - 1][o] + self.tramo((salida_ant, col_ant), (entrada, col))[1]
+                    if mejor is None or valor < mejor[0]:
+                        mejor = (valor, o)
+                fila_costos.append(mejor[0] + interno)
+                fila_elecciones.append(mejor[1])
+            costos.append(fila_costos)
+            elecciones.append((nodos, fila_elecciones))
+            anteriores = nodos
+
+        ultimos = elecciones[-1][0]
+        o = min((0, 1), key=lambda i: (costos[-1][i] + self.tramo((ultimos[i][2], ultimos[i][0]), final)[1], i))
+        orden = []
+        for nodos, fila_elecciones in reversed(elecciones):
+            orden.append(nodos[o])
+            o = fila_elecciones[o]
+        orden.reverse()
+        return orden
+
+    def _nodos(self, columnas, extremos):
+        """Nodo 2k: entrar por arriba en la columna k; nodo 2k+1: entrar por abajo."""
+        nodos = []
+        for col, (lo, hi) in zip(columnas, extremos):
+            nodos.append((col, lo, hi))
+            nodos.append((col, hi, lo))
+        return nodos
+
+    def _exacta(self, columnas, extremos, inicio, final):
+        n = len(columnas)
+        nodos = self._nodos(columnas, extremos)
+        celda = self.optimizador.costo_celda
+        interno = [abs(s - e) * celda for _, e, s in nodos]
+        desde_inicio = [self.tramo(inicio, (e, c))[1] + interno[i] for i, (c, e, _) in enumerate(nodos)]
+        hasta_final = [self.tramo((s, c), final)[1] for c, _, s in nodos]
+        m = len(nodos)
+        entre = [[0.0] * m for _ in range(m)]
+        for a, (ca, _, sa) in enumerate(nodos):
+            for b, (cb, eb, _) in enumerate(nodos):
+                if ca != cb:
+                    entre[a][b] = self.tramo((sa, ca), (eb, cb))[1] + interno[b]
+
+        inf = float('inf')
+        total = 1 << n
+        dp = [[inf] * m for _ in range(total)]
+        padre = [[-1] * m for _ in range(total)]
+        for i in range(m):
+            dp[1 << (i >> 1)][i] = desde_inicio[i]
+
+        for mask in range(1, total):
+            fila_dp = dp[mask]
+            for a in range(m):
+                costo_a = fila_dp[a]
+                if costo_a == inf:
+                    continue
+                entre_a = entre[a]
+                for k in range(n):
+                    bit = 1 << k
+                    if mask & bit:
+                        continue
+                    destino = dp[mask | bit]
+                    for b in (2 * k, 2 * k + 1):
+                        costo = costo_a + entre_a[b]
+                        if costo < destino[b]:
+                            destino[b] = costo
+                            padre[mask | bit][b] = a
+
+        completo = total - 1
+        ultimo = min(range(m), key=lambda i: (dp[completo][i] + hasta_final[i], i))
+        secuencia = []
+        mask, actual = completo, ultimo
+        while actual != -1:
+            secuencia.append(nodos[actual])
+            anterior = padre[mask][actual]
+            mask ^= 1 << (actual >> 1)
+            actual = anterior
+        secuencia.reverse()
+        return secuencia
+
+    def _heuristica(self, columnas, extremos, inicio, final):
+        limite = time.perf_counter() + self.presupuesto_s
+
+        # 1. Vecino más cercano (considerando ambos extremos de entrada)
+        pendientes = dict(zip(columnas, extremos))
+        orden = []
+        pos = inicio
+        while pendientes:
+            mejor = None
+            for col, (lo, hi) in pendientes.items():
+                for entrada, salida in ((lo, hi), (hi, lo)):
+                    costo = self.tramo(pos, (entrada, col))[1]
+                    if mejor is None or costo < mejor[0]:
+                        mejor = (costo, (col, entrada, salida))
+            nodo = mejor[1]
+            orden.append(nodo)
+            del pendientes[nodo[0]]
+            pos = (nodo[2], nodo[0])
+
+        # Los tramos son simétricos: invertir un segmento y voltear sus nodos
+        # solo cambia los dos tramos de borde, así que los deltas son O(1).
+        def salida_de(i):
+            if i < 0:
+                return inicio
+            col, _, salida = orden[i]
+            return (salida, col)
+
+        def entrada_de(i):
+            if i >= len(orden):
+                return final
+            col, entrada, _ = orden[i]
+            return (entrada, col)
+
+        def costo(a, b):
+            return self.tramo(a, b)[1]
+
+        mejora = True
+        n = len(orden)
+        while mejora and time.perf_counter() < limite:
+            mejora = False
+            # 2. 2-opt: invertir orden[i..j]
+            for i in range(n):
+                if time.perf_counter() >= limite:
+                    break
+                for j in range(i, n):
+                    prev, sig = salida_de(i - 1), entrada_de(j + 1)
+                    ci, _, si = orden[i]
+                    cj, ej, _ = orden[j]
+                    actual = costo(prev, entrada_de(i)) + costo(salida_de(j), sig)
+                    # Tras invertir, el primer nodo es orden[j] volteado y el último orden[i] volteado
+                    nuevo = costo(prev, (salida_de(j)[0], cj)) + costo((entrada_de(i)[0], ci), sig)
+                    if nuevo < actual - 1e-9:
+                        orden[i:j + 1] = [(c, s, e) for c, e, s in reversed(orden[i:j + 1])]
+                        mejora = True
+
+            # 3. Or-opt: mover segmentos de 1 a 3 columnas (en cualquier sentido)
+            for largo in (1, 2, 3):
+                i = 0
+                while i + largo <= len(orden) and time.perf_counter() < limite:
+                    segmento = orden[i:i + largo]
+                    prev, sig = salida_de(i - 1), entrada_de(i + largo)
+                    ahorro_quitar = (costo(prev, entrada_de(i)) + costo(salida_de(i + largo - 1), sig)
+                                     - costo(prev, sig))
+                    resto = orden[:i] + orden[i + largo:]
+                    invertido = [(c, s, e) for c, e, s in reversed(segmento)]
+                    mejor = None
+                    for pos_ins in range(len(resto) + 1):
+                        if pos_ins == i:
+                            continue
+                        a = inicio if pos_ins == 0 else (resto[pos_ins - 1][2], resto[pos_ins - 1][0])
+                        b = final if pos_ins == len(resto) else (resto[pos_ins][1], resto[pos_ins][0])
+                        for seg in (segmento, invertido):
+                            delta = (costo(a, (seg[0][1], seg[0][0])) + costo((seg[-1][2], seg[-1][0]), b)
+                                     - costo(a, b) - ahorro_quitar)
+                            if delta < -1e-9 and (mejor is None or delta < mejor[0]):
+                                mejor = (delta, pos_ins, seg)
+                    if mejor is not None:
+                        _, pos_ins, seg = mejor
+                        orden[:] = resto[:pos_ins] + seg + resto[pos_ins:]
+                        mejora = True
+                    i += 1
+        return orden
@@ -0,0 +1,356 @@
+"""
+Módulo slotting: reasignación de SKUs a celdas para reducir el costo esperado de picking.
+
+El costo esperado de una asignación tiene dos términos, ambos con el modelo de
+movimiento del `Optimizador` (V-H, pasillos y columnas de transición):
+
+  - Por pick: frecuencia(sku) × costo(INICIO → celda → FINAL).
+  - Por afinidad: para cada par de SKUs que aparecen juntos en órdenes del historial,
+    veces_juntos × distancia(celda_a, celda_b) × `peso_afinidad`.
+
+La semilla voraz asigna los SKUs más frecuentes a las celdas más baratas (óptima si
+solo hubiera el término por pick). Después, una búsqueda local intercambia pares de
+SKUs (el de cada SKU frecuente con alguno de la celda de sus socios de orden) y
+acepta el intercambio si baja el costo. El delta de un intercambio se evalúa de forma
+incremental: solo los dos SKUs y sus vecinos de afinidad, sin recalcular el total.
+Así escala a 100k SKUs con un presupuesto de tiempo.
+
+El ahorro proyectado se mide reproduciendo las órdenes del historial con
+`medir_ruta_picking` (la misma ruta real que `/consolidate`) con las ubicaciones
+actuales y con las propuestas.
+"""
+
+import math
+import random
+import time
+from itertools import combinations
+
+from .consolidador import medir_ruta_picking
+from .layout import obtener_layout
+
+# Máximo de ítems distintos por orden que se usan para contar pares (evita el costo cuadrático)
+MAX_ITEMS_AFINIDAD = 25
+# Ocupantes de la celda actual que se prueban al intentar conservar la ubicación de un SKU
+MAX_OCUPANTES_CONSERVAR = 8
+# Celdas de almacenamiento admitidas (el costo por pick y la semilla voraz son O(celdas))
+MAX_CELDAS = 250_000
+
+
+def _clave_sku(sku):
+    """SKU usable como clave: los que no son texto ni enteros se comparan por su texto."""
+    return sku if isinstance(sku, (str, int)) else str(sku)
+
+
+class OptimizadorSlotting:
+    """Propone reubicaciones de SKUs minimizando el costo esperado de recorrido."""
+
+    def __init__(self, layout=None, costo_celda=None, costo_pasillo=None, celdas=None, capacidad_celda=None,
+                 peso_afinidad=1.0, max_vecinos=10, presupuesto_s=5.0, semilla=0):
+        self.layout = obtener_layout(layout)
+        self.costo_celda = float(self.layout.costo_celda if costo_celda is None else costo_celda)
+        self.costo_pasillo = float(self.layout.costo_pasillo if costo_pasillo is None else costo_pasillo)
+        # Celdas de almacenamiento: por defecto todas las de columnas que no son pasillo
+        if celdas is None:
+            celdas = [(f, c) for c in range(self.layout.columnas) if not self.layout.es_pasillo(c)
+                      for f in range(self.layout.filas)]
+        self.celdas = [(int(f), int(c)) for f, c in celdas if self.layout.contiene(int(f), int(c))]
+        if not self.celdas:
+            raise ValueError('No hay celdas de almacenamiento en el layout')
+        if len(self.celdas) > MAX_CELDAS:
+            raise ValueError(f'{len(self.celdas)} celdas de almacenamiento superan el máximo de {MAX_CELDAS}')
+        # SKUs por celda (None: los mínimos para que quepan todos)
+        self.capacidad_celda = int(capacidad_celda) if capacidad_celda else None
+        self.peso_afinidad = float(peso_afinidad)
+        self.max_vecinos = int(max_vecinos)
+        self.presupuesto_s = float(presupuesto_s)
+        self.semilla = semilla
+
+        indice = self.layout.indice_costos(self.costo_celda, self.costo_pasillo)
+        inicio, final = self.layout.inicio, self.layout.final
+        # Costo por pick de cada celda; las distancias entre celdas se consultan al índice O(1)
+        self._mover = indice.costo_movimiento
+        self._costo_pick = [indice.costo_movimiento(inicio[0], inicio[1], f, c)[1] +
+                            indice.costo_movimiento(f, c, final[0], final[1])[1] for f, c in self.celdas]
+
+    def _distancia(self, a, b):
+        """Costo de moverse entre las celdas `a` y `b` (el modelo es simétrico: ida = vuelta)."""
+        f1, c1 = self.celdas[a]
+        f2, c2 = self.celdas[b]
+        return self._mover(f1, c1, f2, c2)[1]
+
+    def optimizar(self, ubicaciones, ordenes=None, max_ordenes_replay=2000):
+        """Propone la asignación SKU → celda y el ahorro proyectado.
+
+        ubicaciones: [{'sku', 'fila', 'col', 'movimientos'}, ...] (como en `ConteoCiclico`)
+        ordenes: historial opcional [{'id_orden', 'items': [[fila, col, cantidad, sku], ...]}, ...]
+            (formato de `/consolidate`). Si se da, la frecuencia de cada SKU es su número de
+            líneas en el historial y los pares de la misma orden definen la afinidad; si no,
+            se usa 'movimientos' y no hay término de afinidad. Las órdenes que no son objetos
+            y los items sin SKU se ignoran.
+        """
+        ordenes = self._lineas_ordenes(ordenes)
+        skus, actual, frecuencia = self._skus(ubicaciones, ordenes)
+        n = len(skus)
+        if n == 0:
+            return {'reubicaciones': [], 'estadisticas': {'skus': 0}, 'replay': None}
+        capacidad = self.capacidad_celda or math.ceil(n / len(self.celdas))
+        if capacidad * len(self.celdas) < n:
+            raise ValueError(f'{n} SKUs no caben en {len(self.celdas)} celdas de capacidad {capacidad}')
+        indice_sku = {sku: i for i, sku in enumerate(skus)}
+        vecinos = self._afinidad(ordenes, indice_sku) if ordenes else [[] for _ in range(n)]
+
+        inicio = time.perf_counter()
+        celda_de = self._semilla_voraz(frecuencia, capacidad)
+        costo_voraz = self._costo_total(celda_de, frecuencia, vecinos)
+        ocupantes, posicion = self._ocupantes(celda_de)
+        intercambios, pasadas = self._busqueda_local(celda_de, frecuencia, vecinos, ocupantes, posicion)
+
+        # Costo esperado actual vs propuesto sobre los SKUs con ubicación actual conocida
+        indice_celda = {celda: k for k, celda in enumerate(self.celdas)}
+        con_ubicacion = [i for i in range(n) if actual[i] in indice_celda]
+        celda_actual = [indice_celda.get(actual[i]) for i in range(n)]
+        conservados = self._conservar(celda_de, celda_actual, frecuencia, vecinos, ocupantes, posicion)
+        duracion = time.perf_counter() - inicio
+        costo_actual = self._costo_total(celda_actual, frecuencia, vecinos, con_ubicacion)
+        costo_propuesto = self._costo_total(celda_de, frecuencia, vecinos, con_ubicacion)
+
+        reubicaciones = []
+        for i in sorted(range(n), key=lambda i: (-frecuencia[i], str(skus[i]))):
+            hacia = self.celdas[celda_de[i]]
+            if actual[i] != hacia:
+                reubicaciones.append({
+                    'sku': skus[i],
+                    'desde': list(actual[i]) if actual[i] is not None else None,
+                    'hacia': list(hacia),
+                    'frecuencia': frecuencia[i],
+                })
+
+        return {
+            'reubicaciones': reubicaciones,
+            'estadisticas': {
+                'skus': n,
+                'skus_sin_ubicacion': n - len(con_ubicacion),
+                'celdas': len(self.celdas),
+                'capacidad_celda': capacidad,
+                'reubicaciones': len(reubicaciones),
+                'intercambios': intercambios,
+                'conservados': conservados,
+                'pasadas': pasadas,
+                'tiempo_s': round(duracion, 3),
+                'costo_esperado_voraz': round(costo_voraz, 2),
+                'costo_esperado_actual': round(costo_actual, 2),
+                'costo_esperado_propuesto': round(costo_propuesto, 2),
+                'ahorro_esperado_pct': round(100.0 * (costo_actual - costo_propuesto) / costo_actual, 2) if costo_actual else 0.0,
+            },
+            'replay': self._replay(ordenes, skus, indice_sku, actual, celda_de, max_ordenes_replay) if ordenes else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Entrada
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _lineas_ordenes(ordenes):
+        """Líneas (fila, col, sku) de cada orden válida del historial."""
+        lineas = []
+        for orden in ordenes or []:
+            items = orden.get('items') if isinstance(orden, dict) else None
+            if not isinstance(items, (list, tuple)):
+                continue
+            lineas.append([(item[0], item[1], _clave_sku(item[3])) for item in items
+                           if isinstance(item, (list, tuple)) and len(item) >= 4])
+        return lineas
+
+    def _skus(self, ubicaciones, ordenes):
+        """SKUs, ubicación actual (tupla o None) y frecuencia de cada uno."""
+        skus, actual, movimientos = [], [], []
+        vistos = {}
+        for item in ubicaciones or []:
+            if not isinstance(item, dict):
+                continue
+            sku = _clave_sku(item.get('sku') or item.get('ref') or f"{item.get('fila')}-{item.get('col')}")
+            if sku in vistos:
+                continue
+            vistos[sku] = len(skus)
+            skus.append(sku)
+            actual.append(self._celda(item.get('fila'), item.get('col')))
+            movimientos.append(int(item.get('movimientos', 0) or 0))
+        if not ordenes:
+            return skus, actual, movimientos
+
+        lineas = [0] * len(skus)
+        for orden in ordenes:
+            for fila, col, sku in orden:
+                i = vistos.get(sku)
+                if i is None:
+                    # SKU solo presente en el historial: su ubicación actual es la de la orden
+                    i = vistos[sku] = len(skus)
+                    skus.append(sku)
+                    actual.append(self._celda(fila, col))
+                    lineas.append(0)
+                lineas[i] += 1
+        return skus, actual, lineas
+
+    def _celda(self, fila, col):
+        try:
+            celda = (int(fila), int(col))
+        except (TypeError, ValueError):
+            return None
+        return celda if self.layout.contiene(*celda) else None
+
+    def _afinidad(self, ordenes, indice_sku):
+        """Vecinos de afinidad por SKU: los `max_vecinos` con los que más veces comparte orden."""
+        pares = {}
+        for orden in ordenes:
+            indices = sorted({indice_sku[sku] for _, _, sku in orden})
+            for a, b in combinations(indices[:MAX_ITEMS_AFINIDAD], 2):
+                pares[(a, b)] = pares.get((a, b), 0) + 1
+        por_sku = {}
+        for (a, b), veces in pares.items():
+            por_sku.setdefault(a, []).append((b, veces))
+            por_sku.setdefault(b, []).append((a, veces))
+        vecinos = [[] for _ in range(len(indice_sku))]
+        for i, lista in por_sku.items():
+            lista.sort(key=lambda v: -v[1])
+            vecinos[i] = [(j, veces * self.peso_afinidad) for j, veces in lista[:self.max_vecinos]]
+        return vecinos
+
+    # ------------------------------------------------------------------
+    # Optimización
+    # ------------------------------------------------------------------
+    def _semilla_voraz(self, frecuencia, capacidad):
+        """Los SKUs más frecuentes a las celdas de menor costo por pick."""
+        huecos = [k for k in sorted(range(len(self.celdas)), key=lambda k: (self._costo_pick[k], self.celdas[k]))
+                  for _ in range(capacidad)]
+        celda_de = [0] * len(frecuencia)
+        for hueco, i in zip(huecos, sorted(range(len(frecuencia)), key=lambda i: -frecuencia[i])):
+            celda_de[i] = hueco
+        return celda_de
+
+    def _costo_total(self, celda_de, frecuencia, vecinos, subconjunto=None):
+        """Costo esperado (por pick + afinidad) de los SKUs de `subconjunto` (todos por defecto)."""
+        indices = range(len(frecuencia)) if subconjunto is None else subconjunto
+        incluidos = None if subconjunto is None else set(subconjunto)
+        costo = 0.0
+        for i in indices:
+            ci = celda_de[i]
+            costo += frecuencia[i] * self._costo_pick[ci]
+            for j, peso in vecinos[i]:
+                # Cada par se cuenta una vez (desde el menor índice)
+                if j > i and (incluidos is None or j in incluidos):
+                    costo += peso * self._distancia(ci, celda_de[j])
+        return costo
+
+    def _delta(self, a, b, celda_de, frecuencia, vecinos):
+        """Cambio de costo si `a` y `b` intercambian celdas (solo sus términos)."""
+        ca, cb = celda_de[a], celda_de[b]
+        costo_pick = self._costo_pick
+        delta = (frecuencia[a] - frecuencia[b]) * (costo_pick[cb] - costo_pick[ca])
+        distancia = self._distancia
+        for j, peso in vecinos[a]:
+            if j != b:
+                cj = celda_de[j]
+                delta += peso * (distancia(cb, cj) - distancia(ca, cj))
+        for j, peso in vecinos[b]:
+            if j != a:
+                cj = celda_de[j]
+                delta += peso * (distancia(ca, cj) - distancia(cb, cj))
+        return delta
+
+    def _ocupantes(self, celda_de):
+        """SKUs de cada celda y posición de cada SKU en la lista de su celda."""
+        ocupantes = [[] for _ in self.celdas]
+        posicion = [0] * len(celda_de)
+        for i, c in enumerate(celda_de):
+            posicion[i] = len(ocupantes[c])
+            ocupantes[c].append(i)
+        return ocupantes, posicion
+
+    @staticmethod
+    def _intercambiar(a, b, celda_de, ocupantes, posicion):
+        ca, cb = celda_de[a], celda_de[b]
+        ocupantes[ca][posicion[a]] = b
+        ocupantes[cb][posicion[b]] = a
+        posicion[a], posicion[b] = posicion[b], posicion[a]
+        celda_de[a], celda_de[b] = cb, ca
+
+    def _busqueda_local(self, celda_de, frecuencia, vecinos, ocupantes, posicion):
+        """Intercambios que acercan cada SKU a sus socios de orden; retorna (intercambios, pasadas)."""
+        candidatos = sorted((i for i in range(len(frecuencia)) if vecinos[i]), key=lambda i: -frecuencia[i])
+        if not candidatos:
+            return 0, 0
+        rng = random.Random(self.semilla)
+        limite = time.perf_counter() + self.presupuesto_s
+        intercambios = pasadas = 0
+        mejoro = True
+        while mejoro and time.perf_counter() < limite:
+            mejoro = False
+            pasadas += 1
+            for k, a in enumerate(candidatos):
+                if k % 256 == 0 and time.perf_counter() >= limite:
+                    break
+                for j, _ in vecinos[a][:5]:
+                    destino = celda_de[j]
+                    if destino == celda_de[a]:
+                        continue
+                    # Se prueba con algunos ocupantes de la celda del socio
+                    ocupados = ocupantes[destino]
+                    for b in rng.sample(ocupados, min(3, len(ocupados))):
+                        if b == j or self._delta(a, b, celda_de, frecuencia, vecinos) >= -1e-9:
+                            continue
+                        self._intercambiar(a, b, celda_de, ocupantes, posicion)
+                        intercambios += 1
+                        mejoro = True
+                        break
+                    if celda_de[a] == destino:
+                        break
+        return intercambios, pasadas
+
+    def _conservar(self, celda_de, celda_actual, frecuencia, vecinos, ocupantes, posicion):
+        """Devuelve SKUs a su celda actual cuando el intercambio no sube el costo (menos reubicaciones).
+
+        Entre celdas de igual costo la semilla voraz mueve SKUs sin ganancia; aquí se
+        intercambia cada SKU movido con un ocupante de su celda actual si el costo no
+        empeora y el número de SKUs reubicados baja. Retorna cuántos SKUs se conservaron.
+        """
+        conservados = 0
+        for a in range(len(celda_de)):
+            origen = celda_actual[a]
+            if origen is None or celda_de[a] == origen:
+                continue
+            for b in ocupantes[origen][:MAX_OCUPANTES_CONSERVAR]:
+                # b deja su celda propuesta (origen) y pasa a la de a
+                antes = (celda_de[b] != celda_actual[b]) + 1
+                despues = celda_de[a] != celda_actual[b]
+                if despues < antes and self._delta(a, b, celda_de, frecuencia, vecinos) <= 1e-9:
+                    self._intercambiar(a, b, celda_de, ocupantes, posicion)
+                    conservados += 1
+                    break
+        return conservados
+
+    # ------------------------------------------------------------------
+    # Reproducción del historial
+    # ------------------------------------------------------------------
+    def _replay(self, ordenes, skus, indice_sku, actual, celda_de, max_ordenes):
+        """Costo real de las rutas de las órdenes con las ubicaciones actuales y las propuestas."""
+        costo_actual = costo_propuesto = 0.0
+        evaluadas = 0
+        for orden in ordenes[:max_ordenes]:
+            indices = {indice_sku[sku] for _, _, sku in orden}
+            # Solo las líneas con ubicación actual conocida, para comparar la misma carga
+            indices = [i for i in indices if actual[i] is not None]
+            if not indices:
+                continue
+            _, costo = medir_ruta_picking([actual[i] for i in indices], self.layout, self.costo_celda, self.costo_pasillo)
+            costo_actual += costo
+            _, costo = medir_ruta_picking([self.celdas[celda_de[i]] for i in indices], self.layout,
+                                          self.costo_celda, self.costo_pasillo)
+            costo_propuesto += costo
+            evaluadas += 1
+        ahorro = costo_actual - costo_propuesto
+        return {
+            'ordenes': evaluadas,
+            'costo_actual': round(costo_actual, 2),
+            'costo_propuesto': round(costo_propuesto, 2),
+            'ahorro': round(ahorro, 2),
+            'ahorro_pct': round(100.0 * ahorro / costo_actual, 2) if costo_actual else 0.0,
+        }
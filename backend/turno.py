@@ -0,0 +1,272 @@
+"""
+Módulo turno: simulación de eventos discretos de un turno completo.
+
+Las órdenes llegan a lo largo del turno (proceso de Poisson con semilla, o reproducidas
+desde un archivo), esperan en una cola FIFO y se asignan al primer robot libre. Cada
+robot toma hasta `ordenes_por_tour` órdenes de la cola, recorre sus ubicaciones desde
+su posición (INICIO en el primer tour, FINAL después) hasta FINAL y vuelve a quedar
+libre. La ruta de cada tour se planifica con el `Secuenciador` (el mismo modelo de
+costos que `RobotAlmacen`) sin materializar pasos, por lo que cada evento es O(columnas
+del tour) y un millón de eventos se procesa en menos de un minuto.
+
+Eventos en un heap (tiempo, secuencia, tipo, dato):
+  - LLEGADA: la orden entra a la cola; se programa la siguiente llegada (generación
+    perezosa, el heap nunca contiene más que una llegada y un evento por robot).
+  - FIN_TOUR: el robot entrega en FINAL y toma trabajo de la cola si hay.
+
+El tiempo está en segundos: un tour dura pasos / velocidad + unidades * tiempo_pick.
+"""
+
+import csv
+import heapq
+import json
+import math
+import random
+from collections import deque
+
+from .entrada import GestorEntrada
+from .layout import obtener_layout
+from .optimizador import Optimizador
+from .secuenciador import Secuenciador
+
+LLEGADA = 0
+FIN_TOUR = 1
+
+PERCENTILES = (50, 90, 99)
+MAX_PLANES_CACHE = 200_000
+
+
+def generar_llegadas(tasa_ordenes_h, duracion_s, layout=None, items_por_orden=(1, 5),
+                     unidades_por_item=(1, 3), semilla=None):
+    """Genera órdenes aleatorias (reproducibles con `semilla`) con llegadas de Poisson.
+
+    Produce dicts {'tiempo', 'id_orden', 'items': [[fila, col, cantidad], ...]} en orden
+    de tiempo hasta `duracion_s`.
+    """
+    layout = obtener_layout(layout)
+    rng = random.Random(semilla)
+    tasa_s = float(tasa_ordenes_h) / 3600.0
+    if tasa_s <= 0:
+        return
+    min_items, max_items = items_por_orden
+    min_u, max_u = unidades_por_item
+    rango_items, rango_u = max_items - min_items + 1, max_u - min_u + 1
+    filas, columnas = layout.filas, layout.columnas
+    aleatorio, exponencial = rng.random, rng.expovariate
+    tiempo = 0.0
+    n = 0
+    while True:
+        tiempo += exponencial(tasa_s)
+        if tiempo > duracion_s:
+            return
+        n += 1
+        # random() escalado es bastante más rápido que randrange() en el bucle caliente
+        items = [[int(aleatorio() * filas), int(aleatorio() * columnas), min_u + int(aleatorio() * rango_u)]
+                 for _ in range(min_items + int(aleatorio() * rango_items))]
+        yield {'tiempo': tiempo, 'id_orden': f'ORD{n:07d}', 'items': items}
+
+
+def leer_llegadas(ruta):
+    """Reproduce llegadas desde un archivo .ndjson/.jsonl, .json (lista) o .csv.
+
+    NDJSON/JSON: objetos {'tiempo', 'id_orden', 'items'}. CSV: encabezado con
+    tiempo,id_orden,fila,col,cantidad; las filas consecutivas con el mismo id_orden
+    forman una orden. Las llegadas deben venir ordenadas por tiempo.
+    """
+    ruta = str(ruta)
+    with open(ruta, 'r', encoding='utf-8', newline='') as f:
+        if ruta.endswith('.csv'):
+            actual = None
+            for fila_csv in csv.DictReader(f):
+                id_orden = fila_csv.get('id_orden', 'DESCONOCIDA')
+                if actual is None or actual['id_orden'] != id_orden:
+                    if actual is not None:
+                        yield actual
+                    actual = {'tiempo': float(fila_csv['tiempo']), 'id_orden': id_orden, 'items': []}
+                actual['items'].append([int(fila_csv['fila']), int(fila_csv['col']),
+                                        int(fila_csv.get('cantidad') or 1)])
+            if actual is not None:
+                yield actual
+        elif ruta.endswith('.json'):
+            yield from json.load(f)
+        else:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+
+def validar_llegadas(llegadas, layout=None):
+    """Valida llegadas recibidas por API y las retorna ordenadas por tiempo.
+
+    Cada llegada debe ser un objeto con 'tiempo' (número finito, no negativo) e 'items'
+    que pasen `GestorEntrada.depurar_ordenes` sin rechazos (celdas enteras dentro del
+    layout y cantidad positiva). Retorna {'tiempo', 'id_orden', 'items': [[fila, col,
+    cantidad], ...]} (un item [fila, col] es una unidad); lanza ValueError describiendo
+    la primera llegada inválida.
+    """
+    layout = obtener_layout(layout)
+    if not isinstance(llegadas, (list, tuple)):
+        raise ValueError("'llegadas' debe ser una lista de órdenes")
+    ordenes = []
+    for i, llegada in enumerate(llegadas):
+        if not isinstance(llegada, dict):
+            raise ValueError(f"La llegada {i} no es un objeto: {llegada!r}")
+        tiempo = llegada.get('tiempo')
+        if (isinstance(tiempo, bool) or not isinstance(tiempo, (int, float))
+                or not math.isfinite(tiempo) or tiempo < 0):
+            raise ValueError(f"La llegada {i} no tiene un 'tiempo' válido: {tiempo!r}")
+        items = llegada.get('items', [])
+        if isinstance(items, (list, tuple)):
+            # Como en `_planificar_tour`, un item [fila, col] es una unidad
+            items = [list(item) + [1] if isinstance(item, (list, tuple)) and len(item) == 2 else item
+                     for item in items]
+        ordenes.append({'id_orden': llegada.get('id_orden', 'DESCONOCIDA'), 'items': items})
+    depuracion = GestorEntrada.depurar_ordenes(ordenes, layout)
+    if depuracion['reporte']['rechazados']:
+        ejemplo = depuracion['reporte']['ejemplos'][0]
+        raise ValueError(f"Item {ejemplo['motivo']} en la orden {ejemplo['id_orden']}: {ejemplo['valor']!r}")
+    items = depuracion['items']
+    inicios = depuracion['inicios'] + [len(items)]
+    validas = [{'tiempo': float(llegada['tiempo']), 'id_orden': llegada.get('id_orden', 'DESCONOCIDA'),
+                'items': [[fila, col, cantidad] for _, fila, col, cantidad, _ in items[a:b]]}
+               for llegada, a, b in zip(llegadas, inicios, inicios[1:])]
+    validas.sort(key=lambda o: o['tiempo'])
+    return validas
+
+
+def percentiles(valores, ps=PERCENTILES):
+    """Percentiles por rango más cercano de una lista de valores ({'p50': ..., ...})."""
+    if not valores:
+        return {f'p{p}': 0 for p in ps}
+    ordenados = sorted(valores)
+    n = len(ordenados)
+    return {f'p{p}': round(ordenados[min(n - 1, max(0, -(-p * n // 100) - 1))], 2) for p in ps}
+
+
+class SimuladorTurno:
+    """Motor de eventos discretos para estimar el throughput de una flota durante un turno."""
+
+    def __init__(self, num_robots=1, layout=None, costo_celda=None, costo_pasillo=None,
+                 estrategia='secuencial_dp', ordenes_por_tour=1, velocidad=1.0, tiempo_pick=5.0):
+        self.num_robots = max(1, int(num_robots))
+        self.layout = obtener_layout(layout)
+        self.costo_celda = float(costo_celda if costo_celda is not None else self.layout.costo_celda)
+        self.costo_pasillo = float(costo_pasillo if costo_pasillo is not None else self.layout.costo_pasillo)
+        self.estrategia = estrategia
+        self.ordenes_por_tour = max(1, int(ordenes_por_tour))
+        self.velocidad = float(velocidad)
+        self.tiempo_pick = float(tiempo_pick)
+        self.secuenciador = Secuenciador(Optimizador(self.costo_celda, self.costo_pasillo, self.layout))
+        self._planes = {}
+
+    def _planificar_tour(self, ordenes, desde):
+        """Duración (s), costo y pasos del tour que recoge `ordenes` saliendo de `desde`."""
+        layout = self.layout
+        por_columna = {}
+        unidades = 0
+        for orden in ordenes:
+            for item in orden['items']:
+                fila, col = int(item[0]), int(item[1])
+                if not layout.contiene(fila, col):
+                    continue
+                por_columna.setdefault(col, []).append(fila)
+                unidades += int(item[2]) if len(item) > 2 else 1
+        # El plan solo depende del origen y de la fila mínima/máxima de cada columna
+        clave = (desde, tuple(sorted((col, min(fs), max(fs)) for col, fs in por_columna.items())))
+        plan = self._planes.get(clave)
+        if plan is None:
+            if len(self._planes) >= MAX_PLANES_CACHE:
+                self._planes.clear()
+            plan = self.secuenciador.planificar(por_columna, desde, layout.final, self.estrategia)
+            plan = self._planes[clave] = (plan['pasos'], plan['costo'])
+        pasos, costo = plan
+        return pasos / self.velocidad + unidades * self.tiempo_pick, costo, pasos
+
+    def simular(self, llegadas, duracion_s=8 * 3600, max_eventos=None):
+        """Procesa eventos hasta el fin del turno (o `max_eventos`) y retorna las métricas.
+
+        llegadas: iterable de órdenes {'tiempo', 'id_orden', 'items'} ordenado por tiempo.
+        """
+        duracion_s = float(duracion_s)
+        llegadas = iter(llegadas)
+        heap = []
+        secuencia = 0
+
+        def programar_llegada():
+            nonlocal secuencia
+            orden = next(llegadas, None)
+            if orden is not None and float(orden['tiempo']) <= duracion_s:
+                secuencia += 1
+                heapq.heappush(heap, (float(orden['tiempo']), secuencia, LLEGADA, orden))
+
+        cola = deque()
+        libres = list(range(self.num_robots))
+        posiciones = [tuple(self.layout.inicio)] * self.num_robots
+        ocupado_s = [0.0] * self.num_robots
+        tours = [0] * self.num_robots
+        costo_total = 0.0
+        pasos_totales = 0
+        latencias_cola = []
+        latencias_total = []
+        completadas = 0
+        llegadas_n = 0
+        eventos = 0
+
+        def despachar(robot, ahora):
+            nonlocal secuencia, costo_total, pasos_totales
+            lote = [cola.popleft() for _ in range(min(self.ordenes_por_tour, len(cola)))]
+            duracion, costo, pasos = self._planificar_tour([o for _, o in lote], posiciones[robot])
+            fin = ahora + duracion
+            # Solo cuenta como ocupado el tiempo dentro del turno
+            ocupado_s[robot] += min(fin, duracion_s) - ahora
+            tours[robot] += 1
+            costo_total += costo
+            pasos_totales += pasos
+            for llegada, _ in lote:
+                latencias_cola.append(ahora - llegada)
+            secuencia += 1
+            heapq.heappush(heap, (fin, secuencia, FIN_TOUR, (robot, [t for t, _ in lote])))
+
+        programar_llegada()
+        while heap:
+            if max_eventos is not None and eventos >= max_eventos:
+                break
+            ahora, _, tipo, dato = heapq.heappop(heap)
+            if ahora > duracion_s:
+                break
+            eventos += 1
+            if tipo == LLEGADA:
+                llegadas_n += 1
+                cola.append((ahora, dato))
+                programar_llegada()
+                if libres:
+                    despachar(libres.pop(), ahora)
+            else:
+                robot, tiempos_llegada = dato
+                posiciones[robot] = tuple(self.layout.final)
+                completadas += len(tiempos_llegada)
+                latencias_total.extend(ahora - t for t in tiempos_llegada)
+                if cola:
+                    despachar(robot, ahora)
+                else:
+                    libres.append(robot)
+
+        horas = duracion_s / 3600.0 if duracion_s > 0 else 1.0
+        return {
+            'duracion_h': round(duracion_s / 3600.0, 3),
+            'eventos': eventos,
+            'ordenes_recibidas': llegadas_n,
+            'ordenes_completadas': completadas,
+            'ordenes_pendientes': llegadas_n - completadas,
+            'ordenes_por_hora': round(completadas / horas, 2),
+            'utilizacion': round(sum(ocupado_s) / (self.num_robots * duracion_s), 4) if duracion_s > 0 else 0,
+            'latencia_cola_s': percentiles(latencias_cola),
+            'latencia_total_s': percentiles(latencias_total),
+            'costo_total': round(costo_total, 2),
+            'pasos_totales': pasos_totales,
+            'robots': [
+                {'robot': r + 1, 'tours': tours[r],
+                 'utilizacion': round(ocupado_s[r] / duracion_s, 4) if duracion_s > 0 else 0}
+                for r in range(self.num_robots)
+            ],
+        }
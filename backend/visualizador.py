@@ -1,4 +1,4 @@
-from .config import FILAS, COLUMNAS, PASILLOS, INICIO
+from .layout import obtener_layout
 
 
 class Visualizador:
@@ -9,26 +9,27 @@ class Visualizador:
         print("\n" + "=" * 80)
         print("VISUALIZACIÓN DEL ALMACÉN (Vista ASCII)")
         print("=" * 80)
-        visual = [['.' for _ in range(COLUMNAS)] for _ in range(FILAS)]
-        for col in PASILLOS:
-            for fila in range(FILAS):
+        layout = obtener_layout(getattr(robot, 'layout', None))
+        visual = [['.' for _ in range(layout.columnas)] for _ in range(layout.filas)]
+        for col in layout.pasillos:
+            for fila in range(layout.filas):
                 visual[fila][col] = '═'
         for fila, col in robot.paquetes:
             visual[fila][col] = 'P'
         for fila, col in robot.ruta[1:-1]:
             if visual[fila][col] == '.':
                 visual[fila][col] = '·'
-        visual[INICIO[0]][INICIO[1]] = 'S'
+        visual[robot.inicio[0]][robot.inicio[1]] = 'S'
         if len(robot.ruta) > 0:
             fila_final, col_final = robot.ruta[-1]
             visual[fila_final][col_final] = 'E'
         print("   ", end="")
-        for j in range(COLUMNAS):
+        for j in range(layout.columnas):
             print(f"{j:2d}", end="")
         print()
-        for i in range(FILAS):
+        for i in range(layout.filas):
             print(f"{i:2d} ", end="")
-            for j in range(COLUMNAS):
+            for j in range(layout.columnas):
                 print(f" {visual[i][j]}", end="")
             print()
         print("\n" + "-" * 80)
@@ -1350,14 +1350,20 @@ async function exportToExcel() {
     });
     
     const contentType = res.headers.get('content-type') || '';
+    let blob;
     
     if (contentType.includes('application/json')) {
-      const err = await res.json();
-      showNotification('Error al exportar: ' + (err.detail || err.error), 'error');
-      return;
+      const data = await res.json();
+      if (!data.job_id) {
+        showNotification('Error al exportar: ' + (data.detail || data.error), 'error');
+        return;
+      }
+      // Reporte grande: el servidor lo genera en segundo plano
+      blob = await waitForExportJob(data.job_id);
+    } else {
+      blob = await res.blob();
     }
     
-    const blob = await res.blob();
     const url = URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;
@@ -1377,6 +1383,27 @@ async function exportToExcel() {
   }
 }
 
+// Poll a background export job until its file is ready (gives up after EXPORT_POLL_MAX_ATTEMPTS)
+const EXPORT_POLL_INTERVAL_MS = 1000;
+const EXPORT_POLL_MAX_ATTEMPTS = 300;
+
+async function waitForExportJob(jobId) {
+  for (let attempt = 0; attempt < EXPORT_POLL_MAX_ATTEMPTS; attempt++) {
+    await new Promise(resolve => setTimeout(resolve, EXPORT_POLL_INTERVAL_MS));
+    const res = await fetch(apiBase + '/export/jobs/' + jobId);
+    const job = await res.json();
+    if (job.estado === 'listo') {
+      const file = await fetch(apiBase + '/export/jobs/' + jobId + '/download');
+      if (!file.ok) throw 'no se pudo descargar el reporte (' + file.status + ')';
+      return await file.blob();
+    }
+    if (job.estado === 'error' || job.error) {
+      throw job.error || 'trabajo de exportación no encontrado';
+    }
+  }
+  throw 'la exportación no terminó en ' + (EXPORT_POLL_INTERVAL_MS * EXPORT_POLL_MAX_ATTEMPTS / 1000) + ' s';
+}
+
 // Display Consolidation Results
 function displayConsolidationResults(result) {
   const stats = result.estadisticas || {};
@@ -0,0 +1,148 @@
+"""Reproduce un historial de órdenes con cada estrategia de ruteo y compara costo y latencia.
+
+Cada orden se recorre con `RobotAlmacen(estrategia=...)` (el `Optimizador` y el
+`Secuenciador` para las estrategias distintas de 'secuencial'). Por estrategia se
+reporta costo total, costo por pick, tiempo por ruta y latencias p50/p90/p99 (µs). La salida
+es JSON con claves ordenadas, así dos corridas con la misma semilla se pueden comparar
+con `diff` o con `--comparar`.
+
+Uso:
+    python scripts/benchmark_estrategias.py [--ordenes 20000] [--semilla 42]
+        [--archivo historial.ndjson] [--estrategias secuencial,secuencial_dp]
+        [--salida resultado.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.entrada import GestorEntrada
+from backend.layout import obtener_layout
+from backend.robot import RobotAlmacen
+from backend.secuenciador import ESTRATEGIAS
+from backend.turno import generar_llegadas, leer_llegadas, percentiles
+
+REFERENCIA = 'secuencial'
+
+
+def cargar_ordenes(args, layout):
+    """Paquetes [[fila, col], ...] de cada orden (sintéticas con semilla o desde archivo)."""
+    if args.archivo:
+        llegadas = leer_llegadas(args.archivo)
+    else:
+        # Una orden por segundo sin límite de tiempo: se toman exactamente `--ordenes`
+        llegadas = generar_llegadas(3600, math.inf, layout=layout, items_por_orden=(args.min_items, args.max_items),
+                                    semilla=args.semilla)
+    ordenes = []
+    for llegada in islice(llegadas, args.ordenes):
+        paquetes = GestorEntrada.validar_paquetes([item[:2] for item in llegada.get('items', [])], layout)
+        if paquetes:
+            ordenes.append(paquetes)
+    return ordenes
+
+
+def medir_estrategia(ordenes, estrategia, layout):
+    """Recorre todas las órdenes con una estrategia; retorna sus métricas agregadas."""
+    # Calentamiento: índices de costos y cachés de tramos fuera de la medición
+    RobotAlmacen(paquetes=ordenes[0], estrategia=estrategia, layout=layout).ejecutar_recoleccion(detalle=False)
+    costo_total = 0.0
+    picks = 0
+    latencias_us = []
+    reloj = time.perf_counter
+    inicio_total = reloj()
+    for paquetes in ordenes:
+        t0 = reloj()
+        resultado = RobotAlmacen(paquetes=paquetes, estrategia=estrategia, layout=layout).ejecutar_recoleccion(detalle=False)
+        latencias_us.append((reloj() - t0) * 1e6)
+        costo_total += resultado['total_cost']
+        picks += len(paquetes)
+    tiempo_total = reloj() - inicio_total
+    return {
+        'rutas': len(ordenes),
+        'picks': picks,
+        'costo_total': round(costo_total, 2),
+        'costo_por_ruta': round(costo_total / len(ordenes), 4),
+        'costo_por_pick': round(costo_total / picks, 4),
+        'tiempo_total_s': round(tiempo_total, 3),
+        'tiempo_por_ruta_ms': round(1000.0 * tiempo_total / len(ordenes), 4),
+        'latencia_us': dict(percentiles(latencias_us, (50, 90, 99)), max=round(max(latencias_us), 2)),
+    }
+
+
+def comparar(actual, anterior):
+    """Diferencias de costo y latencia p50/p99 contra un resultado anterior (texto legible)."""
+    lineas = []
+    for estrategia, metricas in actual['estrategias'].items():
+        previo = anterior.get('estrategias', {}).get(estrategia)
+        if previo is None:
+            lineas.append(f"  {estrategia}: sin datos en el resultado anterior")
+            continue
+        partes = []
+        for nombre, a, b in (('costo_total', metricas['costo_total'], previo['costo_total']),
+                             ('p50_us', metricas['latencia_us']['p50'], previo['latencia_us']['p50']),
+                             ('p99_us', metricas['latencia_us']['p99'], previo['latencia_us']['p99'])):
+            cambio = f"{100.0 * (a - b) / b:+.2f}%" if b else 'n/a'
+            partes.append(f"{nombre} {b} -> {a} ({cambio})")
+        lineas.append(f"  {estrategia}: " + ', '.join(partes))
+    return '\n'.join(lineas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ordenes', type=int, default=20000, help='órdenes a reproducir (máximo si hay --archivo)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--min-items', type=int, default=1)
+    parser.add_argument('--max-items', type=int, default=8)
+    parser.add_argument('--archivo', help='historial .ndjson/.jsonl, .json o .csv (formato de /simulate/shift)')
+    parser.add_argument('--layout', help='id de un layout registrado')
+    parser.add_argument('--estrategias', default=','.join(ESTRATEGIAS), help='lista separada por comas')
+    parser.add_argument('--salida', help='archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--comparar', help='resultado JSON anterior contra el que comparar')
+    args = parser.parse_args()
+
+    layout = obtener_layout(args.layout)
+    estrategias = [e.strip() for e in args.estrategias.split(',') if e.strip()]
+    desconocidas = [e for e in estrategias if e not in ESTRATEGIAS]
+    if desconocidas:
+        parser.error(f"Estrategias desconocidas: {', '.join(desconocidas)} (disponibles: {', '.join(ESTRATEGIAS)})")
+    ordenes = cargar_ordenes(args, layout)
+    if not ordenes:
+        parser.error('No hay órdenes con paquetes dentro del layout')
+
+    resultados = {estrategia: medir_estrategia(ordenes, estrategia, layout) for estrategia in estrategias}
+    referencia = resultados.get(REFERENCIA)
+    if referencia:
+        for metricas in resultados.values():
+            ahorro = referencia['costo_total'] - metricas['costo_total']
+            metricas[f'ahorro_vs_{REFERENCIA}_pct'] = round(100.0 * ahorro / referencia['costo_total'], 2)
+
+    salida = {
+        'parametros': {
+            'ordenes': len(ordenes),
+            'semilla': None if args.archivo else args.semilla,
+            'archivo': args.archivo,
+            'items_por_orden': None if args.archivo else [args.min_items, args.max_items],
+            'layout': layout.id,
+        },
+        'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'estrategias': resultados,
+    }
+    texto = json.dumps(salida, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.salida:
+        Path(args.salida).write_text(texto + '\n', encoding='utf-8')
+    else:
+        print(texto)
+
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding='utf-8'))
+        print(f"Comparación contra {args.comparar}:\n{comparar(salida, anterior)}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
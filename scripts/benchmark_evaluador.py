@@ -0,0 +1,71 @@
+"""Compara el evaluador vectorizado con la reproducción de rutas vía RobotAlmacen._registrar_paso.
+
+Uso: python scripts/benchmark_evaluador.py [N] [K]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from backend.config import FILAS, COLUMNAS
+from backend.evaluador import evaluar_rutas
+from backend.robot import RobotAlmacen
+
+
+def generar_rutas(n, k, seed=42):
+    """Rutas ortogonales aleatorias (cada tramo cambia solo fila o solo columna)."""
+    rng = random.Random(seed)
+    rutas = []
+    for _ in range(n):
+        pos = [rng.randrange(FILAS), rng.randrange(COLUMNAS)]
+        ruta = [list(pos)]
+        for _ in range(k - 1):
+            if rng.random() < 0.5:
+                pos[0] = rng.randrange(FILAS)
+            else:
+                pos[1] = rng.randrange(COLUMNAS)
+            ruta.append(list(pos))
+        rutas.append(ruta)
+    return rutas
+
+
+def evaluar_python(rutas):
+    costos, pasos = [], []
+    for ruta in rutas:
+        robot = RobotAlmacen(paquetes=[], inicio=ruta[0])
+        for desde, hacia in zip(ruta, ruta[1:]):
+            robot._registrar_paso(tuple(desde), tuple(hacia), "")
+        costos.append(robot.costo_total)
+        pasos.append(sum(p['Pasos'] for p in robot.pasos_detalle))
+    return costos, pasos
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    rutas = generar_rutas(n, k)
+
+    t0 = time.perf_counter()
+    costos_py, pasos_py = evaluar_python(rutas)
+    t_py = time.perf_counter() - t0
+
+    arr = np.array(rutas)
+    t0 = time.perf_counter()
+    costos_np, pasos_np = evaluar_rutas(arr)
+    t_np = time.perf_counter() - t0
+
+    assert np.allclose(costos_np, costos_py), "Los costos no coinciden"
+    assert (pasos_np == np.array(pasos_py)).all(), "Los pasos no coinciden"
+
+    print(f"Rutas: {n} x {k} puntos")
+    print(f"  Python (_registrar_paso): {t_py:.3f} s")
+    print(f"  NumPy (evaluar_rutas):    {t_np:.3f} s")
+    print(f"  Aceleración: {t_py / t_np:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
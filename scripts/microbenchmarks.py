@@ -0,0 +1,190 @@
+"""Micro-benchmarks (timeit) de los caminos críticos, con línea base y umbral de regresión.
+
+Casos: `Optimizador.calcular_costo_movimiento`, `RobotAlmacen.ejecutar_recoleccion`,
+`ConsolidadorPicking.consolidar_ordenes`, `ConteoCiclico.generar_plan` y el endpoint
+`/simulate` (TestClient, sin caché ni persistencia), sobre cuadrículas de 9x12 a
+200x1000 y entradas de 10 a 100k ítems. Cada caso se mide con `timeit` (número de
+repeticiones calibrado con `autorange`, mínimo de 5 series) y se compara con la línea
+base guardada: si tarda más de base × (1 + umbral) se vuelve a medir (hasta
+`REINTENTOS` veces, quedándose con el mejor tiempo) para descartar ruido y, si sigue
+por encima, se informa como regresión y el script termina con código 1. Las
+diferencias menores que `TOLERANCIA_S` no cuentan (casos de microsegundos).
+
+Uso:
+    python scripts/microbenchmarks.py                       # comparar con la línea base
+    python scripts/microbenchmarks.py --rapido              # solo entradas y cuadrículas chicas
+    python scripts/microbenchmarks.py --filtro robot --umbral 0.5
+    python scripts/microbenchmarks.py --guardar             # regenerar la línea base
+
+La línea base depende de la máquina: regenérala con --guardar en la máquina de CI.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+from pathlib import Path
+
+# Sin persistencia: /simulate no debe escribir ni leer la base SQLite durante la medición
+os.environ['SIMULADOR_DB'] = ''
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.consolidador import ConsolidadorPicking
+from backend.conteo_ciclico import ConteoCiclico
+from backend.layout import WarehouseLayout
+from backend.optimizador import Optimizador
+from backend.robot import RobotAlmacen
+
+LINEA_BASE = Path(__file__).with_name('microbenchmarks_baseline.json')
+UMBRAL = 0.25
+REINTENTOS = 2
+TOLERANCIA_S = 50e-6
+SEMILLA = 42
+
+CUADRICULAS = [(9, 12), (50, 100), (200, 1000)]
+TAMANOS = [10, 1000, 100000]
+# Límites del modo --rapido
+MAX_TAMANO_RAPIDO = 1000
+MAX_CELDAS_RAPIDO = 50 * 100
+
+
+def crear_layout(filas, columnas):
+    """Cuadrícula con un pasillo cada 3 columnas (como la de 9x12) y transiciones en 0 y columnas-4."""
+    return WarehouseLayout(
+        id=f'bench_{filas}x{columnas}', filas=filas, columnas=columnas,
+        pasillos=range(1, columnas, 3), transiciones=(0, max(0, columnas - 4)),
+        inicio=[0, 0], final=[filas - 1, columnas - 1],
+    )
+
+
+def celdas_aleatorias(layout, n, rng):
+    """n celdas (fila, col) de almacenamiento (columnas que no son pasillo)."""
+    columnas = [c for c in range(layout.columnas) if not layout.es_pasillo(c)]
+    return [[rng.randrange(layout.filas), rng.choice(columnas)] for _ in range(n)]
+
+
+def casos(rapido=False):
+    """Genera (nombre, función sin argumentos) de cada caso; los datos se preparan fuera de la medición."""
+    from fastapi.testclient import TestClient
+    from backend.app import app
+    from backend.cache import cache_rutas
+
+    cliente = TestClient(app)
+    for filas, columnas in CUADRICULAS:
+        if rapido and filas * columnas > MAX_CELDAS_RAPIDO:
+            continue
+        layout = crear_layout(filas, columnas)
+        optimizador = Optimizador(layout.costo_celda, layout.costo_pasillo, layout)
+        for n in TAMANOS:
+            if rapido and n > MAX_TAMANO_RAPIDO:
+                continue
+            rng = random.Random(SEMILLA)
+            celdas = celdas_aleatorias(layout, n, rng)
+            etiqueta = f'[{filas}x{columnas},n={n}]'
+
+            pares = list(zip(celdas, celdas[1:] + celdas[:1]))
+
+            def costo_movimiento(pares=pares, optimizador=optimizador):
+                for (f1, c1), (f2, c2) in pares:
+                    optimizador.calcular_costo_movimiento(f1, c1, f2, c2)
+            yield 'optimizador.calcular_costo_movimiento' + etiqueta, costo_movimiento
+
+            def recoleccion(celdas=celdas, layout=layout):
+                RobotAlmacen(paquetes=celdas, layout=layout).ejecutar_recoleccion(detalle=False)
+            yield 'robot.ejecutar_recoleccion' + etiqueta, recoleccion
+
+            ordenes = [{'id_orden': f'ORD{k}', 'items': [[f, c, 1, f'SKU-{f}-{c}'] for f, c in celdas[k:k + 10]]}
+                       for k in range(0, n, 10)]
+
+            def consolidar(ordenes=ordenes, layout=layout):
+                ConsolidadorPicking.consolidar_ordenes(ordenes, layout=layout)
+            yield 'consolidador.consolidar_ordenes' + etiqueta, consolidar
+
+            ubicaciones = [{'sku': f'SKU{i:06d}', 'fila': f, 'col': c, 'movimientos': rng.randrange(100),
+                            'conteos_ultimos_365dias': rng.randrange(6)} for i, (f, c) in enumerate(celdas)]
+            conteo = ConteoCiclico(layout=layout)
+
+            def generar_plan(ubicaciones=ubicaciones, conteo=conteo):
+                conteo.generar_plan(ubicaciones)
+            yield 'conteo_ciclico.generar_plan' + etiqueta, generar_plan
+
+            payload = {'paquetes': celdas, 'layout': layout.to_dict(), 'detalle': False}
+
+            def simulate(payload=payload):
+                cache_rutas.limpiar()
+                respuesta = cliente.post('/simulate', json=payload)
+                respuesta.raise_for_status()
+            yield 'api.simulate' + etiqueta, simulate
+
+
+def medir(funcion, series=5):
+    """Segundos por ejecución: mínimo de `series` mediciones calibradas con autorange."""
+    temporizador = timeit.Timer(funcion)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeat=series, number=numero)) / numero
+
+
+def es_regresion(segundos, previo, umbral):
+    return segundos - previo > max(umbral * previo, TOLERANCIA_S)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rapido', action='store_true', help='omitir 100k ítems y cuadrículas grandes')
+    parser.add_argument('--filtro', help='solo los casos cuyo nombre contiene este texto')
+    parser.add_argument('--umbral', type=float, default=None, help=f'regresión tolerada (por defecto {UMBRAL} = 25%%)')
+    parser.add_argument('--linea-base', default=str(LINEA_BASE), help='archivo JSON de la línea base')
+    parser.add_argument('--guardar', action='store_true', help='guardar los resultados como nueva línea base')
+    parser.add_argument('--json', help='escribir también los resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    ruta_base = Path(args.linea_base)
+    base = json.loads(ruta_base.read_text(encoding='utf-8')) if ruta_base.exists() else {}
+    umbral = args.umbral if args.umbral is not None else base.get('umbral', UMBRAL)
+    base_casos = base.get('casos', {})
+
+    resultados = {}
+    regresiones = []
+    print(f"{'caso':<62} {'actual':>12} {'base':>12} {'cambio':>9}")
+    for nombre, funcion in casos(args.rapido):
+        if args.filtro and args.filtro not in nombre:
+            continue
+        segundos = medir(funcion)
+        previo = base_casos.get(nombre)
+        if previo:
+            # Antes de declarar una regresión se repite la medición (el ruido solo suma tiempo)
+            for _ in range(REINTENTOS):
+                if not es_regresion(segundos, previo, umbral):
+                    break
+                segundos = min(segundos, medir(funcion))
+            cambio = (segundos - previo) / previo
+            marca = '  REGRESIÓN' if es_regresion(segundos, previo, umbral) else ''
+            if marca:
+                regresiones.append(nombre)
+            print(f"{nombre:<62} {segundos * 1e3:>10.3f}ms {previo * 1e3:>10.3f}ms {cambio:>+8.1%}{marca}")
+        else:
+            print(f"{nombre:<62} {segundos * 1e3:>10.3f}ms {'-':>12} {'-':>9}")
+        resultados[nombre] = segundos
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'casos': resultados}, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+    if args.guardar:
+        # Se conservan los casos no medidos en esta corrida (p. ej. con --rapido o --filtro)
+        nueva = {
+            'umbral': umbral,
+            'entorno': {'python': platform.python_version(), 'plataforma': platform.platform()},
+            'casos': dict(base_casos, **{nombre: round(segundos, 7) for nombre, segundos in resultados.items()}),
+        }
+        ruta_base.write_text(json.dumps(nueva, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+        print(f"Línea base guardada en {ruta_base}")
+        return 0
+    if regresiones:
+        print(f"{len(regresiones)} caso(s) superan la línea base en más de {umbral:.0%}: {', '.join(regresiones)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
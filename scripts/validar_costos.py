@@ -0,0 +1,101 @@
+"""Verifica que los costos informados coincidan con lo que cobra `RobotAlmacen`.
+
+Sobre instancias aleatorias (con semilla) y para cada estrategia comprueba que:
+  - la ruta no tenga tramos diagonales ni cruce pasillos sin pasar por una columna de
+    transición (`tests/utils.validate_route`, sobre el layout por defecto);
+  - `comparacion_voraz.costo_voraz` sea el costo del recorrido 'secuencial' ejecutado
+    con los mismos datos y el ahorro informado nunca sea negativo;
+  - el `costo_ruta`/`pasos_ruta` de `ConsolidadorPicking.consolidar_ordenes` sea lo que
+    cobra `RobotAlmacen` (misma estrategia) por las ubicaciones consolidadas.
+
+Uso:
+    python scripts/validar_costos.py [--instancias 300] [--semilla 0]
+Termina con código 1 si alguna comprobación falla.
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tests'))
+
+from backend.consolidador import ConsolidadorPicking
+from backend.layout import obtener_layout
+from backend.robot import RobotAlmacen
+from backend.secuenciador import ESTRATEGIAS
+from utils import validate_route
+
+TOLERANCIA = 0.011  # los costos se informan redondeados a 2 decimales
+
+
+def instancias(cantidad, semilla, layout):
+    """Paquetes aleatorios; una de cada tres instancias con INICIO y FINAL arbitrarios."""
+    rng = random.Random(semilla)
+    for k in range(cantidad):
+        paquetes = [[rng.randrange(layout.filas), rng.randrange(layout.columnas)]
+                    for _ in range(rng.randint(1, 15))]
+        extremos = {}
+        if k % 3 == 0:
+            extremos = {'inicio': [rng.randrange(layout.filas), rng.randrange(layout.columnas)],
+                        'final': [rng.randrange(layout.filas), rng.randrange(layout.columnas)]}
+        yield paquetes, extremos
+
+
+def verificar_rutas(layout, casos):
+    fallas = []
+    for k, (paquetes, extremos) in enumerate(casos):
+        voraz = RobotAlmacen(paquetes=paquetes, estrategia='secuencial', layout=layout, **extremos)
+        costo_voraz = voraz.ejecutar_recoleccion(detalle=False)['total_cost']
+        for estrategia in ESTRATEGIAS:
+            resultado = RobotAlmacen(paquetes=paquetes, estrategia=estrategia, layout=layout,
+                                     **extremos).ejecutar_recoleccion(detalle=False)
+            diagonales, violaciones = validate_route(resultado['ruta'])
+            if diagonales or violaciones:
+                fallas.append(f"#{k} {estrategia}: ruta inválida {diagonales or violaciones}")
+            comparacion = resultado.get('comparacion_voraz')
+            if comparacion is None:
+                continue
+            if abs(comparacion['costo_voraz'] - costo_voraz) > TOLERANCIA:
+                fallas.append(f"#{k} {estrategia}: costo_voraz {comparacion['costo_voraz']} != secuencial {costo_voraz}")
+            if comparacion['ahorro'] < 0:
+                fallas.append(f"#{k} {estrategia}: ahorro negativo {comparacion['ahorro']}")
+    return fallas
+
+
+def verificar_consolidacion(layout, casos):
+    fallas = []
+    for k, (paquetes, extremos) in enumerate(casos):
+        if extremos:
+            continue  # la consolidación siempre sale de INICIO y entrega en FINAL del layout
+        ordenes = [{'id_orden': f'ORD{i}', 'items': [[fila, col, 1, f'SKU-{fila}-{col}'] for fila, col in paquetes[i::3]]}
+                   for i in range(3)]
+        celdas = sorted({(fila, col) for fila, col in paquetes})
+        for estrategia in ESTRATEGIAS:
+            estadisticas = ConsolidadorPicking.consolidar_ordenes(ordenes, layout=layout, estrategia=estrategia)['estadisticas']
+            resultado = RobotAlmacen(paquetes=[list(c) for c in celdas], estrategia=estrategia,
+                                     layout=layout).ejecutar_recoleccion(detalle=False)
+            if (abs(estadisticas['costo_ruta'] - resultado['total_cost']) > TOLERANCIA
+                    or estadisticas['pasos_ruta'] != resultado['pasos_totales']):
+                fallas.append(f"#{k} {estrategia}: consolidación {estadisticas['costo_ruta']}/{estadisticas['pasos_ruta']} "
+                              f"!= robot {resultado['total_cost']}/{resultado['pasos_totales']}")
+    return fallas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--instancias', type=int, default=300)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    layout = obtener_layout(None)
+    casos = list(instancias(args.instancias, args.semilla, layout))
+    fallas = verificar_rutas(layout, casos) + verificar_consolidacion(layout, casos)
+    for falla in fallas[:50]:
+        print(falla)
+    print(f"{len(casos)} instancias, {len(fallas)} falla(s)")
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())